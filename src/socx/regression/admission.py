@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import os
+import time
+import asyncio as aio
+from dataclasses import dataclass
+from collections.abc import Callable
+
+import psutil as ps
+from dynaconf.utils.boxing import DynaBox
+
+from ..log import logger
+
+
+__all__ = ("HostLoad", "AdmissionController")
+
+
+@dataclass(frozen=True)
+class HostLoad:
+    """
+    Snapshot of the load on the host.
+
+    Members
+    -------
+    load_per_cpu: float
+        One minute load average divided by the number of logical CPUs.
+
+    free_memory_mb: float
+        Memory available for new processes in MiB.
+
+    iowait_percent: float
+        Percentage of CPU time spent waiting on I/O since the last sample.
+    """
+
+    load_per_cpu: float
+    free_memory_mb: float
+    iowait_percent: float
+
+    @classmethod
+    def sample(cls) -> HostLoad:
+        """Sample the current load on the host."""
+        cpus = ps.cpu_count() or 1
+        times = ps.cpu_times_percent(interval=None)
+        return cls(
+            load_per_cpu=os.getloadavg()[0] / cpus,
+            free_memory_mb=ps.virtual_memory().available / (1 << 20),
+            iowait_percent=getattr(times, "iowait", 0.0),
+        )
+
+
+class AdmissionController:
+    """
+    Gate for starting tests based on the headroom left on the host.
+
+    A test is only admitted once the host's load average, available memory
+    and I/O wait are all within their configured thresholds. Admissions are
+    spaced by at least `settle` seconds so the load caused by a newly started
+    test is reflected in the samples before the next one is admitted.
+
+    So that a regression never stalls on a busy shared host, a test is
+    admitted regardless of the host's load when none of the regression's
+    tests are running, or once it waited for `max_wait` seconds.
+
+    Members
+    -------
+    enabled: bool
+        When False, every test is admitted immediately.
+
+    max_load_per_cpu: float
+        Maximal one minute load average per logical CPU.
+
+    min_free_memory_mb: float
+        Minimal memory in MiB that must be available.
+
+    max_iowait_percent: float
+        Maximal percentage of CPU time spent waiting on I/O.
+
+    interval: float
+        Seconds to wait between samples while the host has no headroom.
+
+    settle: float
+        Minimal number of seconds between two consecutive admissions.
+
+    max_wait: float
+        Maximal number of seconds a test waits for headroom, 0 for no limit.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = False,
+        max_load_per_cpu: float = 1.0,
+        min_free_memory_mb: float = 2048,
+        max_iowait_percent: float = 20.0,
+        interval: float = 1.0,
+        settle: float = 1.0,
+        max_wait: float = 600.0,
+    ) -> None:
+        self.enabled = bool(enabled)
+        self.max_load_per_cpu = float(max_load_per_cpu)
+        self.min_free_memory_mb = float(min_free_memory_mb)
+        self.max_iowait_percent = float(max_iowait_percent)
+        self.interval = float(interval)
+        self.settle = float(settle)
+        self.max_wait = float(max_wait)
+        self._lock = aio.Lock()
+        self._last_admission = 0.0
+
+    @classmethod
+    def from_settings(cls, cfg: DynaBox) -> AdmissionController:
+        """Create an admission controller from a settings object."""
+        return cls(
+            enabled=cfg.enabled,
+            max_load_per_cpu=cfg.max_load_per_cpu,
+            min_free_memory_mb=cfg.min_free_memory_mb,
+            max_iowait_percent=cfg.max_iowait_percent,
+            interval=cfg.interval,
+            settle=cfg.settle,
+            max_wait=cfg.max_wait,
+        )
+
+    def blocked_by(self, load: HostLoad) -> str | None:
+        """Get the reason the host has no headroom, or None if it has."""
+        if load.load_per_cpu > self.max_load_per_cpu:
+            return f"load per cpu {load.load_per_cpu:.2f}"
+        if load.free_memory_mb < self.min_free_memory_mb:
+            return f"free memory {load.free_memory_mb:.0f}MiB"
+        if load.iowait_percent > self.max_iowait_percent:
+            return f"iowait {load.iowait_percent:.1f}%"
+        return None
+
+    async def admit(self, idle: Callable[[], bool] | None = None) -> None:
+        """
+        Wait until the host has enough headroom to start another test.
+
+        Parameters
+        ----------
+        idle: Callable[[], bool] | None
+            Tells whether none of the regression's tests are running, in
+            which case the test is admitted regardless of the host's load.
+        """
+        if not self.enabled:
+            return
+        async with self._lock:
+            reason = None
+            started = time.monotonic()
+            while True:
+                elapsed = time.monotonic() - self._last_admission
+                if elapsed < self.settle:
+                    await aio.sleep(self.settle - elapsed)
+                blocked_by = self.blocked_by(HostLoad.sample())
+                if blocked_by is None:
+                    break
+                if idle is not None and idle():
+                    logger.debug(
+                        f"admission: no test is running, admitting one "
+                        f"despite {blocked_by}."
+                    )
+                    break
+                waited = time.monotonic() - started
+                if self.max_wait and waited >= self.max_wait:
+                    logger.warning(
+                        f"admission: admitting a test after waiting "
+                        f"{waited:.0f}s for headroom, {blocked_by}."
+                    )
+                    break
+                if blocked_by != reason:
+                    logger.debug(f"admission: holding tests, {blocked_by}.")
+                    reason = blocked_by
+                await aio.sleep(self.interval)
+            self._last_admission = time.monotonic()
@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+from collections import Counter
+
+from dynaconf.utils.boxing import DynaBox
+
+from .test import Test
+from .signature import signature
+from ..log import logger
+
+
+__all__ = ("CircuitBreaker",)
+
+
+class CircuitBreaker:
+    """
+    Detects systemic failures from the earliest results of a regression.
+
+    The first `window` finished tests are observed, and the breaker trips
+    as soon as more than `threshold` of them (as a fraction of `window`)
+    failed with the same error signature. A failure shared by that many of
+    the first tests is almost certainly not the fault of the tests (e.g. a
+    broken build), so there is no point in running the rest of them.
+
+    Members
+    -------
+    enabled: bool
+        Whether the breaker observes results at all.
+
+    window: int
+        Number of earliest finished tests observed.
+
+    threshold: float
+        Fraction of `window` which must fail with the same signature for the
+        breaker to trip.
+
+    tripped: str | None
+        Signature which tripped the breaker or None.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        window: int = 50,
+        threshold: float = 0.8,
+    ) -> None:
+        self.enabled = bool(enabled)
+        self.window = max(1, int(window))
+        self.threshold = float(threshold)
+        self.tripped: str | None = None
+        self._observed = 0
+        self._signatures: Counter[str] = Counter()
+
+    @classmethod
+    def from_settings(cls, cfg: DynaBox) -> CircuitBreaker:
+        """Create a circuit breaker from a settings object."""
+        return cls(
+            enabled=cfg.enabled,
+            window=cfg.window,
+            threshold=cfg.threshold,
+        )
+
+    @property
+    def limit(self) -> int:
+        """Number of failures with the same signature which trips."""
+        return int(self.window * self.threshold)
+
+    def observe(self, test: Test) -> str | None:
+        """
+        Observe the result of a finished test.
+
+        Returns
+        -------
+        The signature which tripped the breaker if this result tripped it,
+        otherwise None.
+        """
+        if not self.enabled or self.tripped or self._observed >= self.window:
+            return None
+        self._observed += 1
+        if not test.failed:
+            return None
+        sig = signature(test)
+        self._signatures[sig] += 1
+        if self._signatures[sig] > self.limit:
+            self.tripped = sig
+            logger.error(
+                f"circuit breaker tripped: {self._signatures[sig]} of the "
+                f"first {self._observed} tests failed with: {sig}"
+            )
+            return sig
+        return None
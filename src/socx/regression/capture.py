@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import io
+import asyncio as aio
+from typing import TextIO
+from typing import BinaryIO
+from pathlib import Path
+from collections.abc import Callable
+
+from ..log import logger
+
+
+__all__ = ("OutputCapture",)
+
+
+class OutputCapture:
+    """
+    Streaming capture of a single output pipe of a test process.
+
+    The pipe is copied in chunks to a file on disk while only a bounded tail
+    of the output is kept in memory, which keeps the memory footprint of a
+    test constant regardless of how much its process prints. Chunks are
+    buffered and written to the file by a worker thread, so the event loop
+    never blocks on disk.
+
+    When no path is given, the output is kept in memory in its entirety.
+
+    Members
+    -------
+    path: Path | None
+        Path of the file the captured output is written to, or None if the
+        output is only captured in memory.
+
+    chunk_size: int
+        Maximal number of bytes read from the pipe per read operation.
+
+    buffer_size: int
+        Number of bytes buffered in memory before they are written to the
+        capture file.
+
+    tail_size: int | None
+        Maximal number of bytes of the output's tail kept in memory, None
+        for no limit.
+
+    size: int
+        Total number of bytes captured so far.
+
+    listener: Callable[[int], None] | None
+        Called with the size of every chunk drained from the pipe.
+    """
+
+    __slots__ = (
+        "_tail",
+        "buffer_size",
+        "chunk_size",
+        "listener",
+        "path",
+        "size",
+        "tail_size",
+    )
+
+    def __init__(
+        self,
+        path: str | Path | None = None,
+        chunk_size: int = 65536,
+        tail_size: int | None = 8192,
+        buffer_size: int = 1 << 20,
+    ) -> None:
+        self.path = Path(path) if path is not None else None
+        self.chunk_size = int(chunk_size)
+        self.buffer_size = int(buffer_size)
+        self.tail_size = int(tail_size) if path is not None else None
+        self.size = 0
+        self.listener: Callable[[int], None] | None = None
+        self._tail = bytearray()
+
+    @property
+    def tail(self) -> str:
+        """The last `tail_size` bytes of captured output decoded as text."""
+        return self._tail.decode(errors="replace")
+
+    def open(self) -> TextIO:
+        """Open the captured output for reading as a text stream."""
+        if self.path is None or not self.path.exists():
+            return io.StringIO(self.tail)
+        return self.path.open(encoding="utf-8", errors="replace")
+
+    def read(self) -> str:
+        """Read the entire captured output from disk."""
+        with self.open() as file:
+            return file.read()
+
+    def feed(self, chunk: bytes) -> None:
+        """Account for a chunk of output in the in-memory tail buffer."""
+        self.size += len(chunk)
+        self._tail += chunk
+        if self.tail_size is not None and len(self._tail) > self.tail_size:
+            del self._tail[: len(self._tail) - self.tail_size]
+
+    def collect(self, path: str | Path) -> None:
+        """Account for output which was written to a file by someone else."""
+        path = Path(path)
+        if not path.exists():
+            return
+        with path.open("rb") as file:
+            if self.path is not None and path.resolve() == self.path.resolve():
+                self.size = path.stat().st_size
+                file.seek(max(0, self.size - self.tail_size))
+                self._tail = bytearray(file.read())
+                return
+            while chunk := file.read(self.chunk_size):
+                self.feed(chunk)
+
+    async def drain(self, stream: aio.StreamReader) -> None:
+        """Copy a process pipe to the capture file until it reaches EOF."""
+        if self.path is None:
+            while chunk := await stream.read(self.chunk_size):
+                self.feed(chunk)
+                if self.listener is not None:
+                    self.listener(len(chunk))
+            return
+        file = await aio.to_thread(self._create)
+        buffer = bytearray()
+        try:
+            while chunk := await stream.read(self.chunk_size):
+                buffer += chunk
+                self.feed(chunk)
+                if self.listener is not None:
+                    self.listener(len(chunk))
+                if len(buffer) >= self.buffer_size:
+                    await aio.to_thread(file.write, buffer)
+                    buffer.clear()
+        finally:
+            await aio.to_thread(self._finish, file, buffer)
+        logger.debug(f"captured {self.size} bytes of output to {self.path}")
+
+    def _create(self) -> BinaryIO:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        return self.path.open("wb")
+
+    @staticmethod
+    def _finish(file: BinaryIO, buffer: bytearray) -> None:
+        with file:
+            file.write(buffer)
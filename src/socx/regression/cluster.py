@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import hashlib
+from pathlib import Path
+from collections.abc import Iterable
+
+from .test import Test
+from .test import TestResult
+from .signature import normalize
+from .signature import signature
+from ..log import logger
+
+
+__all__ = ("Cluster", "ErrorClusters")
+
+
+class Cluster:
+    """
+    Failed tests sharing an error signature.
+
+    Members
+    -------
+    signature: str
+        Normalized error message shared by the tests.
+
+    digest: str
+        Short hash of the signature, stable across regressions.
+
+    tests: list[Test]
+        Failed tests reporting the signature, in order of completion.
+
+    errors: int
+        Number of error lines matching the signature, across all tests.
+    """
+
+    __slots__ = ("digest", "errors", "signature", "tests")
+
+    def __init__(self, signature: str, digest: str) -> None:
+        self.signature = signature
+        self.digest = digest
+        self.tests: list[Test] = []
+        self.errors = 0
+
+    def __len__(self) -> int:
+        return len(self.tests)
+
+    def __repr__(self) -> str:
+        return (
+            f"{type(self).__name__}({self.digest}, tests={len(self)}, "
+            f"errors={self.errors}, signature={self.signature!r})"
+        )
+
+    @property
+    def first(self) -> Test:
+        """First test which failed with the signature."""
+        return self.tests[0]
+
+    @property
+    def last(self) -> Test:
+        """Last test which failed with the signature."""
+        return self.tests[-1]
+
+
+class ErrorClusters:
+    """
+    Groups the failed tests of a regression by error signature.
+
+    Every error line of a failed test is normalized (see `normalize`) and
+    hashed into a bucket, so clustering is linear in the number of error
+    lines. A test belongs to the cluster of each distinct signature among
+    its errors, or to the cluster of its fallback `signature` (e.g. its
+    exit code) if no error was parsed from its log.
+
+    Members
+    -------
+    examples: int
+        Number of example commands written per cluster.
+    """
+
+    def __init__(self, examples: int = 3) -> None:
+        self.examples = int(examples)
+        self._clusters: dict[str, Cluster] = {}
+        self._tests = 0
+
+    @classmethod
+    def from_tests(
+        cls, tests: Iterable[Test], examples: int = 3
+    ) -> ErrorClusters:
+        """Cluster the failed tests among tests, in order of completion."""
+        rv = cls(examples)
+        failed = [test for test in tests if test.result is TestResult.Failed]
+        failed.sort(key=lambda test: test._finished_time or 0.0)
+        for test in failed:
+            rv.add(test)
+        return rv
+
+    @property
+    def num_tests(self) -> int:
+        """Number of clustered tests."""
+        return self._tests
+
+    def __len__(self) -> int:
+        return len(self._clusters)
+
+    def __iter__(self):
+        """Iterate over clusters, largest first."""
+        return iter(
+            sorted(
+                self._clusters.values(),
+                key=lambda cluster: (-len(cluster), -cluster.errors),
+            )
+        )
+
+    def add(self, test: Test) -> None:
+        """Add a failed test to the clusters of its error signatures."""
+        counts: dict[str, int] = {}
+        for line in test.errors:
+            sig = normalize(line)
+            counts[sig] = counts.get(sig, 0) + 1
+        if not counts:
+            counts[signature(test)] = 0
+        self._tests += 1
+        for sig, count in counts.items():
+            digest = hashlib.blake2b(sig.encode(), digest_size=6).hexdigest()
+            if (cluster := self._clusters.get(digest)) is None:
+                cluster = self._clusters[digest] = Cluster(sig, digest)
+            cluster.tests.append(test)
+            cluster.errors += count
+
+    def format(self) -> str:
+        """Format the clusters as a human readable summary."""
+        lines = [
+            (
+                f"# {len(self)} error signatures across "
+                f"{self.num_tests} failed tests"
+            ),
+        ]
+        for number, cluster in enumerate(self, 1):
+            lines.append("")
+            lines.append(
+                f"[{number}] {len(cluster)} tests, {cluster.errors} errors"
+                f" (signature {cluster.digest})"
+            )
+            lines.append(f"    {cluster.signature}")
+            lines.append(f"    first: {cluster.first.name}")
+            lines.append(f"    last:  {cluster.last.name}")
+            lines.extend(
+                f"    $ {test.command.line.strip()}"
+                for test in cluster.tests[: self.examples]
+            )
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str | Path) -> None:
+        """Write the summary of the clusters to a file."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(self.format(), encoding="utf-8")
+        logger.info(f"error signatures were written to path: {path}")
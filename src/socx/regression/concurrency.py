@@ -0,0 +1,216 @@
+from __future__ import annotations
+
+import time
+import math
+import statistics
+import asyncio as aio
+
+from dynaconf.utils.boxing import DynaBox
+
+from .test import Test
+from ..log import logger
+
+
+__all__ = ("ConcurrencyLimiter", "AdaptiveConcurrency")
+
+
+class ConcurrencyLimiter:
+    """
+    Semaphore-like limit on the number of active runners.
+
+    Unlike `asyncio.Semaphore`, the limit may be raised or lowered while
+    runners hold slots; lowering it only takes effect as slots are released.
+
+    Members
+    -------
+    limit: int
+        Maximal number of slots which may be held at the same time.
+
+    active: int
+        Number of slots currently held.
+    """
+
+    def __init__(self, limit: int) -> None:
+        self._limit = max(1, int(limit))
+        self._active = 0
+        self._cond = aio.Condition()
+
+    @property
+    def limit(self) -> int:
+        """Maximal number of slots which may be held at the same time."""
+        return self._limit
+
+    @property
+    def active(self) -> int:
+        """Number of slots currently held."""
+        return self._active
+
+    async def set_limit(self, limit: int) -> None:
+        """Change the limit and wake up runners waiting for a slot."""
+        async with self._cond:
+            self._limit = max(1, int(limit))
+            self._cond.notify_all()
+
+    async def __aenter__(self) -> ConcurrencyLimiter:
+        async with self._cond:
+            await self._cond.wait_for(lambda: self._active < self._limit)
+            self._active += 1
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        async with self._cond:
+            self._active -= 1
+            self._cond.notify_all()
+
+
+class AdaptiveConcurrency:
+    """
+    Additive-increase/multiplicative-decrease control of runner parallelism.
+
+    Throughput is measured per window as the predicted cost (i.e. predicted
+    runtime) of the tests finished during the window per minute, tests with
+    no prediction are weighted by their measured duration.
+
+    The limit is raised by `step` while throughput keeps improving and the
+    runners are saturated, and is multiplied by `backoff` when throughput
+    stops improving or when the wall time of finished tests inflates by more
+    than `max_inflation` relative to their predicted runtime.
+
+    Members
+    -------
+    enabled: bool
+        When False, the limit stays fixed at `maximum`.
+
+    limiter: ConcurrencyLimiter
+        Limiter whose limit is controlled.
+
+    minimum: int
+        Lower bound of the limit.
+
+    maximum: int
+        Upper bound of the limit, i.e. max_runs_in_parallel.
+    """
+
+    def __init__(
+        self,
+        maximum: int,
+        enabled: bool = False,
+        initial: int = 2,
+        minimum: int = 1,
+        step: int = 1,
+        backoff: float = 0.5,
+        window: float = 60.0,
+        min_samples: int = 3,
+        tolerance: float = 0.05,
+        max_inflation: float = 1.5,
+    ) -> None:
+        self.enabled = bool(enabled)
+        self.maximum = max(1, int(maximum))
+        self.minimum = min(max(1, int(minimum)), self.maximum)
+        self.step = max(1, int(step))
+        self.backoff = float(backoff)
+        self.window = float(window)
+        self.min_samples = int(min_samples)
+        self.tolerance = float(tolerance)
+        self.max_inflation = float(max_inflation)
+        initial = int(initial) if self.enabled else self.maximum
+        self.limiter = ConcurrencyLimiter(
+            min(max(initial, self.minimum), self.maximum)
+        )
+        self._cost = 0.0
+        self._samples = 0
+        self._inflation: list[float] = []
+        self._throughput: float | None = None
+        self._raised = False
+        self._window_start = time.monotonic()
+
+    @classmethod
+    def from_settings(cls, cfg: DynaBox, maximum: int) -> AdaptiveConcurrency:
+        """Create a concurrency controller from a settings object."""
+        return cls(
+            maximum=maximum,
+            enabled=cfg.mode == "adaptive",
+            initial=cfg.initial,
+            minimum=cfg.minimum,
+            step=cfg.step,
+            backoff=cfg.backoff,
+            window=cfg.window,
+            min_samples=cfg.min_samples,
+            tolerance=cfg.tolerance,
+            max_inflation=cfg.max_inflation,
+        )
+
+    @property
+    def limit(self) -> int:
+        """Current limit on the number of active runners."""
+        return self.limiter.limit
+
+    def observe(self, test: Test, predicted: float | None) -> None:
+        """Account for a finished test and its predicted runtime."""
+        if not self.enabled or test.duration is None:
+            return
+        self._samples += 1
+        if predicted:
+            self._cost += predicted
+            self._inflation.append(test.duration / predicted)
+        else:
+            self._cost += test.duration
+
+    async def run(self, saturated) -> None:
+        """
+        Adjust the limit once per window until cancelled.
+
+        Parameters
+        ----------
+        saturated: Callable[[], bool]
+            Returns True if there are tests waiting for a free runner.
+        """
+        if not self.enabled:
+            return
+        logger.info(f"concurrency: adaptive mode, starting at {self.limit}.")
+        self._window_start = time.monotonic()
+        while True:
+            await aio.sleep(self.window)
+            if self._samples < self.min_samples:
+                continue
+            await self._decide(saturated())
+
+    async def _decide(self, saturated: bool) -> None:
+        minutes = (time.monotonic() - self._window_start) / 60
+        throughput = self._cost / minutes if minutes > 0 else 0.0
+        inflation = (
+            statistics.median(self._inflation) if self._inflation else 1.0
+        )
+        previous = self._throughput
+        old = self.limit
+        if inflation > self.max_inflation:
+            new = math.floor(old * self.backoff)
+            reason = f"wall time inflated x{inflation:.2f}"
+        elif (
+            self._raised
+            and previous is not None
+            and throughput < previous * (1 + self.tolerance)
+        ):
+            new = math.floor(old * self.backoff)
+            reason = "throughput stopped improving"
+        elif saturated and old < self.maximum:
+            new = old + self.step
+            reason = "throughput improving"
+        else:
+            new = old
+            reason = "holding"
+        new = min(max(new, self.minimum), self.maximum)
+        logger.info(
+            f"concurrency: {old} -> {new} ({reason}); "
+            f"throughput={throughput:.2f} cost-s/min, "
+            f"previous={previous}, inflation=x{inflation:.2f}, "
+            f"samples={self._samples}."
+        )
+        await self.limiter.set_limit(new)
+        # a lowered limit starts a new baseline for the following windows
+        self._throughput = throughput if new >= old else None
+        self._raised = new > old
+        self._cost = 0.0
+        self._samples = 0
+        self._inflation.clear()
+        self._window_start = time.monotonic()
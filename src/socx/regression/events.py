@@ -0,0 +1,337 @@
+from __future__ import annotations
+
+import abc
+import json
+import time
+import asyncio as aio
+from enum import StrEnum
+from typing import Any
+from typing import TYPE_CHECKING
+from pathlib import Path
+from dataclasses import dataclass
+from collections.abc import Iterable
+
+from rich.console import Console
+from dynaconf.utils.boxing import DynaBox
+
+from ..log import logger
+from ..console import console
+
+if TYPE_CHECKING:
+    from .test import TestBase
+
+
+__all__ = (
+    "Event",
+    "EventKind",
+    "EventBus",
+    "EventSink",
+    "JsonlSink",
+    "ConsoleSink",
+    "format_event",
+)
+
+
+class EventKind(StrEnum):
+    """
+    Kinds of regression events.
+
+    Members
+    -------
+    Regression: EventKind
+        The regression started, carries its name, size and the wall clock
+        time matching the monotonic time of the event.
+
+    Note: EventKind
+        A free-text note about the regression as a whole.
+
+    Scheduled: EventKind
+        A test was queued for execution.
+
+    Started: EventKind
+        A test was dispatched to a runner or a worker.
+
+    Output: EventKind
+        A chunk of a test's stdout or stderr was captured.
+
+    Finished: EventKind
+        A test's process exited.
+
+    Result: EventKind
+        A test reached its final result.
+
+    Done: EventKind
+        The regression ended.
+    """
+
+    Regression = "regression"
+    Note = "note"
+    Scheduled = "scheduled"
+    Started = "started"
+    Output = "output"
+    Finished = "finished"
+    Result = "result"
+    Done = "done"
+
+
+@dataclass(slots=True, frozen=True)
+class Event:
+    """
+    A single regression event.
+
+    Members
+    -------
+    kind: EventKind
+        Kind of the event.
+
+    time: float
+        Monotonic time of the event, see `time.monotonic`.
+
+    uid: int | None
+        Unique id of the test the event refers to, if any.
+
+    name: str | None
+        Name of the test the event refers to, if any.
+
+    data: dict[str, Any] | None
+        Additional data of the event, depending on its kind.
+    """
+
+    kind: EventKind
+    time: float
+    uid: int | None = None
+    name: str | None = None
+    data: dict[str, Any] | None = None
+
+    def to_dict(self) -> dict[str, Any]:
+        """Get the compact dict form of the event."""
+        rv: dict[str, Any] = {"e": self.kind.value, "t": round(self.time, 6)}
+        if self.uid is not None:
+            rv["id"] = self.uid
+            rv["n"] = self.name
+        if self.data:
+            rv.update(self.data)
+        return rv
+
+    def to_json(self) -> str:
+        """Get the event as a compact single line of JSON."""
+        return json.dumps(self.to_dict(), separators=(",", ":"), default=str)
+
+
+def format_event(event: Event) -> str | None:
+    """Format an event for humans, None for events not worth a line."""
+    data = event.data or {}
+    match event.kind:
+        case EventKind.Note:
+            return data.get("text")
+        case EventKind.Scheduled:
+            return f"Scheduler({event.name}): test scheduled."
+        case EventKind.Started:
+            return f"{data.get('by')}({event.name}): running..."
+        case EventKind.Finished:
+            return f"{data.get('by')}({event.name}): done."
+        case EventKind.Result:
+            return f"Result({event.name}): {data.get('result')}."
+        case _:
+            return None
+
+
+class EventSink(abc.ABC):
+    """Destination of the events of an `EventBus`."""
+
+    @abc.abstractmethod
+    def write(self, events: list[Event]) -> None:
+        """Write a batch of events."""
+        ...
+
+    def close(self) -> None:  # noqa: B027
+        """Release any resource held by the sink."""
+
+
+class JsonlSink(EventSink):
+    """
+    Append events to a file as lines of compact JSON.
+
+    The file is flushed after every batch, so it can be tailed while the
+    regression runs. When the file is created, only the `keep` most recent
+    event logs of its directory are kept.
+    """
+
+    def __init__(self, path: str | Path, keep: int = 0) -> None:
+        self.path = Path(path)
+        self.keep = int(keep)
+        self._file = None
+
+    def write(self, events: list[Event]) -> None:
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = self.path.open("a", encoding="utf-8")
+            logger.info(f"writing regression events to {self.path}")
+            self._prune()
+        self._file.write("".join(f"{event.to_json()}\n" for event in events))
+        self._file.flush()
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _prune(self) -> None:
+        if self.keep <= 0:
+            return
+        logs = sorted(
+            self.path.parent.glob("*.jsonl"),
+            key=lambda path: path.stat().st_mtime,
+            reverse=True,
+        )
+        for path in logs[self.keep :]:
+            if path != self.path:
+                path.unlink(missing_ok=True)
+
+
+class ConsoleSink(EventSink):
+    """Print events as human readable lines."""
+
+    def __init__(self, output: Console | None = None) -> None:
+        self.console = output or console
+
+    def write(self, events: list[Event]) -> None:
+        lines = [line for e in events if (line := format_event(e)) is not None]
+        if lines:
+            self.console.print(
+                "\n".join(lines), markup=False, highlight=False
+            )
+
+
+class EventBus:
+    """
+    Bounded, non-blocking bus of regression events.
+
+    Emitting an event never blocks nor awaits: events are appended to a
+    bounded buffer and dropped (and counted) when the buffer is full. A
+    single dispatcher task delivers buffered events in batches to every
+    sink and to every in-process subscriber queue; subscribers which do not
+    keep up lose events rather than slowing the regression down. Sinks
+    write in a worker thread so the event loop never blocks on them.
+
+    Members
+    -------
+    capacity: int
+        Maximal number of buffered events.
+
+    output: bool
+        Whether output chunk events are emitted at all.
+
+    sinks: list[EventSink]
+        Sinks events are written to.
+
+    dropped: int
+        Number of events dropped because the bus' buffer was full.
+
+    lagged: int
+        Number of events dropped because a subscriber queue was full.
+    """
+
+    def __init__(
+        self,
+        capacity: int = 10000,
+        output: bool = False,
+        sinks: Iterable[EventSink] = (),
+    ) -> None:
+        self.capacity = int(capacity)
+        self.output = bool(output)
+        self.sinks: list[EventSink] = list(sinks)
+        self.dropped = 0
+        self.lagged = 0
+        self._buffer: aio.Queue[Event | None] = aio.Queue(self.capacity)
+        self._subscribers: list[aio.Queue[Event]] = []
+        self._dispatcher: aio.Task | None = None
+
+    @classmethod
+    def from_settings(cls, cfg: DynaBox, name: str) -> EventBus:
+        """Create an event bus and its sinks from a settings object."""
+        sinks: list[EventSink] = []
+        if cfg.jsonl.enabled:
+            stamp = time.strftime("%Y%m%d-%H%M%S")
+            path = Path(cfg.jsonl.directory) / f"{name}-{stamp}.jsonl"
+            sinks.append(JsonlSink(path, cfg.jsonl.keep))
+        if cfg.console:
+            sinks.append(ConsoleSink())
+        return cls(capacity=cfg.capacity, output=cfg.output, sinks=sinks)
+
+    def subscribe(self, maxsize: int = 1000) -> aio.Queue[Event]:
+        """Get a new queue which receives all events from now on."""
+        queue: aio.Queue[Event] = aio.Queue(maxsize)
+        self._subscribers.append(queue)
+        return queue
+
+    def unsubscribe(self, queue: aio.Queue[Event]) -> None:
+        """Stop delivering events to a subscriber queue."""
+        if queue in self._subscribers:
+            self._subscribers.remove(queue)
+
+    def emit(
+        self, kind: EventKind, test: TestBase | None = None, **data: Any
+    ) -> None:
+        """Emit an event, dropping it if the buffer is full."""
+        event = Event(
+            kind,
+            time.monotonic(),
+            getattr(test, "uid", None),
+            test.name if test is not None else None,
+            data or None,
+        )
+        try:
+            self._buffer.put_nowait(event)
+        except aio.QueueFull:
+            self.dropped += 1
+
+    def note(self, text: str) -> None:
+        """Emit a free-text note."""
+        self.emit(EventKind.Note, text=text)
+
+    def start(self) -> None:
+        """Start dispatching events to sinks and subscribers."""
+        if self._dispatcher is None:
+            self._dispatcher = aio.create_task(self._dispatch())
+
+    async def close(self) -> None:
+        """Deliver all buffered events then close all sinks."""
+        if self._dispatcher is not None:
+            await self._buffer.put(None)
+            await self._dispatcher
+            self._dispatcher = None
+        for sink in self.sinks:
+            try:
+                await aio.to_thread(sink.close)
+            except Exception:
+                logger.exception(f"failed to close event sink {sink}.")
+        if self.dropped:
+            logger.warning(f"{self.dropped} regression events were dropped.")
+        if self.lagged:
+            logger.warning(
+                f"{self.lagged} regression events were not delivered to "
+                "subscribers which did not keep up."
+            )
+
+    async def _dispatch(self) -> None:
+        closing = False
+        while not closing:
+            batch = [await self._buffer.get()]
+            while not self._buffer.empty():
+                batch.append(self._buffer.get_nowait())
+            closing = None in batch
+            batch = [event for event in batch if event is not None]
+            if not batch:
+                continue
+            for sink in self.sinks:
+                try:
+                    await aio.to_thread(sink.write, batch)
+                except Exception:
+                    logger.exception(f"event sink {sink} failed.")
+            for queue in self._subscribers:
+                for event in batch:
+                    try:
+                        queue.put_nowait(event)
+                    except aio.QueueFull:
+                        self.lagged += 1
@@ -0,0 +1,373 @@
+from __future__ import annotations
+
+import os
+import re
+import abc
+import shlex
+import signal
+import asyncio as aio
+import itertools
+from pathlib import Path
+from typing import override
+from typing import TYPE_CHECKING
+from subprocess import PIPE
+
+from dynaconf.utils.boxing import DynaBox
+
+from .process import TestProcess
+from .process import ProcessHandle
+from .limits import ResourceLimits
+from ..log import logger
+
+if TYPE_CHECKING:
+    from .test import Test
+
+
+__all__ = (
+    "Executor",
+    "LocalExecutor",
+    "BatchJob",
+    "BatchExecutor",
+    "get_executor",
+)
+
+
+LOST_RETURNCODE: int = -1
+"""Exit code assigned to batch jobs which vanished without an exit code."""
+
+
+class Executor(abc.ABC):
+    """Backend which runs the command of a test somewhere."""
+
+    name: str = ""
+
+    @abc.abstractmethod
+    async def spawn(self, test: Test) -> ProcessHandle:
+        """Spawn the command of a test and get a handle to its process."""
+        ...
+
+    async def close(self) -> None:  # noqa: B027
+        """Release any resource held by the executor."""
+
+
+class LocalExecutor(Executor):
+    """
+    Run tests as child processes of the current process.
+
+    Members
+    -------
+    limits: ResourceLimits | None
+        Resource limits applied to every spawned test, if any.
+    """
+
+    name = "local"
+
+    def __init__(self, limits: ResourceLimits | None = None) -> None:
+        self.limits = limits
+
+    @override
+    async def spawn(self, test: Test) -> ProcessHandle:
+        if self.limits is None:
+            return TestProcess(
+                await aio.create_subprocess_shell(
+                    cmd=test.command.line,
+                    stdin=None,
+                    stdout=PIPE,
+                    stderr=PIPE,
+                )
+            )
+        confinement = self.limits.confine(test.name)
+        try:
+            proc = await aio.create_subprocess_shell(
+                cmd=test.command.line,
+                stdin=None,
+                stdout=PIPE,
+                stderr=PIPE,
+                preexec_fn=confinement.preexec,
+            )
+        except BaseException:
+            confinement.release()
+            raise
+        return TestProcess(proc, confinement)
+
+
+class BatchJob(ProcessHandle):
+    """
+    Handle of a test submitted as a single task of a batch job array.
+
+    Members
+    -------
+    job: str | None
+        Id of the job array this task belongs to, None until submitted.
+
+    index: int | None
+        Index of this task in its job array, None until submitted.
+    """
+
+    def __init__(self, executor: BatchExecutor, test: Test) -> None:
+        super().__init__()
+        self.test = test
+        self.job: str | None = None
+        self.index: int | None = None
+        self.rc_path: Path | None = None
+        self._executor = executor
+
+    @property
+    @override
+    def pid(self) -> int | None:
+        return None
+
+    @override
+    def send_signal(self, sig: int) -> None:
+        if self.exited:
+            return
+        if sig in (signal.SIGSTOP, signal.SIGCONT):
+            logger.warning(f"batch job {self.job} can't be suspended/resumed.")
+            return
+        self._executor.cancel(self, -sig)
+
+    def __repr__(self) -> str:
+        return f"BatchJob({self.job}[{self.index}], {self.test.name})"
+
+
+class BatchExecutor(Executor):
+    """
+    Run tests on a batch scheduler (LSF, PBS, Slurm and the like).
+
+    Tests spawned within `window` seconds of each other are grouped into a
+    single job array of up to `array_size` tasks, which is submitted with one
+    invocation of the `submit` command template. Each task runs the command
+    of a test with its output redirected to the test's capture files and
+    writes the command's exit code next to the job array's script.
+
+    The state of all outstanding job arrays is polled in bulk with a single
+    invocation of the `status` command template every `poll_interval`
+    seconds, and exit codes are collected on every poll. When the bulk query
+    fails (e.g. squeue fails once any of the jobs was purged), each job
+    array is queried on its own. A task whose job array left the scheduler
+    without writing an exit code, or whose job array couldn't be queried
+    `max_status_failures` times in a row, is considered lost.
+
+    Command templates are formatted with the following fields:
+
+    submit: {script}, {count}, {last}, {name}
+    status: {jobs} (comma separated job ids)
+    cancel: {job}, {index}
+    """
+
+    name = "batch"
+
+    def __init__(
+        self,
+        directory: str | Path,
+        submit: str,
+        status: str,
+        cancel: str,
+        job_id: str = r"(\d+)",
+        index_var: str = "SLURM_ARRAY_TASK_ID",
+        array_size: int = 500,
+        window: float = 2.0,
+        poll_interval: float = 10.0,
+        max_status_failures: int = 3,
+    ) -> None:
+        self.directory = Path(directory)
+        self.submit_template = submit
+        self.status_template = status
+        self.cancel_template = cancel
+        self.job_id = re.compile(job_id)
+        self.index_var = index_var
+        self.array_size = int(array_size)
+        self.window = float(window)
+        self.poll_interval = float(poll_interval)
+        self.max_status_failures = max(1, int(max_status_failures))
+        self._queued: list[BatchJob] = []
+        self._outstanding: dict[str, list[BatchJob]] = {}
+        self._status_failures: dict[str, int] = {}
+        self._cancels: set[aio.Task] = set()
+        self._flusher: aio.Task | None = None
+        self._poller: aio.Task | None = None
+        self._counter = itertools.count()
+
+    @classmethod
+    def from_settings(cls, cfg: DynaBox) -> BatchExecutor:
+        """Create a batch executor from a settings object."""
+        return cls(
+            directory=cfg.directory,
+            submit=cfg.submit,
+            status=cfg.status,
+            cancel=cfg.cancel,
+            job_id=cfg.job_id,
+            index_var=cfg.index_var,
+            array_size=cfg.array_size,
+            window=cfg.window,
+            poll_interval=cfg.poll_interval,
+            max_status_failures=cfg.max_status_failures,
+        )
+
+    @override
+    async def spawn(self, test: Test) -> ProcessHandle:
+        job = BatchJob(self, test)
+        self._queued.append(job)
+        if len(self._queued) >= self.array_size:
+            await self._flush()
+        elif self._flusher is None or self._flusher.done():
+            self._flusher = aio.create_task(self._flush_later())
+        return job
+
+    @override
+    async def close(self) -> None:
+        for task in (self._flusher, self._poller):
+            if task is not None and not task.done():
+                task.cancel()
+        if self._cancels:
+            await aio.gather(*self._cancels, return_exceptions=True)
+
+    def cancel(self, job: BatchJob, returncode: int) -> None:
+        """Cancel a queued or submitted task of a job array."""
+        if job in self._queued:
+            self._queued.remove(job)
+            job._set_exited(returncode)
+            return
+        cmd = self.cancel_template.format(job=job.job, index=job.index)
+        task = aio.create_task(self._shell(cmd))
+        self._cancels.add(task)
+        task.add_done_callback(self._cancels.discard)
+
+    async def _flush_later(self) -> None:
+        await aio.sleep(self.window)
+        await self._flush()
+
+    async def _flush(self) -> None:
+        while self._queued:
+            jobs = self._queued[: self.array_size]
+            del self._queued[: self.array_size]
+            await self._submit(jobs)
+
+    async def _submit(self, jobs: list[BatchJob]) -> None:
+        name = f"socx-{os.getpid()}-{next(self._counter)}"
+        workdir = self.directory / name
+        workdir.mkdir(parents=True, exist_ok=True)
+        cwd = shlex.quote(os.getcwd())
+        for index, job in enumerate(jobs):
+            job.index = index
+            job.rc_path = workdir / f"{index}.rc"
+            out = job.test._stdout.path or workdir / f"{index}.out"
+            err = job.test._stderr.path or workdir / f"{index}.err"
+            out.parent.mkdir(parents=True, exist_ok=True)
+            err.parent.mkdir(parents=True, exist_ok=True)
+            rc = shlex.quote(str(job.rc_path))
+            (workdir / f"{index}.sh").write_text(
+                f"cd {cwd}\n"
+                f"{job.test.command.line} "
+                f"> {shlex.quote(str(out))} 2> {shlex.quote(str(err))}\n"
+                f"echo $? > {rc}.tmp && mv {rc}.tmp {rc}\n",
+                encoding="utf-8",
+            )
+        script = workdir / "array.sh"
+        script.write_text(
+            f'#!/bin/sh\nexec sh "{workdir}/${{{self.index_var}}}.sh"\n',
+            encoding="utf-8",
+        )
+        script.chmod(0o755)
+        cmd = self.submit_template.format(
+            script=shlex.quote(str(script)),
+            count=len(jobs),
+            last=len(jobs) - 1,
+            name=name,
+        )
+        returncode, stdout = await self._shell(cmd)
+        match = self.job_id.search(stdout)
+        if returncode != 0 or match is None:
+            logger.error(f"batch submission failed ({returncode}): {cmd}")
+            for job in jobs:
+                job._set_exited(LOST_RETURNCODE)
+            return
+        job_id = match.group(1)
+        for job in jobs:
+            job.job = job_id
+        self._outstanding[job_id] = jobs
+        logger.info(f"submitted job array {job_id} of {len(jobs)} tests.")
+        if self._poller is None or self._poller.done():
+            self._poller = aio.create_task(self._poll())
+
+    async def _poll(self) -> None:
+        while self._outstanding:
+            await aio.sleep(self.poll_interval)
+            states = await self._query(list(self._outstanding))
+            for job_id, jobs in list(self._outstanding.items()):
+                remaining = [job for job in jobs if not self._reap(job)]
+                active = states.get(job_id)
+                if active is None:
+                    failures = self._status_failures.get(job_id, 0) + 1
+                    self._status_failures[job_id] = failures
+                    active = failures < self.max_status_failures
+                else:
+                    self._status_failures.pop(job_id, None)
+                if remaining and not active:
+                    for job in remaining:
+                        if not self._reap(job):
+                            logger.error(f"{job} left the scheduler.")
+                            job._set_exited(LOST_RETURNCODE)
+                    remaining = []
+                if remaining:
+                    self._outstanding[job_id] = remaining
+                else:
+                    del self._outstanding[job_id]
+                    self._status_failures.pop(job_id, None)
+
+    async def _query(self, job_ids: list[str]) -> dict[str, bool | None]:
+        """Get whether job arrays are active, None for failed queries."""
+        cmd = self.status_template.format(jobs=",".join(job_ids))
+        returncode, stdout = await self._shell(cmd)
+        if returncode == 0:
+            return {
+                job_id: re.search(rf"\b{re.escape(job_id)}(?!\d)", stdout)
+                is not None
+                for job_id in job_ids
+            }
+        if len(job_ids) > 1:
+            states = {}
+            for job_id in job_ids:
+                states.update(await self._query([job_id]))
+            return states
+        logger.warning(f"batch status query failed ({returncode}): {cmd}")
+        return {job_ids[0]: None}
+
+    def _reap(self, job: BatchJob) -> bool:
+        if job.exited:
+            return True
+        try:
+            text = job.rc_path.read_text(encoding="utf-8").strip()
+        except FileNotFoundError:
+            return False
+        job._set_exited(int(text) if text.lstrip("-").isdigit() else 1)
+        return True
+
+    @staticmethod
+    async def _shell(cmd: str) -> tuple[int, str]:
+        proc = await aio.create_subprocess_shell(cmd, stdout=PIPE)
+        stdout, _ = await proc.communicate()
+        return proc.returncode, stdout.decode(errors="replace")
+
+
+def get_executor(
+    cfg: DynaBox, limits: ResourceLimits | None = None
+) -> Executor:
+    """
+    Get an executor by the name of its backend.
+
+    Resource limits only apply to local tests, the resources of batch jobs
+    are the scheduler's to enforce.
+    """
+    match str(cfg.backend).lower():
+        case LocalExecutor.name:
+            return LocalExecutor(limits)
+        case BatchExecutor.name:
+            if limits is not None:
+                logger.warning("resource limits are ignored by batch jobs.")
+            return BatchExecutor.from_settings(cfg.batch)
+        case _:
+            err = f"Unknown regression executor backend: {cfg.backend}"
+            exc = ValueError(err)
+            logger.exception(err, exc_info=exc)
+            raise exc
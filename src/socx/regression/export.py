@@ -0,0 +1,262 @@
+from __future__ import annotations
+
+import os
+import time
+import datetime as dt
+import functools
+from pathlib import Path
+from typing import TYPE_CHECKING
+from collections.abc import Iterable
+
+from dynaconf.utils.boxing import DynaBox
+
+from .test import Test
+from .test import TestResult
+from .signature import signature
+from ..log import logger
+
+if TYPE_CHECKING:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    from .regression import Regression
+
+
+__all__ = ("ParquetExporter", "ResultsHistory")
+
+
+@functools.cache
+def _schema() -> pa.Schema:
+    # pyarrow takes a while to import, so it is only imported once needed.
+    import pyarrow as pa
+
+    return pa.schema(
+        [
+            ("regression", pa.string()),
+            ("name", pa.string()),
+            ("flow", pa.string()),
+            ("build", pa.string()),
+            ("seed", pa.int64()),
+            ("status", pa.string()),
+            ("result", pa.string()),
+            ("started", pa.timestamp("ms", tz="UTC")),
+            ("finished", pa.timestamp("ms", tz="UTC")),
+            ("duration", pa.float64()),
+            ("exit_code", pa.int32()),
+            ("signature", pa.string()),
+            ("reason", pa.string()),
+            ("peak_rss", pa.int64()),
+            ("cpu_time", pa.float64()),
+            ("cpu_utilization", pa.float64()),
+            ("read_bytes", pa.int64()),
+            ("write_bytes", pa.int64()),
+            ("children", pa.int32()),
+            ("date", pa.date32()),
+        ]
+    )
+
+
+def _timestamp(seconds: float | None) -> dt.datetime | None:
+    if seconds is None:
+        return None
+    return dt.datetime.fromtimestamp(seconds, dt.UTC)
+
+
+class ParquetExporter:
+    """
+    Exports the results of regressions as Parquet files.
+
+    Every regression is written as a single file with one row per test,
+    under a `date=YYYY-MM-DD` (hive style) partition of `directory` for the
+    local date the regression started on, so that queries over a range of
+    dates only read the files of the matching partitions.
+
+    Members
+    -------
+    directory: Path
+        Root directory of the partitioned files.
+
+    compression: str
+        Parquet compression codec.
+    """
+
+    def __init__(self, directory: str | Path, compression: str = "zstd"):
+        self.directory = Path(directory)
+        self.compression = str(compression)
+
+    @classmethod
+    def from_settings(cls, cfg: DynaBox) -> ParquetExporter | None:
+        """Create an exporter from settings, None if it is disabled."""
+        if not cfg.enabled:
+            return None
+        return cls(cfg.directory, cfg.compression)
+
+    def table(self, regression: Regression) -> pa.Table:
+        """Get the results of a regression's tests as a table."""
+        import pyarrow as pa
+
+        started = regression._started_time or time.time()
+        date = dt.date.fromtimestamp(started)
+        rows = [self._row(test) for test in regression]
+        for row in rows:
+            row["regression"] = regression.name
+            row["date"] = date
+        return pa.Table.from_pylist(rows, schema=_schema())
+
+    def write(self, regression: Regression) -> Path:
+        """Write the results of a regression and get the path written to."""
+        import pyarrow.parquet as pq
+
+        table = self.table(regression)
+        started = regression._started_time or time.time()
+        stamp = time.strftime("%H%M%S", time.localtime(started))
+        date = dt.date.fromtimestamp(started).isoformat()
+        path = (
+            self.directory
+            / f"date={date}"
+            / f"{regression.name}-{stamp}-{os.getpid()}.parquet"
+        )
+        path.parent.mkdir(parents=True, exist_ok=True)
+        partial = path.with_name(f".{path.name}")
+        pq.write_table(
+            table.drop_columns(["date"]),
+            partial,
+            compression=self.compression,
+        )
+        partial.replace(path)
+        logger.info(f"{len(table)} test results were exported to: {path}")
+        return path
+
+    @staticmethod
+    def _row(test: Test) -> dict:
+        try:
+            flow = test.flow
+        except AttributeError:
+            flow = ""
+        stats = test.resources
+        failed = test.result is TestResult.Failed
+        return {
+            "name": test.name,
+            "flow": flow,
+            "build": str(test.build),
+            "seed": test.seed,
+            "status": test.status.name,
+            "result": test.result.name,
+            "started": _timestamp(test._started_time),
+            "finished": _timestamp(test._finished_time),
+            "duration": test.duration,
+            "exit_code": test.returncode,
+            "signature": signature(test) if failed else None,
+            "reason": test.reason,
+            "peak_rss": stats.peak_rss if stats else None,
+            "cpu_time": stats.cpu_time if stats else None,
+            "cpu_utilization": stats.cpu_utilization if stats else None,
+            "read_bytes": stats.read_bytes if stats else None,
+            "write_bytes": stats.write_bytes if stats else None,
+            "children": stats.children if stats else None,
+        }
+
+
+class ResultsHistory:
+    """
+    Aggregate queries over the Parquet files of past regressions.
+
+    Queries are restricted to the last `days` days, a filter which is
+    pushed down to the dataset so that older partitions are never read, and
+    only read the columns they aggregate.
+
+    Members
+    -------
+    directory: Path
+        Root directory of the partitioned files.
+    """
+
+    def __init__(self, directory: str | Path) -> None:
+        self.directory = Path(directory)
+
+    def dataset(self) -> ds.Dataset:
+        """Get the dataset of all exported results."""
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+
+        return ds.dataset(
+            self.directory,
+            schema=_schema(),
+            format="parquet",
+            partitioning=ds.partitioning(
+                pa.schema([("date", pa.date32())]), flavor="hive"
+            ),
+            ignore_prefixes=[".", "_"],
+        )
+
+    def read(
+        self,
+        columns: Iterable[str],
+        days: int = 365,
+        flow: str | None = None,
+        name: str | None = None,
+    ) -> pa.Table:
+        """Read columns of the results of the last days, filtered."""
+        import pyarrow.dataset as ds
+
+        since = dt.date.today() - dt.timedelta(days=days)
+        condition = ds.field("date") >= since
+        if flow is not None:
+            condition &= ds.field("flow") == flow
+        if name is not None:
+            condition &= ds.field("name") == name
+        if not self.directory.is_dir():
+            return _schema().empty_table().select(list(columns))
+        return self.dataset().to_table(
+            columns=list(columns), filter=condition
+        )
+
+    def slowest(self, limit: int = 20, **filters) -> pa.Table:
+        """Get the tests with the longest mean duration."""
+        table = self.read(["name", "duration"], **filters)
+        return (
+            table.group_by("name")
+            .aggregate(
+                [
+                    ("duration", "mean"),
+                    ("duration", "max"),
+                    ("duration", "count"),
+                ]
+            )
+            .sort_by([("duration_mean", "descending")])
+            .slice(0, limit)
+        )
+
+    def failure_rates(self, **filters) -> pa.Table:
+        """Get the number of runs and the failure rate of each flow."""
+        import pyarrow.compute as pc
+
+        table = self.read(["flow", "result"], **filters)
+        table = table.append_column(
+            "failed", pc.equal(table["result"], TestResult.Failed.name)
+        )
+        table = table.group_by("flow").aggregate(
+            [("failed", "count"), ("failed", "sum")]
+        )
+        table = table.rename_columns(
+            {"failed_count": "runs", "failed_sum": "failures"}
+        )
+        rate = pc.divide(pc.cast(table["failures"], "float64"), table["runs"])
+        return table.append_column("failure_rate", rate).sort_by(
+            [("failure_rate", "descending")]
+        )
+
+    def trend(self, **filters) -> pa.Table:
+        """Get the mean and total duration of tests per day."""
+        table = self.read(["date", "duration"], **filters)
+        return (
+            table.group_by("date")
+            .aggregate(
+                [
+                    ("duration", "mean"),
+                    ("duration", "sum"),
+                    ("duration", "count"),
+                ]
+            )
+            .sort_by("date")
+        )
@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import json
+import math
+import statistics
+from pathlib import Path
+from threading import RLock
+from collections import deque
+
+from .test import Test
+from ..log import logger
+
+
+__all__ = ("RuntimeHistory",)
+
+
+class RuntimeHistory:
+    """
+    Persistent record of test durations measured in earlier runs.
+
+    Durations are keyed by the test's name, flow and build, and only the
+    most recent `samples` durations of each key are retained.
+
+    Members
+    -------
+    path: Path
+        Path of the JSON file the history is persisted to.
+
+    samples: int
+        Maximal number of durations retained per key.
+    """
+
+    def __init__(self, path: str | Path, samples: int = 20) -> None:
+        self.path = Path(path)
+        self.samples = int(samples)
+        self._lock = RLock()
+        self._durations: dict[str, deque[float]] = {}
+        self._dirty = False
+        self.load()
+
+    def __len__(self) -> int:
+        return len(self._durations)
+
+    def __contains__(self, test: Test) -> bool:
+        return self.key(test) in self._durations
+
+    @staticmethod
+    def key(test: Test) -> str:
+        """Get the history key of a test."""
+        try:
+            flow = test.flow
+        except AttributeError:
+            flow = ""
+        return f"{test.name}|{flow}|{test.build}"
+
+    def durations(self, test: Test) -> tuple[float, ...]:
+        """Get the recorded durations of a test, oldest first."""
+        with self._lock:
+            return tuple(self._durations.get(self.key(test), ()))
+
+    def predict(self, test: Test) -> float | None:
+        """Predict the duration of a test, or None if it was never seen."""
+        durations = self.durations(test)
+        return statistics.median(durations) if durations else None
+
+    def quantile(self, test: Test, q: float) -> float | None:
+        """
+        Get the `q` quantile (e.g. 0.95) of the durations of a test, or None
+        if it was never seen.
+        """
+        durations = sorted(self.durations(test))
+        if not durations:
+            return None
+        rank = max(1, math.ceil(q * len(durations)))
+        return durations[min(rank, len(durations)) - 1]
+
+    def record(self, test: Test) -> None:
+        """Record the duration of a finished test."""
+        if not test.finished or test.duration is None:
+            return
+        # Tests stopped early say nothing about how long they take.
+        if test.reason is not None:
+            return
+        with self._lock:
+            key = self.key(test)
+            if key not in self._durations:
+                self._durations[key] = deque(maxlen=self.samples)
+            self._durations[key].append(round(test.duration, 3))
+            self._dirty = True
+
+    def load(self) -> None:
+        """Load the history from disk."""
+        if not self.path.exists():
+            return
+        try:
+            with self.path.open(encoding="utf-8") as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            logger.exception(f"failed to load runtime history {self.path}")
+            return
+        with self._lock:
+            self._durations = {
+                key: deque(values, maxlen=self.samples)
+                for key, values in data.items()
+            }
+
+    def save(self) -> None:
+        """Save the history to disk if it was modified since last loaded."""
+        with self._lock:
+            if not self._dirty:
+                return
+            data = {k: list(v) for k, v in self._durations.items()}
+            self._dirty = False
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        with tmp.open("w", encoding="utf-8") as file:
+            json.dump(data, file)
+        tmp.replace(self.path)
+        logger.debug(f"runtime history saved to {self.path}")
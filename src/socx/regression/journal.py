@@ -0,0 +1,206 @@
+from __future__ import annotations
+
+import os
+import json
+import time
+from typing import Any
+from typing import override
+from pathlib import Path
+from dataclasses import field
+from dataclasses import dataclass
+from collections.abc import Iterable
+
+from dynaconf.utils.boxing import DynaBox
+
+from .test import Test
+from .test import TestBase
+from .test import TestStatus
+from .test import TestResult
+from .process import ProcessHandle
+from ..log import logger
+
+
+__all__ = ("Journal", "JournalState")
+
+
+ERRORS_JOURNALED: int = 16
+"""Maximal number of parsed errors of a test recorded with its result."""
+
+
+@dataclass
+class JournalState:
+    """
+    State of a regression as reconstructed from its journal.
+
+    Members
+    -------
+    name: str
+        Name of the journaled regression.
+
+    lines: list[str]
+        Command lines of all tests of the regression, in input order.
+
+    finals: dict[int, dict[str, Any]]
+        Last 'result' record of every test which reached a final result,
+        keyed by the index of the test in `lines`.
+    """
+
+    name: str = ""
+    lines: list[str] = field(default_factory=list)
+    finals: dict[int, dict[str, Any]] = field(default_factory=dict)
+
+
+class Journal:
+    """
+    Append-only write-ahead journal of a regression's state transitions.
+
+    The journal starts with a header record listing the command lines of all
+    tests in the regression, followed by one compact JSON record per state
+    transition of a test (scheduled, started, finished and result), in which
+    tests are referred to by their index in the header.
+
+    Result records are flushed to disk with fsync (when enabled) so tests
+    which reached a final result are never lost, even if the regression
+    process dies.
+
+    Members
+    -------
+    path: Path
+        Path of the journal file.
+
+    fsync: bool
+        Whether to fsync the journal after every result record.
+    """
+
+    def __init__(self, path: str | Path, fsync: bool = True) -> None:
+        self.path = Path(path)
+        self.fsync = bool(fsync)
+        self._file = None
+        self._index: dict[Test, int] = {}
+
+    @classmethod
+    def from_settings(cls, cfg: DynaBox, name: str) -> Journal | None:
+        """Create a new journal from settings, None if it is disabled."""
+        if not cfg.enabled:
+            return None
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        return cls(Path(cfg.directory) / f"{name}-{stamp}.jsonl", cfg.fsync)
+
+    def open(self, name: str, tests: Iterable[Test]) -> None:
+        """Open the journal for appending, writing its header if new."""
+        tests = list(tests)
+        self._index = {test: i for i, test in enumerate(tests)}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        is_new = not self.path.exists() or not self.path.stat().st_size
+        torn = not is_new and not self.path.read_bytes().endswith(b"\n")
+        self._file = self.path.open("a", encoding="utf-8")
+        if torn:
+            self._file.write("\n")
+        if is_new:
+            self._write(
+                {
+                    "e": "regression",
+                    "name": name,
+                    "tests": [test.command.line for test in tests],
+                },
+                sync=True,
+            )
+        logger.info(f"journaling regression '{name}' to {self.path}")
+
+    def close(self) -> None:
+        """Close the journal."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def scheduled(self, test: Test) -> None:
+        """Record that a test was queued for execution."""
+        self._write({"e": "scheduled", "i": self._index[test]})
+
+    def started(self, test: Test) -> None:
+        """Record that a test was started."""
+        self._write({"e": "started", "i": self._index[test]})
+
+    def finished(self, test: Test) -> None:
+        """Record that a test's process has exited."""
+        self._write(
+            {
+                "e": "finished",
+                "i": self._index[test],
+                "status": test.status.name,
+                "rc": test.returncode,
+                "start": test._started_time,
+                "end": test._finished_time,
+            }
+        )
+
+    def result(self, test: Test) -> None:
+        """Record the final result of a test."""
+        self._write(
+            {
+                "e": "result",
+                "i": self._index[test],
+                "status": test.status.name,
+                "result": test.result.name,
+                "rc": test.returncode,
+                "start": test._started_time,
+                "end": test._finished_time,
+                "errors": test.errors[:ERRORS_JOURNALED],
+                "reason": test.reason,
+            },
+            sync=True,
+        )
+
+    @staticmethod
+    def replay(path: str | Path) -> JournalState:
+        """Reconstruct the state of a regression from its journal."""
+        state = JournalState()
+        with Path(path).open(encoding="utf-8") as file:
+            for number, line in enumerate(file, 1):
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    logger.warning(f"{path}:{number}: skipping torn record.")
+                    continue
+                match record.get("e"):
+                    case "regression":
+                        state.name = record["name"]
+                        state.lines = record["tests"]
+                    case "result" if record["result"] != TestResult.NA.name:
+                        state.finals[record["i"]] = record
+        return state
+
+    @staticmethod
+    def restore(test: TestBase, record: dict[str, Any]) -> None:
+        """Restore the final state of a test from its result record."""
+        test.status = TestStatus[record["status"]]
+        test.result = TestResult[record["result"]]
+        test._started_time = record.get("start")
+        test._finished_time = record.get("end")
+        test.errors = tuple(record.get("errors", ()))
+        test.reason = record.get("reason")
+        if (rc := record.get("rc")) is not None:
+            test._proc = _Restored()
+            test._proc._set_exited(rc)
+
+    def _write(self, record: dict[str, Any], sync: bool = False) -> None:
+        if self._file is None:
+            return
+        record["t"] = round(time.time(), 3)
+        self._file.write(json.dumps(record, separators=(",", ":")) + "\n")
+        self._file.flush()
+        if sync and self.fsync:
+            os.fsync(self._file.fileno())
+
+
+class _Restored(ProcessHandle):
+    """Handle of a test's process which exited in an earlier run."""
+
+    @property
+    @override
+    def pid(self) -> int | None:
+        return None
+
+    @override
+    def send_signal(self, sig: int) -> None:
+        pass
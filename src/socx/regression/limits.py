@@ -0,0 +1,221 @@
+from __future__ import annotations
+
+import os
+import signal
+import resource
+import itertools
+from pathlib import Path
+
+from dynaconf.utils.boxing import DynaBox
+
+from ..log import logger
+
+
+__all__ = ("ResourceLimits", "Confinement")
+
+
+CGROUP_MOUNT: Path = Path("/sys/fs/cgroup")
+"""Mount point of the cgroup v2 hierarchy."""
+
+CPU_GRACE: int = 10
+"""Seconds of CPU time between SIGXCPU and SIGKILL of the CPU time limit."""
+
+ALLOCATION_ERRORS: tuple[str, ...] = (
+    "MemoryError",
+    "std::bad_alloc",
+    "Cannot allocate memory",
+    "out of memory",
+)
+"""Error output of a process which failed to allocate memory."""
+
+
+class ResourceLimits:
+    """
+    Resource limits applied to every test spawned by a local executor.
+
+    The memory limit is enforced by a cgroup v2 sub-group per test when
+    `cgroup` is enabled and a writable group with the memory controller
+    delegated to it is found, in which case the test's entire process tree
+    is accounted together, swap is disabled, and a breach is reported by
+    the kernel's OOM killer. Otherwise, the memory limit falls back to an
+    address space limit (`RLIMIT_AS`) of each process, under which
+    allocations fail rather than the process being killed, so a breach can
+    only be suspected from a failed process' error output.
+
+    The CPU time limit (`RLIMIT_CPU`) and the nice level are always applied
+    to the test's processes directly.
+
+    Members
+    -------
+    memory_mb: int
+        Memory limit in MB, 0 for none.
+
+    cpu_seconds: int
+        CPU time limit in seconds of each process, 0 for none.
+
+    nice: int
+        Niceness added to the test's processes, 0 to keep the current one.
+
+    cgroup: Path | None
+        Group under which a sub-group is created per test, None if cgroup v2
+        is not used.
+    """
+
+    def __init__(
+        self,
+        memory_mb: int = 0,
+        cpu_seconds: int = 0,
+        nice: int = 0,
+        cgroup: bool = True,
+        cgroup_root: str | Path | None = None,
+    ) -> None:
+        self.memory_mb = int(memory_mb)
+        self.cpu_seconds = int(cpu_seconds)
+        self.nice = int(nice)
+        self.cgroup = (
+            self._find_cgroup(cgroup_root)
+            if cgroup and self.memory_mb
+            else None
+        )
+        self._count = itertools.count()
+        if self.memory_mb and self.cgroup is None:
+            logger.info(
+                "no writable cgroup v2 group with a memory controller, "
+                "limiting the address space of tests instead."
+            )
+
+    @classmethod
+    def from_settings(cls, cfg: DynaBox) -> ResourceLimits | None:
+        """Create resource limits from settings, None if there are none."""
+        if not cfg.enabled:
+            return None
+        if not (cfg.memory_mb or cfg.cpu_seconds or cfg.nice):
+            return None
+        return cls(
+            memory_mb=cfg.memory_mb,
+            cpu_seconds=cfg.cpu_seconds,
+            nice=cfg.nice,
+            cgroup=cfg.cgroup,
+            cgroup_root=cfg.cgroup_root or None,
+        )
+
+    def confine(self, name: str) -> Confinement:
+        """Prepare the confinement of a single test process."""
+        group = None
+        if self.cgroup is not None:
+            group = self.cgroup / f"socx-{os.getpid()}-{next(self._count)}"
+            try:
+                group.mkdir()
+                (group / "memory.max").write_text(str(self.memory_mb << 20))
+                for control, value in (
+                    ("memory.swap.max", "0"),
+                    ("memory.oom.group", "1"),
+                ):
+                    if (group / control).exists():
+                        (group / control).write_text(value)
+            except OSError as exc:
+                logger.warning(f"failed to create cgroup {group}: {exc}")
+                group = None
+        return Confinement(self, name, group)
+
+    @staticmethod
+    def _find_cgroup(root: str | Path | None) -> Path | None:
+        if root is None:
+            try:
+                lines = Path("/proc/self/cgroup").read_text().splitlines()
+            except OSError:
+                return None
+            unified = [line[3:] for line in lines if line.startswith("0::")]
+            if not unified:
+                return None
+            root = CGROUP_MOUNT / unified[0].lstrip("/")
+        root = Path(root)
+        try:
+            controls = (root / "cgroup.subtree_control").read_text().split()
+        except OSError:
+            return None
+        if "memory" not in controls or not os.access(root, os.W_OK):
+            return None
+        return root
+
+
+class Confinement:
+    """
+    Resource limits of a single test process.
+
+    Members
+    -------
+    limits: ResourceLimits
+        Limits applied to the process.
+
+    name: str
+        Name of the confined test.
+
+    group: Path | None
+        cgroup v2 sub-group of the process, if any.
+    """
+
+    def __init__(
+        self, limits: ResourceLimits, name: str, group: Path | None
+    ) -> None:
+        self.limits = limits
+        self.name = name
+        self.group = group
+
+    def preexec(self) -> None:
+        """Apply the limits, in the child process before it executes."""
+        limits = self.limits
+        if self.group is not None:
+            (self.group / "cgroup.procs").write_text(str(os.getpid()))
+        elif limits.memory_mb:
+            size = limits.memory_mb << 20
+            resource.setrlimit(resource.RLIMIT_AS, (size, size))
+        if limits.cpu_seconds:
+            resource.setrlimit(
+                resource.RLIMIT_CPU,
+                (limits.cpu_seconds, limits.cpu_seconds + CPU_GRACE),
+            )
+        if limits.nice:
+            os.nice(limits.nice)
+
+    def breach(self, returncode: int | None) -> str | None:
+        """Get the limit the process was killed for breaching, if any."""
+        if self.group is not None:
+            try:
+                events = (self.group / "memory.events").read_text()
+            except OSError:
+                events = ""
+            for line in events.splitlines():
+                key, _, value = line.partition(" ")
+                if key == "oom_kill" and int(value) > 0:
+                    return f"memory limit of {self.limits.memory_mb} MB"
+        if self.limits.cpu_seconds and returncode in (
+            -signal.SIGXCPU,
+            128 + signal.SIGXCPU,
+        ):
+            return f"cpu time limit of {self.limits.cpu_seconds} seconds"
+        return None
+
+    def suspect(self, returncode: int | None, output: str) -> str | None:
+        """
+        Get the limit a failed process likely breached judging by its error
+        output, if any.
+        """
+        if self.group is not None or not self.limits.memory_mb:
+            return None
+        if not returncode:
+            return None
+        if any(error in output for error in ALLOCATION_ERRORS):
+            return f"memory limit (RLIMIT_AS) of {self.limits.memory_mb} MB"
+        return None
+
+    def release(self) -> None:
+        """Remove the cgroup of the process once it exited."""
+        if self.group is None:
+            return
+        try:
+            if (kill := self.group / "cgroup.kill").exists():
+                kill.write_text("1")
+            self.group.rmdir()
+        except OSError as exc:
+            logger.debug(f"failed to remove cgroup {self.group}: {exc}")
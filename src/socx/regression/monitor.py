@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import os
+import re
+import asyncio as aio
+from typing import TYPE_CHECKING
+from pathlib import Path
+from collections.abc import Iterable
+
+from dynaconf.utils.boxing import DynaBox
+
+from .scanner import LogScanner
+from ..log import logger
+
+if TYPE_CHECKING:
+    from .test import Test
+
+
+__all__ = ("LogMonitor", "LogFollower")
+
+
+SPAWN_SLACK: float = 1.0
+"""Seconds by which the log of a test may predate its start time, which is
+only taken once its process was spawned."""
+
+
+class LogFollower:
+    """
+    Incremental reader of a growing log file.
+
+    Each read returns the complete lines appended since the previous read.
+    A log which is truncated or replaced (i.e. whose inode changed) is
+    followed again from its start, unless it was last modified before
+    `since`, in which case it was left by a previous run and only the lines
+    appended to it later are returned.
+
+    Members
+    -------
+    path: Path
+        Path of the log.
+
+    offset: int
+        Offset of the first byte not read yet.
+
+    max_read: int
+        Maximal number of bytes returned by a single read.
+
+    since: float | None
+        Time (since the epoch) before which the log's content is stale.
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        max_read: int = 1 << 26,
+        since: float | None = None,
+    ) -> None:
+        self.path = Path(path)
+        self.offset = 0
+        self.max_read = int(max_read)
+        self.since = since
+        self._inode: int | None = None
+
+    def read(self) -> bytes:
+        """Read the complete lines appended since the last read."""
+        try:
+            file = self.path.open("rb")
+        except FileNotFoundError:
+            return b""
+        with file:
+            stat = os.fstat(file.fileno())
+            size = stat.st_size
+            if stat.st_ino != self._inode:
+                self._inode = stat.st_ino
+                stale = self.since is not None and stat.st_mtime < self.since
+                self.offset = size if stale else 0
+            elif size < self.offset:
+                self.offset = 0
+            if size <= self.offset:
+                return b""
+            file.seek(self.offset)
+            data = file.read(min(size - self.offset, self.max_read))
+        end = data.rfind(b"\n") + 1
+        if not end and len(data) < self.max_read:
+            return b""
+        # A line longer than max_read is split rather than never returned.
+        end = end or len(data)
+        self.offset += end
+        return data[:end]
+
+
+class LogMonitor:
+    """
+    Follows the log of a running test and stops the test on fatal errors.
+
+    New lines of the log are scanned every `interval` seconds with the same
+    error and ignore rules as the log's final scan, and the first error line
+    matching a fatal pattern stops the entire process tree of the test with
+    `Test.stop`, which is then recorded as terminated and failed with that
+    line as the reason. A log left by a previous run of the test is ignored
+    until it is written again.
+
+    Members
+    -------
+    scanner: LogScanner
+        Scanner applying the error and ignore rules.
+
+    interval: float
+        Seconds between two reads of the log.
+
+    grace: float
+        Seconds between two escalating signals when stopping a test.
+    """
+
+    def __init__(
+        self,
+        scanner: LogScanner,
+        fatal: Iterable[str],
+        interval: float = 5.0,
+        grace: float = 30.0,
+    ) -> None:
+        self.scanner = scanner
+        self.interval = float(interval)
+        self.grace = float(grace)
+        self._fatal = re.compile("|".join(f"(?:{p})" for p in fatal))
+
+    @classmethod
+    def from_settings(
+        cls, cfg: DynaBox, scanner: LogScanner
+    ) -> LogMonitor | None:
+        """Create a log monitor from settings, None if it is disabled."""
+        if not cfg.enabled or not cfg.fatal:
+            return None
+        return cls(scanner, cfg.fatal, cfg.interval, cfg.grace)
+
+    async def watch(self, test: Test) -> str:
+        """Follow a test's log until a fatal error line appears in it."""
+        follower = LogFollower(
+            test.runtime_logs / "run.log",
+            since=test._started_time - SPAWN_SLACK,
+        )
+        while True:
+            await aio.sleep(self.interval)
+            line = await aio.to_thread(self._poll, follower)
+            if line is not None:
+                return line
+
+    async def run(self, test: Test) -> None:
+        """Stop a test as soon as a fatal error appears in its log."""
+        try:
+            line = await self.watch(test)
+        except aio.CancelledError:
+            raise
+        except Exception:
+            logger.exception(f"failed to monitor the log of {test.name}.")
+            return
+        test.errors = (line,)
+        await test.stop(f"fatal error: {line}", self.grace)
+
+    def _poll(self, follower: LogFollower) -> str | None:
+        while data := follower.read():
+            for line in self.scanner.scan_bytes(data).errors:
+                if self._fatal.search(line):
+                    return line
+        return None
@@ -0,0 +1,214 @@
+from __future__ import annotations
+
+import abc
+import signal
+import asyncio as aio
+from typing import override
+from typing import TYPE_CHECKING
+from collections.abc import Callable
+
+import psutil as ps
+
+from ..log import logger
+
+if TYPE_CHECKING:
+    from .limits import Confinement
+
+
+__all__ = ("ProcessHandle", "TestProcess")
+
+
+class ProcessHandle(abc.ABC):
+    """
+    Lifecycle handle of a spawned test, regardless of where it runs.
+
+    Exit is signaled by the backend running the test through `_set_exited`,
+    which wakes up all waiters and runs the registered exit callbacks.
+
+    Members
+    -------
+    pid: int | None
+        Process id of the spawned process, None if not a local process.
+
+    returncode: int | None
+        Exit code of the process or None if it has not yet exited.
+
+    exited: bool
+        True if the process has exited.
+
+    breach: str | None
+        Resource limit the process was killed for breaching, if any.
+    """
+
+    def __init__(self) -> None:
+        self.breach: str | None = None
+        self._returncode: int | None = None
+        self._exited = aio.Event()
+        self._callbacks: list[Callable[[ProcessHandle], None]] = []
+
+    @property
+    @abc.abstractmethod
+    def pid(self) -> int | None:
+        """Process id of the spawned process."""
+        ...
+
+    @property
+    def returncode(self) -> int | None:
+        """Exit code of the process or None if it has not yet exited."""
+        return self._returncode
+
+    @property
+    def exited(self) -> bool:
+        """True if the process has exited."""
+        return self._exited.is_set()
+
+    @property
+    def stdout(self) -> aio.StreamReader | None:
+        """Standard output pipe of the process, if piped to this process."""
+        return None
+
+    @property
+    def stderr(self) -> aio.StreamReader | None:
+        """Standard error pipe of the process, if piped to this process."""
+        return None
+
+    @property
+    def handle(self) -> ps.Process | None:
+        """Cached psutil handle of a local process or None."""
+        return None
+
+    def suspect(self, output: str) -> str | None:
+        """
+        Get the resource limit the process likely breached judging by its
+        error output, if any.
+        """
+        return None
+
+    def add_exit_callback(self, callback: Callable[[ProcessHandle], None]):
+        """Register a callback to be called once the process exits."""
+        if self.exited:
+            callback(self)
+        else:
+            self._callbacks.append(callback)
+
+    async def wait(self) -> int:
+        """Wait for the process to exit and return its exit code."""
+        await self._exited.wait()
+        return self.returncode
+
+    @abc.abstractmethod
+    def send_signal(self, sig: int) -> None:
+        """Send a signal to the process if it has not yet exited."""
+        ...
+
+    def suspend(self) -> None:
+        """Suspend the process with a SIGSTOP signal."""
+        self.send_signal(signal.SIGSTOP)
+
+    def resume(self) -> None:
+        """Resume the process with a SIGCONT signal."""
+        self.send_signal(signal.SIGCONT)
+
+    def interrupt(self) -> None:
+        """Interrupt the process with a SIGINT signal."""
+        self.send_signal(signal.SIGINT)
+
+    def terminate(self) -> None:
+        """Terminate the process with a SIGTERM signal."""
+        self.send_signal(signal.SIGTERM)
+
+    def kill(self) -> None:
+        """Kill the process with a SIGKILL signal."""
+        self.send_signal(signal.SIGKILL)
+
+    def _set_exited(self, returncode: int) -> None:
+        if self.exited:
+            return
+        self._returncode = returncode
+        self._exited.set()
+        callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback(self)
+            except Exception:
+                logger.exception(f"exit callback of process {self.pid}")
+
+
+class TestProcess(ProcessHandle):
+    """
+    Lifecycle handle of a test spawned as a local child process.
+
+    The exit of the process is awaited through the event loop's child
+    watcher (i.e. pidfd or SIGCHLD notifications from the OS) rather than by
+    polling, and a single `psutil.Process` handle is cached for the entire
+    lifetime of the process.
+
+    When the process is confined by resource limits, its `breach` is set
+    from the confinement before its exit is signaled.
+    """
+
+    def __init__(
+        self,
+        proc: aio.subprocess.Process,
+        confinement: Confinement | None = None,
+    ) -> None:
+        super().__init__()
+        self._proc = proc
+        self._confinement = confinement
+        self._handle: ps.Process | None = None
+        self._watcher = aio.ensure_future(self._watch())
+
+    @property
+    @override
+    def pid(self) -> int:
+        return self._proc.pid
+
+    @property
+    @override
+    def returncode(self) -> int | None:
+        return self._proc.returncode
+
+    @property
+    @override
+    def stdout(self) -> aio.StreamReader | None:
+        return self._proc.stdout
+
+    @property
+    @override
+    def stderr(self) -> aio.StreamReader | None:
+        return self._proc.stderr
+
+    @property
+    @override
+    def handle(self) -> ps.Process | None:
+        if self.exited:
+            return None
+        if self._handle is None:
+            try:
+                self._handle = ps.Process(self.pid)
+            except ps.NoSuchProcess:
+                return None
+        return self._handle
+
+    @override
+    def suspect(self, output: str) -> str | None:
+        if self._confinement is None:
+            return None
+        return self._confinement.suspect(self.returncode, output)
+
+    @override
+    def send_signal(self, sig: int) -> None:
+        if self.exited:
+            return
+        try:
+            self._proc.send_signal(sig)
+        except ProcessLookupError:
+            logger.debug(f"process {self.pid} exited before signal {sig}.")
+
+    async def _watch(self) -> None:
+        await self._proc.wait()
+        self._handle = None
+        if self._confinement is not None:
+            self.breach = self._confinement.breach(self._proc.returncode)
+            self._confinement.release()
+        self._set_exited(self._proc.returncode)
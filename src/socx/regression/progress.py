@@ -0,0 +1,354 @@
+from __future__ import annotations
+
+import abc
+import sys
+import contextlib
+import time
+import asyncio as aio
+
+from rich.progress import Progress
+from rich.progress import TextColumn
+from rich.progress import BarColumn
+from rich.progress import TaskProgressColumn
+from rich.progress import TimeRemainingColumn
+from rich.progress import SpinnerColumn
+from rich.progress import TimeElapsedColumn
+from rich.progress import MofNCompleteColumn
+from dynaconf.utils.boxing import DynaBox
+
+from .test import Test
+from .events import Event
+from .events import EventKind
+from .events import format_event
+from ..log import logger
+from ..console import console
+
+
+__all__ = (
+    "RegressionProgress",
+    "ProgressRenderer",
+    "RichRenderer",
+    "PlainRenderer",
+    "get_renderer",
+)
+
+
+class RegressionProgress:
+    """
+    Counters of a regression's progress.
+
+    Updating the counters is cheap and never draws anything, renderers read
+    them at their own pace so that any number of updates between two frames
+    are merged into a single redraw.
+
+    Members
+    -------
+    name: str
+        Name of the regression.
+
+    total: int
+        Total number of tests.
+
+    scheduled: int
+        Number of tests scheduled so far.
+
+    running: int
+        Number of tests currently running.
+
+    completed: int
+        Number of tests completed so far.
+
+    passed: int
+        Number of completed tests which passed.
+
+    failed: int
+        Number of completed tests which failed.
+
+    scheduling: bool
+        True once scheduling started.
+
+    dispatching: bool
+        True once runners started.
+
+    scheduling_done: bool
+        True once all tests were scheduled or scheduling was stopped.
+
+    aborted: str | None
+        Reason the regression was aborted for, if it was.
+    """
+
+    __slots__ = (
+        "aborted",
+        "completed",
+        "dispatching",
+        "failed",
+        "name",
+        "passed",
+        "running",
+        "scheduled",
+        "scheduling",
+        "scheduling_done",
+        "started_time",
+        "total",
+    )
+
+    def __init__(self, name: str, total: int) -> None:
+        self.name = name
+        self.total = total
+        self.scheduled = 0
+        self.running = 0
+        self.completed = 0
+        self.passed = 0
+        self.failed = 0
+        self.scheduling = False
+        self.dispatching = False
+        self.scheduling_done = False
+        self.aborted: str | None = None
+        self.started_time = time.monotonic()
+
+    @property
+    def finished(self) -> bool:
+        """True if all tests completed."""
+        return self.completed >= self.total
+
+    @property
+    def elapsed(self) -> float:
+        """Seconds elapsed since the progress was created."""
+        return time.monotonic() - self.started_time
+
+    def schedule(self) -> None:
+        """Count a scheduled test."""
+        self.scheduling = True
+        self.scheduled += 1
+
+    def start(self) -> None:
+        """Count a started test."""
+        self.running += 1
+
+    def complete(self, test: Test) -> None:
+        """Count a completed test."""
+        self.running = max(0, self.running - 1)
+        self.restore(test)
+
+    def restore(self, test: Test) -> None:
+        """Count a test which completed in an earlier, interrupted run."""
+        self.completed += 1
+        if test.passed:
+            self.passed += 1
+        elif test.failed or test.terminated:
+            self.failed += 1
+
+
+class ProgressRenderer(abc.ABC):
+    """
+    Draws the progress of a regression at a bounded rate.
+
+    Renderers which draw the events of individual tests set `events`, the
+    regression only subscribes them to its event bus.
+    """
+
+    name: str = ""
+    events: bool = False
+
+    def __init__(self, period: float) -> None:
+        self.period = max(0.001, float(period))
+
+    async def run(
+        self,
+        progress: RegressionProgress,
+        events: aio.Queue[Event] | None,
+        done: aio.Event,
+    ) -> None:
+        """Render frames every `period` seconds until `done` is set."""
+        self.open(progress)
+        try:
+            while not done.is_set():
+                self.frame(progress, self._drain(events))
+                with contextlib.suppress(TimeoutError):
+                    await aio.wait_for(done.wait(), self.period)
+            self.frame(progress, self._drain(events))
+        except Exception:
+            logger.exception("Regression halted due to exception")
+            raise
+        finally:
+            self.close(progress)
+
+    def open(self, progress: RegressionProgress) -> None:  # noqa: B027
+        """Prepare rendering."""
+
+    @abc.abstractmethod
+    def frame(self, progress: RegressionProgress, events: list[Event]):
+        """Render a single frame."""
+        ...
+
+    def close(self, progress: RegressionProgress) -> None:  # noqa: B027
+        """Finish rendering."""
+
+    @staticmethod
+    def _drain(events: aio.Queue[Event] | None) -> list[Event]:
+        drained = []
+        while events is not None and not events.empty():
+            drained.append(events.get_nowait())
+        return drained
+
+
+class RichRenderer(ProgressRenderer):
+    """Live progress bars redrawn at a fixed frame rate."""
+
+    name = "rich"
+    events = True
+
+    def __init__(self, fps: float = 10.0) -> None:
+        super().__init__(1.0 / max(0.1, float(fps)))
+        self.bars = Progress(
+            TextColumn("[progress.description]{task.description}"),
+            TaskProgressColumn(),
+            BarColumn(),
+            SpinnerColumn(),
+            "[green]Completed:",
+            MofNCompleteColumn(),
+            "[yellow]Elapsed:",
+            TimeElapsedColumn(),
+            "[cyan]Remaining:",
+            TimeRemainingColumn(),
+            auto_refresh=False,
+            transient=False,
+            expand=False,
+        )
+        self._scheduler = self.bars.add_task(
+            "[red]Schedulers: pending...", start=False
+        )
+        self._runner = self.bars.add_task(
+            "[red]Runners: pending...", start=False
+        )
+        self._regression = self.bars.add_task(
+            "[red]Regression: pending...", total=None, start=False
+        )
+
+    def open(self, progress: RegressionProgress) -> None:
+        self.bars.update(self._scheduler, total=progress.total)
+        self.bars.update(self._runner, total=progress.total)
+        self.bars.start()
+
+    def frame(self, progress: RegressionProgress, events: list[Event]):
+        bars = self.bars
+        lines = [
+            line
+            for event in events
+            if event.kind is not EventKind.Output
+            and (line := format_event(event)) is not None
+        ]
+        if lines:
+            bars.log("\n".join(lines))
+        if progress.scheduling:
+            self._start(self._scheduler)
+            self._start(self._regression)
+            bars.update(
+                self._scheduler,
+                completed=progress.scheduled,
+                description=(
+                    "[light_green]Schedulers: done."
+                    if progress.scheduling_done
+                    else "[yellow]Schedulers: working..."
+                ),
+            )
+            bars.update(
+                self._regression,
+                description="[yellow]Regression: in progress...",
+            )
+        if progress.dispatching:
+            self._start(self._runner)
+            bars.update(
+                self._runner,
+                completed=progress.completed,
+                description=(
+                    "[light_green]Runners: done."
+                    if progress.finished
+                    else "[yellow]Runners: working..."
+                ),
+            )
+        if progress.aborted is not None:
+            bars.update(
+                self._regression,
+                description=f"[red]Regression: aborted ({progress.aborted}).",
+            )
+        elif progress.finished:
+            bars.update(
+                self._regression,
+                description="[light_green]Regression: done.",
+                total=progress.total * 2,
+                completed=progress.total * 2,
+            )
+        bars.refresh()
+
+    def close(self, progress: RegressionProgress) -> None:
+        self.bars.stop()
+
+    def _start(self, task_id) -> None:
+        if not self.bars.tasks[task_id].started:
+            self.bars.start_task(task_id)
+
+
+class PlainRenderer(ProgressRenderer):
+    """
+    One summary line per interval, meant for logs when no terminal is
+    attached (e.g. CI). Events of individual tests are not printed.
+    """
+
+    name = "plain"
+
+    def __init__(self, interval: float = 30.0) -> None:
+        super().__init__(interval)
+        self._last: tuple | None = None
+
+    def frame(self, progress: RegressionProgress, events: list[Event]):
+        state = (
+            progress.scheduled,
+            progress.running,
+            progress.completed,
+            progress.aborted,
+        )
+        if state == self._last:
+            return
+        self._last = state
+        elapsed = time.strftime("%H:%M:%S", time.gmtime(progress.elapsed))
+        line = (
+            f"[{elapsed}] {progress.name}: "
+            f"{progress.completed}/{progress.total} completed "
+            f"({progress.passed} passed, {progress.failed} failed), "
+            f"{progress.running} running, {progress.scheduled} scheduled"
+        )
+        if progress.aborted is not None:
+            line += f", aborted: {progress.aborted}"
+        console.print(line, markup=False, highlight=False)
+
+
+class _NullRenderer(ProgressRenderer):
+    name = "off"
+
+    def frame(self, progress: RegressionProgress, events: list[Event]):
+        pass
+
+
+def get_renderer(cfg: DynaBox) -> ProgressRenderer:
+    """
+    Get a progress renderer by mode name.
+
+    Mode "auto" selects the rich renderer if standard output is a terminal
+    and the plain renderer otherwise.
+    """
+    mode = str(cfg.mode).lower()
+    if mode == "auto":
+        mode = RichRenderer.name if sys.stdout.isatty() else PlainRenderer.name
+    match mode:
+        case RichRenderer.name:
+            return RichRenderer(cfg.fps)
+        case PlainRenderer.name:
+            return PlainRenderer(cfg.interval)
+        case _NullRenderer.name:
+            return _NullRenderer(cfg.interval)
+        case _:
+            err = f"Unknown regression progress mode: {cfg.mode}"
+            exc = ValueError(err)
+            logger.exception(err, exc_info=exc)
+            raise exc
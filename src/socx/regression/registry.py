@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+from collections.abc import Iterable
+from collections.abc import Iterator
+
+from .test import Test
+from .test import TestBase
+from .test import TestStatus
+from .test import TestResult
+
+
+__all__ = ("TestRegistry",)
+
+
+class TestRegistry:
+    """
+    Indexed collection of the tests of a regression.
+
+    Tests are indexed by uid, by name, by (flow, build) and by their current
+    status and result. The registry registers itself as the status listener
+    of its tests, so that the status and result buckets follow every
+    transition of a test as it happens, and lookups by any of these keys
+    take constant time or time linear in the number of matching tests.
+
+    Iteration follows the order in which tests were added.
+
+    The registry is not thread-safe, tests are expected to change state on
+    the event loop's thread.
+    """
+
+    def __init__(self, tests: Iterable[Test] = ()) -> None:
+        self._by_uid: dict[int, Test] = {}
+        self._by_name: dict[str, list[Test]] = {}
+        self._by_build: dict[tuple[str, str], list[Test]] = {}
+        self._by_status: dict[TestStatus, dict[int, Test]] = {
+            status: {} for status in TestStatus
+        }
+        self._by_result: dict[TestResult, dict[int, Test]] = {
+            result: {} for result in TestResult
+        }
+        for test in tests:
+            self.add(test)
+
+    def __len__(self) -> int:
+        return len(self._by_uid)
+
+    def __iter__(self) -> Iterator[Test]:
+        return iter(self._by_uid.values())
+
+    def __contains__(self, test: Test) -> bool:
+        return self._by_uid.get(getattr(test, "uid", None)) is test
+
+    @staticmethod
+    def build_key(test: Test) -> tuple[str, str]:
+        """Get the (flow, build) index key of a test."""
+        options = test.command.options
+        return options.get("flow", ""), options.get("build", "")
+
+    def add(self, test: Test) -> None:
+        """Add a test to the registry and follow its transitions."""
+        if test.uid in self._by_uid:
+            return
+        self._by_uid[test.uid] = test
+        self._by_name.setdefault(test.name, []).append(test)
+        self._by_build.setdefault(self.build_key(test), []).append(test)
+        self._by_status[test.status][test.uid] = test
+        self._by_result[test.result][test.uid] = test
+        test._listener = self._moved
+
+    def get(self, uid: int) -> Test | None:
+        """Get a test by its uid."""
+        return self._by_uid.get(uid)
+
+    def by_name(self, name: str) -> tuple[Test, ...]:
+        """Get all tests of the given name."""
+        return tuple(self._by_name.get(name, ()))
+
+    def by_build(self, flow: str, build: str) -> tuple[Test, ...]:
+        """Get all tests of the given flow and build."""
+        return tuple(self._by_build.get((flow, build), ()))
+
+    def by_status(self, *statuses: TestStatus) -> tuple[Test, ...]:
+        """Get all tests currently in any of the given statuses."""
+        return tuple(
+            test
+            for status in statuses
+            for test in self._by_status[status].values()
+        )
+
+    def by_result(self, *results: TestResult) -> tuple[Test, ...]:
+        """Get all tests currently with any of the given results."""
+        return tuple(
+            test
+            for result in results
+            for test in self._by_result[result].values()
+        )
+
+    def count(self, status: TestStatus) -> int:
+        """Get the number of tests currently in the given status."""
+        return len(self._by_status[status])
+
+    def count_result(self, result: TestResult) -> int:
+        """Get the number of tests currently with the given result."""
+        return len(self._by_result[result])
+
+    def select(
+        self,
+        name: str | None = None,
+        flow: str | None = None,
+        build: str | None = None,
+        status: TestStatus | None = None,
+        result: TestResult | None = None,
+    ) -> list[Test]:
+        """
+        Get all tests matching all of the given criteria.
+
+        The candidates are taken from the smallest matching index and only
+        they are checked against the remaining criteria.
+        """
+        candidates: list[Iterable[Test]] = []
+        if name is not None:
+            candidates.append(self._by_name.get(name, ()))
+        if flow is not None and build is not None:
+            candidates.append(self._by_build.get((flow, build), ()))
+        if status is not None:
+            candidates.append(self._by_status[status].values())
+        if result is not None:
+            candidates.append(self._by_result[result].values())
+        pool = min(candidates, key=len) if candidates else self
+
+        def match(test: Test) -> bool:
+            test_flow, test_build = self.build_key(test)
+            return (
+                (name is None or test.name == name)
+                and (flow is None or test_flow == flow)
+                and (build is None or test_build == build)
+                and (status is None or test.status is status)
+                and (result is None or test.result is result)
+            )
+
+        return [test for test in pool if match(test)]
+
+    def _moved(
+        self, test: TestBase, status: TestStatus, result: TestResult
+    ) -> None:
+        uid = test.uid
+        if status is not test.status:
+            self._by_status[status].pop(uid, None)
+            self._by_status[test.status][uid] = test
+        if result is not test.result:
+            self._by_result[result].pop(uid, None)
+            self._by_result[test.result][uid] = test
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
+import time
 import asyncio as aio
-from time import strftime
 from pathlib import Path
 from typing import override
 from threading import RLock
@@ -10,26 +10,39 @@ from collections import deque
 from collections.abc import Iterator
 from collections.abc import Iterable
 
-from click import open_file
-from rich.panel import Panel
-from rich.progress import Progress
-from rich.progress import TextColumn
-from rich.progress import BarColumn
-from rich.progress import TaskProgressColumn
-from rich.progress import TimeRemainingColumn
-from rich.progress import SpinnerColumn
-from rich.progress import TimeElapsedColumn
-from rich.progress import MofNCompleteColumn
 from dynaconf.utils.boxing import DynaBox
 
 from .test import Test
 from .test import TestBase
 from .test import TestStatus
 from .test import TestResult
+from .history import RuntimeHistory
+from .registry import TestRegistry
+from .progress import ProgressRenderer
+from .progress import RegressionProgress
+from .progress import get_renderer
+from .events import EventBus
+from .events import EventKind
+from .admission import AdmissionController
+from .concurrency import AdaptiveConcurrency
+from .breaker import CircuitBreaker
+from .scanner import ScanPool
+from .monitor import LogMonitor
+from .watchdog import Watchdog
+from .resources import ResourceSampler
+from .store import ResultsStore
+from .export import ParquetExporter
+from .journal import Journal
+from .executor import Executor
+from .executor import get_executor
+from .limits import ResourceLimits
+from .worker import Coordinator
+from .worker import parse_address
+from .scheduler import Scheduler
+from .scheduler import get_scheduler
 from ..log import get_logger
 from ..config import settings
 from ..config import USER_LOG_DIR
-from ..console import console
 from ..visitor import Node
 from ..visitor import Visitor
 
@@ -40,6 +53,10 @@ logger = get_logger(__name__, USER_LOG_DIR / f"{__name__}.log")
 __all__ = ("Regression", "RegressionStatus", "RegressionResult")
 
 
+_ACTIVE = (TestStatus.Running, TestStatus.Stopped)
+"""Statuses of tests which have a live process."""
+
+
 @dataclass(init=False)
 class Regression(TestBase):
     tests: dict[str, Test]
@@ -67,33 +84,89 @@ class Regression(TestBase):
             logger.exception(error)
             raise ValueError(error)
         self.lock = RLock()
-        self._runner_tid = None
-        self._scheduler_tid = None
-        self._regression_tid = None
+        self._name = name
         self._tests: list[Test] = unique
+        self.registry = TestRegistry(unique)
         self._num_tests = len(self._tests)
-        self._progress: Progress = Progress(
-            TextColumn("[progress.description]{task.description}"),
-            TaskProgressColumn(),
-            BarColumn(),
-            SpinnerColumn(),
-            "[green]Completed:",
-            MofNCompleteColumn(),
-            "[yellow]Elapsed:",
-            TimeElapsedColumn(),
-            "[cyan]Remaining:",
-            TimeRemainingColumn(),
-            transient=False,
-            expand=False,
-        )
+        self._progress = RegressionProgress(name, self._num_tests)
+        self.renderer: ProgressRenderer = get_renderer(self.cfg.progress)
         self.pending: aio.Queue = aio.Queue(self.run_limit)
-        self.messages: aio.Queue[str] = aio.Queue()
+        self.events = EventBus.from_settings(self.cfg.events, name)
+        self.history = RuntimeHistory(
+            self.cfg.history.path, self.cfg.history.samples
+        )
+        self.scheduler: Scheduler = get_scheduler(
+            self.cfg.scheduler, self.history
+        )
+        self.admission = AdmissionController.from_settings(
+            self.cfg.admission
+        )
+        self.concurrency = AdaptiveConcurrency.from_settings(
+            self.cfg.concurrency, self.run_limit
+        )
+        self.store = ResultsStore.from_settings(self.cfg.store)
+        self.exporter = ParquetExporter.from_settings(self.cfg.export)
+        self._store_id = None
+        self.journal = Journal.from_settings(self.cfg.journal, name)
+        self.executor: Executor = get_executor(
+            self.cfg.executor, ResourceLimits.from_settings(self.cfg.limits)
+        )
+        self.breaker = CircuitBreaker.from_settings(self.cfg.breaker)
+        self.scan_pool = ScanPool.from_settings(self.cfg.scanner)
+        self.monitor = LogMonitor.from_settings(
+            self.cfg.monitor, self.scan_pool.scanner
+        )
+        self.watchdog = Watchdog.from_settings(self.cfg.watchdog, self.history)
+        self.sampler = ResourceSampler.from_settings(self.cfg.resources)
+        self.aborted: str | None = None
+        self._restored: list[Test] = []
+        self._scheduled = aio.Event()
+        self._done = aio.Event()
+        self.coordinator: Coordinator | None = None
+        if self.cfg.distributed.listen:
+            host, port = parse_address(self.cfg.distributed.listen)
+            self.coordinator = Coordinator(
+                self, host, port, self.cfg.distributed.wait_delay
+            )
 
     @classmethod
     def from_lines(cls, name: str, lines: Iterable[str]) -> Regression:
         tests = deque(Test(line) for line in lines)
         return Regression(name, tests)
 
+    @classmethod
+    def from_journal(cls, path: str | Path) -> Regression:
+        """
+        Rebuild an interrupted regression from its journal.
+
+        Tests which already reached a final result are restored as such and
+        are not scheduled again, and the regression keeps appending to the
+        same journal.
+        """
+        state = Journal.replay(path)
+        tests = [Test(line) for line in state.lines]
+        regression = Regression(state.name, tests)
+        regression.journal = Journal(path, regression.cfg.journal.fsync)
+        for i, record in sorted(state.finals.items()):
+            Journal.restore(tests[i], record)
+            regression._restored.append(tests[i])
+        logger.info(
+            f"resuming regression '{state.name}' from {path}: "
+            f"{len(regression._restored)}/{len(tests)} tests already done."
+        )
+        return regression
+
+    def find(
+        self,
+        name: str | None = None,
+        flow: str | None = None,
+        build: str | None = None,
+        status: TestStatus | None = None,
+        result: TestResult | None = None,
+    ) -> list[Test]:
+        """Find the tests matching all of the given criteria."""
+        return self.registry.select(name, flow, build, status, result)
+
     def accept(self, visitor: Visitor[Node]) -> None:
         """Accept a visit from a visitor."""
         visitor.visit(self)
@@ -106,7 +179,7 @@ class Regression(TestBase):
         return iter(self._tests)
 
     def __contains__(self, test: Test) -> bool:
-        return test is not None and test in self._tests
+        return test is not None and test in self.registry
 
     @property
     def cfg(self) -> DynaBox:
@@ -121,7 +194,7 @@ class Regression(TestBase):
             return self._tests
 
     @property
-    def progress(self):
+    def progress(self) -> RegressionProgress:
         """The regression's progress."""
         with self.lock:
             return self._progress
@@ -135,230 +208,265 @@ class Regression(TestBase):
     @override
     async def start(self) -> None:
         """Start the regression."""
-        self._status = TestStatus.Pending
+        self.status = TestStatus.Pending
+        self._started_time = time.time()
+        await self._open_store()
+        if self.journal is not None:
+            self.journal.open(self.name, self._tests)
+        self.events.start()
+        self.events.emit(
+            EventKind.Regression,
+            name=self.name,
+            tests=len(self),
+            wall=time.time(),
+        )
         try:
             async with aio.TaskGroup() as tg:
-                tg.create_task(self._animate_progress())
+                events = (
+                    self.events.subscribe() if self.renderer.events else None
+                )
+                tg.create_task(
+                    self.renderer.run(self.progress, events, self._done)
+                )
                 tg.create_task(self._schedule_tests())
                 tg.create_task(self._run_tests())
-                self._status = TestStatus.Running
-            self._status = TestStatus.Finished
-            self._result = (
+                if self.coordinator is not None:
+                    tg.create_task(self.coordinator.serve(self._done))
+                self.status = TestStatus.Running
+            if self.aborted is not None:
+                self.status = TestStatus.Terminated
+                self.result = TestResult.Failed
+                logger.error(f"regression aborted: {self.aborted}")
+                return
+            self.status = TestStatus.Finished
+            self.result = (
                 TestResult.Passed
                 if all(test.passed for test in self)
                 else TestResult.Failed
             )
         except Exception:
-            self._status = TestStatus.Terminated
-            self._result = TestResult.Failed
+            self.status = TestStatus.Terminated
+            self.result = TestResult.Failed
             raise
+        finally:
+            self._finished_time = time.time()
+            self.events.emit(
+                EventKind.Done,
+                status=self.status.name,
+                result=self.result.name,
+                aborted=self.aborted,
+            )
+            await self.events.close()
+            self.history.save()
+            await self._close_store()
+            await self._export()
+            if self.journal is not None:
+                self.journal.close()
+            await self.executor.close()
+            if self.sampler is not None:
+                self.sampler.close()
+            self.scan_pool.close()
+            self.scan_pool.scanner.ignores.report()
 
     @override
     def suspend(self) -> None:
         """Suspend the execution of a running test."""
-        for test in self.tests.values():
+        for test in self.registry.by_status(TestStatus.Running):
             test.suspend()
 
     @override
     async def resume(self) -> None:
         """Resume the execution of a paused test."""
-        for test in self.tests.values():
+        for test in self.registry.by_status(TestStatus.Stopped):
             test.resume()
 
     @override
     async def interrupt(self) -> None:
         """Interrupt the execution of a running test with a SIGINT signal."""
-        for test in self.tests.values():
+        for test in self.registry.by_status(*_ACTIVE):
             test.interrupt()
 
     @override
     async def terminate(self) -> None:
         """Interrupt the execution of a running test with a SIGTERM signal."""
-        for test in self.tests.values():
+        for test in self.registry.by_status(*_ACTIVE):
             test.terminate()
 
     @override
     async def kill(self) -> None:
         """Interrupt the execution of a running test with a SIGKILL signal."""
-        for test in self.tests.values():
+        for test in self.registry.by_status(*_ACTIVE):
             test.kill()
 
     async def _schedule_tests(self) -> None:
         try:
-            await self.messages.put("Scheduling tests...")
-            async with aio.TaskGroup() as tg:
-                for test in self.tests:  # removed async cause it was 2 fast
-                    tg.create_task(self._scheduler(test))
-            await self.messages.put("All tests scheduled.")
-        except Exception:
-            raise
+            self.events.note(f"Scheduling tests ({self.scheduler.name})...")
+            for _ in self._restored:
+                self.progress.schedule()
+            idle = (test for test in self.tests if test.idle)
+            for test in self.scheduler.order(idle):
+                if self.aborted is not None:
+                    break
+                await self._scheduler(test)
+            self.events.note("All tests scheduled.")
+        finally:
+            self.progress.scheduling_done = True
+            self._scheduled.set()
 
     async def _scheduler(self, test) -> None:
         try:
-            test._status = TestStatus.Pending
-            await self.messages.put(
-                f"Scheduler({test.name}): scheduling test..."
-            )
+            test.status = TestStatus.Pending
             await self.pending.put(test)
-            await self.messages.put(f"Scheduler({test.name}): test scheduled.")
-            self._scheduler_advance()
+            if self.aborted is not None:
+                self._drain_pending()
+                return
+            self._journal("scheduled", test)
+            self.events.emit(EventKind.Scheduled, test)
+            self.progress.schedule()
         except Exception:
             logger.exception("An exception occured during scheduling.")
             raise
 
     async def _run_tests(self) -> None:
         try:
-            while self.pending.empty():
-                await aio.sleep(0.1)
-            await self.messages.put("starting runners...")
+            self.events.note("starting runners...")
             async with aio.TaskGroup() as tg:
-                for _ in range(self.run_limit):
+                local = self.coordinator is None or bool(
+                    self.cfg.distributed.local_runners
+                )
+                runners = [
                     tg.create_task(self._runner())
-                self._runner_advance()
-            await self.pending.join()
-            await self.messages.put("all tests completed. stopping runners.")
+                    for _ in range(self.run_limit if local else 0)
+                ]
+                runners.append(
+                    tg.create_task(self.concurrency.run(self._saturated))
+                )
+                self.progress.dispatching = True
+                for test in self._restored:
+                    self.progress.restore(test)
+                await self._scheduled.wait()
+                await self.pending.join()
+                for runner in runners:
+                    runner.cancel()
+                self.events.note("all tests completed. stopping runners.")
+                self._done.set()
         except Exception:
             logger.exception("Failed to start runners due to exception")
             raise
 
     async def _runner(self):
+        test = None
         try:
-            while self.pending.qsize():
-                try:
+            while True:
+                async with self.concurrency.limiter:
                     test = await self.pending.get()
-                    await self.messages.put(f"Runner({test.name}): running...")
-                    await test.start()
-                    await self.messages.put(f"Runner({test.name}): done.")
-                    self._runner_advance()
-                finally:
-                    self.pending.task_done()
-        except Exception:
-            logger.exception(
-                f"Runner({test.name}): terminated due to exception."
-            )
+                    try:
+                        predicted = self.history.predict(test)
+                        await self.admission.admit(self._idle)
+                        await self._test_started(test, "Runner")
+                        test.executor = self.executor
+                        test.events = self.events
+                        test.scan_pool = self.scan_pool
+                        test.monitor = self.monitor
+                        test.watchdog = self.watchdog
+                        test.sampler = self.sampler
+                        await test.start()
+                        await self._test_finished(test, predicted, "Runner")
+                    finally:
+                        self._test_settled(test)
+        except aio.CancelledError:
             raise
-
-    async def _animate_progress(self):
-        try:
-            with self.progress as progress:
-                self._scheduler_start()
-                self._runner_start()
-                self._regression_start()
-                while not progress.finished:
-                    msgs = await self._process_messages()
-                    if msgs:
-                        progress.log(msgs)
-                    await aio.sleep(0.02)
         except Exception:
-            logger.exception("Regression halted due to exception")
+            name = test.name if test is not None else None
+            logger.exception(f"Runner({name}): terminated due to exception.")
             raise
 
-    async def _process_messages(self) -> str:
-        msgs = ""
-        while not self.messages.empty():
-            try:
-                msgs += await self.messages.get()
-                msgs += "\n"
-            finally:
-                self.messages.task_done()
-        return msgs
-
-    def _scheduler_start(self) -> None:
-        if self._scheduler_tid is None:
-            self._scheduler_tid = self.progress.add_task(
-                description="[red]Schedulers: pending...",
-                total=len(self),
-                start=False,
-                visible=True,
+    async def _test_started(self, test: Test, by: str) -> None:
+        self.events.emit(EventKind.Started, test, by=by)
+        self.progress.start()
+        self._journal("started", test)
+
+    async def _test_finished(
+        self, test: Test, predicted: float | None, by: str
+    ) -> None:
+        self.concurrency.observe(test, predicted)
+        self.history.record(test)
+        if self.store is not None:
+            self.store.record(self._store_id, test)
+        self.events.emit(
+            EventKind.Finished,
+            test,
+            by=by,
+            rc=test.returncode,
+            duration=test.duration,
+        )
+        self.progress.complete(test)
+        if (reason := self.breaker.observe(test)) is not None:
+            await self._abort(reason)
+
+    def _test_settled(self, test: Test) -> None:
+        if test.result is not TestResult.NA:
+            self._journal("finished", test)
+            self._journal("result", test)
+            self.events.emit(
+                EventKind.Result,
+                test,
+                status=test.status.name,
+                result=test.result.name,
+                reason=test.reason,
             )
-
-    def _scheduler_advance(self) -> None:
-        if self._scheduler_tid is not None:
-            if not self.progress.tasks[self._scheduler_tid].started:
-                self.progress.start_task(self._scheduler_tid)
-                self.progress.update(
-                    self._scheduler_tid,
-                    description="[yellow]Schedulers: working...",
-                    total=len(self),
-                    refresh=True,
+        self.pending.task_done()
+
+    async def _abort(self, reason: str) -> None:
+        """Stop dispatching tests and stop the running ones."""
+        self.aborted = self.progress.aborted = reason
+        self.events.note(f"Aborting regression: {reason}")
+        self._drain_pending()
+        grace = self.cfg.breaker.grace
+        if self.cfg.breaker.on_trip == "terminate":
+            await aio.gather(
+                *(
+                    test.stop(f"regression aborted: {reason}", grace)
+                    for test in self.registry.by_status(*_ACTIVE)
                 )
-                self._regression_advance()
-            if not self.progress.tasks[self._scheduler_tid].finished:
-                self.progress.update(
-                    self._scheduler_tid, advance=1, refresh=True
-                )
-            if self.progress.tasks[self._scheduler_tid].finished:
-                self._scheduler_finish()
-
-    def _scheduler_finish(self) -> None:
-        if self._scheduler_tid is not None:
-            self.progress.update(
-                task_id=self._scheduler_tid,
-                description="[light_green]Schedulers: done.",
-                refresh=True,
             )
 
-    def _runner_start(self) -> None:
-        if self._runner_tid is None:
-            self._runner_tid = self.progress.add_task(
-                description="[red]Runners: pending...",
-                total=len(self),
-                start=False,
-                visible=True,
-            )
+    def _drain_pending(self) -> None:
+        while not self.pending.empty():
+            test = self.pending.get_nowait()
+            test.status = TestStatus.Idle
+            self.pending.task_done()
 
-    def _runner_advance(self) -> None:
-        if self._runner_tid is not None:
-            if not self.progress.tasks[self._runner_tid].started:
-                self.progress.start_task(self._runner_tid)
-                self.progress.update(
-                    self._runner_tid,
-                    description="[yellow]Runners: working...",
-                    visible=True,
-                    refresh=True,
-                )
-            else:
-                self.progress.update(self._runner_tid, advance=1, refresh=True)
-            if self.progress.tasks[self._runner_tid].finished:
-                self._runner_finish()
-                self._regression_finish()
-
-    def _runner_finish(self) -> None:
-        if self._runner_tid is not None:
-            self.progress.update(
-                task_id=self._runner_tid,
-                description="[light_green]Runners: done.",
-                refresh=True,
-            )
+    def _idle(self) -> bool:
+        return not any(self.registry.count(status) for status in _ACTIVE)
 
-    def _regression_start(self) -> None:
-        if self._regression_tid is None:
-            self._regression_tid = self.progress.add_task(
-                description="[red]Regression: pending...",
-                total=None,
-                start=False,
-                visible=True,
-            )
+    def _journal(self, event: str, test: Test) -> None:
+        if self.journal is not None:
+            getattr(self.journal, event)(test)
 
-    def _regression_advance(self) -> None:
-        if self._regression_tid is not None:
-            if self.progress.tasks[self._regression_tid].started:
-                return
-            self.progress.start_task(self._regression_tid)
-            self.progress.update(
-                self._regression_tid,
-                description="[yellow]Regression: in progress...",
-                visible=True,
-                refresh=True,
-            )
+    async def _open_store(self) -> None:
+        if self.store is None:
+            return
+        try:
+            await self.store.open()
+            self._store_id = await self.store.begin_regression(self)
+        except Exception:
+            logger.exception("results store unavailable, results not stored.")
+            self.store = None
+
+    async def _close_store(self) -> None:
+        if self.store is None:
+            return
+        self.store.finish_regression(self._store_id, self)
+        await self.store.close()
+
+    async def _export(self) -> None:
+        if self.exporter is None:
+            return
+        try:
+            await aio.to_thread(self.exporter.write, self)
+        except Exception:
+            logger.exception("failed to export the regression's results.")
 
-    def _regression_finish(self) -> None:
-        if self._regression_tid is not None:
-            self.progress.update(
-                task_id=self._regression_tid,
-                description="[light_green]Regression: done.",
-                total=len(self) * 2,
-                completed=len(self) * 2,
-                visible=True,
-                refresh=True,
-            )
+    def _saturated(self) -> bool:
+        return not self.pending.empty()
@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+import time
+import asyncio as aio
+from typing import TYPE_CHECKING
+from dataclasses import dataclass
+
+import psutil as ps
+from dynaconf.utils.boxing import DynaBox
+
+from ..log import logger
+
+if TYPE_CHECKING:
+    from .test import Test
+
+
+__all__ = ("ResourceStats", "ResourceSampler")
+
+
+@dataclass
+class ResourceStats:
+    """
+    Resources used by the process tree of a test.
+
+    Members
+    -------
+    peak_rss: int
+        Peak resident set size of the whole process tree in bytes.
+
+    cpu_time: float
+        User and system CPU time of the process tree in seconds, including
+        the children it waited for.
+
+    cpu_utilization: float
+        Average number of CPUs used over the test's duration.
+
+    read_bytes: int
+        Bytes read from storage by the processes of the tree.
+
+    write_bytes: int
+        Bytes written to storage by the processes of the tree.
+
+    children: int
+        Peak number of child processes of the test, at any depth.
+
+    samples: int
+        Number of times the process tree was sampled.
+    """
+
+    peak_rss: int = 0
+    cpu_time: float = 0.0
+    cpu_utilization: float = 0.0
+    read_bytes: int = 0
+    write_bytes: int = 0
+    children: int = 0
+    samples: int = 0
+
+
+class _Tracked:
+    __slots__ = ("io", "started", "stats", "test")
+
+    def __init__(self, test: Test) -> None:
+        self.test = test
+        self.stats = ResourceStats()
+        self.io: dict[tuple[int, float], tuple[int, int]] = {}
+        self.started = time.monotonic()
+
+
+class ResourceSampler:
+    """
+    Samples the resources used by the process trees of running tests.
+
+    A single task sweeps all running tests every `interval` seconds: the
+    process table is read once per sweep to find the descendants of every
+    test, so the cost of a sweep grows with the number of processes rather
+    than with the number of tests times the number of processes. Sweeps run
+    in a thread, off the event loop.
+
+    Measurements are sampled, so short lived processes and resources used
+    between the last sweep and the exit of a test may be missed. CPU time is
+    the exception as far as children are concerned, since the CPU time of
+    the children a process waited for is accounted to that process.
+
+    Members
+    -------
+    interval: float
+        Seconds between two sweeps.
+    """
+
+    def __init__(self, interval: float = 5.0) -> None:
+        self.interval = float(interval)
+        self._tracked: dict[int, _Tracked] = {}
+        self._task: aio.Task | None = None
+
+    @classmethod
+    def from_settings(cls, cfg: DynaBox) -> ResourceSampler | None:
+        """Create a resource sampler from settings, None if it is disabled."""
+        if not cfg.enabled:
+            return None
+        return cls(cfg.interval)
+
+    def add(self, test: Test) -> None:
+        """Start sampling a running test, whose stats are set right away."""
+        tracked = _Tracked(test)
+        test.resources = tracked.stats
+        self._tracked[id(test)] = tracked
+        if self._task is None or self._task.done():
+            self._task = aio.create_task(self._run())
+
+    def remove(self, test: Test) -> None:
+        """Stop sampling a test which exited and finalize its stats."""
+        tracked = self._tracked.pop(id(test), None)
+        if tracked is None:
+            return
+        stats = tracked.stats
+        duration = test.duration or time.monotonic() - tracked.started
+        if duration > 0:
+            stats.cpu_utilization = stats.cpu_time / duration
+
+    def close(self) -> None:
+        """Stop sampling."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        self._tracked.clear()
+
+    async def _run(self) -> None:
+        while self._tracked:
+            await aio.sleep(self.interval)
+            roots = [
+                (tracked, tracked.test.process)
+                for tracked in list(self._tracked.values())
+            ]
+            roots = [(tracked, root) for tracked, root in roots if root]
+            if not roots:
+                continue
+            try:
+                samples = await aio.to_thread(
+                    self._sweep, [root for _, root in roots]
+                )
+            except Exception:
+                logger.exception("resource sampling failed.")
+                continue
+            for (tracked, _), sample in zip(roots, samples, strict=True):
+                if id(tracked.test) in self._tracked:
+                    self._apply(tracked, *sample)
+
+    @staticmethod
+    def _sweep(roots: list[ps.Process]) -> list[tuple]:
+        children: dict[int, list[ps.Process]] = {}
+        for proc in ps.process_iter(["ppid"]):
+            children.setdefault(proc.info["ppid"], []).append(proc)
+        samples = []
+        for root in roots:
+            tree = [root]
+            for proc in tree:
+                tree.extend(children.get(proc.pid, ()))
+            rss = 0
+            cpu = 0.0
+            io = {}
+            alive = 0
+            for proc in tree:
+                try:
+                    with proc.oneshot():
+                        rss += proc.memory_info().rss
+                        times = proc.cpu_times()
+                        cpu += (
+                            times.user
+                            + times.system
+                            + times.children_user
+                            + times.children_system
+                        )
+                        key = (proc.pid, proc.create_time())
+                        if hasattr(proc, "io_counters"):
+                            counters = proc.io_counters()
+                            io[key] = (
+                                counters.read_bytes,
+                                counters.write_bytes,
+                            )
+                except (ps.NoSuchProcess, ps.AccessDenied):
+                    continue
+                alive += 1
+            samples.append((rss, cpu, io, max(0, alive - 1)))
+        return samples
+
+    @staticmethod
+    def _apply(
+        tracked: _Tracked,
+        rss: int,
+        cpu: float,
+        io: dict[tuple[int, float], tuple[int, int]],
+        children: int,
+    ) -> None:
+        stats = tracked.stats
+        stats.samples += 1
+        stats.peak_rss = max(stats.peak_rss, rss)
+        stats.cpu_time = max(stats.cpu_time, cpu)
+        stats.children = max(stats.children, children)
+        tracked.io.update(io)
+        stats.read_bytes = sum(r for r, _ in tracked.io.values())
+        stats.write_bytes = sum(w for _, w in tracked.io.values())
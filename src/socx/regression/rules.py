@@ -0,0 +1,273 @@
+from __future__ import annotations
+
+import re
+import hashlib
+import threading
+from pathlib import Path
+from collections.abc import Iterable
+from collections.abc import Mapping
+
+from ..log import logger
+
+
+__all__ = ("IgnoreRule", "RuleSet", "IGNORE_PATTERNS")
+
+
+IGNORE_PATTERNS: tuple[str, ...] = (
+    r"error_response_policy_enum",
+    r"UVM_ERROR :    0",
+    r"UVM_ERROR reports  :    0",
+    r"UVM_ERROR reports   :    0",
+    r"UVM_WARNING reports:    ",
+    r"UVM_WARNING reports :    ",
+    r"INFO = ",
+    r"\[WARNING\] \[LP",
+    r"LP_MSG_SEV",
+    r"Number of demoted UVM_FATAL reports  :",
+    r"Number of demoted UVM_ERROR reports  :",
+    r"Number of demoted UVM_WARNING reports",
+    r"Number of caught UVM_FATAL reports   :    0",
+    r"Number of caught UVM_ERROR reports   :    0",
+    r"UVM_WARNING :    0",
+    r"UVM_FATAL :    0",
+    r"AEON\/MTP EEPROM",
+    r"\*Verdi\* FSDB WARNING: The FSDB file already exists",
+    r"Warning-\[LCA_FEATURES_ENABLED\] Usage warning",
+    r"All future warnings not reported",
+    r"Total warnings:",
+    r"Verdi KDB elaboration finished with 0 error",
+    r"<<VIRL_MEM_WARNING:  No Operation as Memory is in Deep Sleep mode.>>",
+    r"Warning-\[KDB-ELAB-W\] Verdi KDB elaboration with warning",
+)
+"""Patterns of error lines which are not considered errors."""
+
+_LITERAL = re.compile(r"(?:[^\\.^$*+?{}\[\]|()]|\\[^A-Za-z0-9])*")
+"""Matches patterns which only match their own (unescaped) text."""
+
+_REFERENCES = re.compile(r"\\[1-9]|\(\?P[<=]|\(\?\(")
+"""Matches backreferences, named groups and conditionals of a pattern."""
+
+_shared: dict[tuple[tuple[str, ...], Path | None], RuleSet] = {}
+_shared_lock = threading.Lock()
+
+
+class IgnoreRule:
+    """
+    A single ignore rule.
+
+    Members
+    -------
+    pattern: str
+        Regular expression of the rule.
+
+    source: str
+        Where the rule comes from, "builtin" or "file:line".
+
+    literal: bytes | None
+        Text of the rule if its pattern has no special characters, in which
+        case lines are matched by a plain substring search.
+
+    hits: int
+        Number of error lines ignored by the rule.
+    """
+
+    __slots__ = ("hits", "literal", "pattern", "source")
+
+    def __init__(self, pattern: str, source: str = "builtin") -> None:
+        self.pattern = pattern
+        self.source = source
+        self.literal = (
+            re.sub(r"\\(.)", r"\1", pattern).encode()
+            if _LITERAL.fullmatch(pattern)
+            else None
+        )
+        self.hits = 0
+
+    def __repr__(self) -> str:
+        return (
+            f"{type(self).__name__}({self.pattern!r}, "
+            f"source={self.source!r}, hits={self.hits})"
+        )
+
+
+class RuleSet:
+    """
+    Compiled set of ignore rules.
+
+    Rules whose pattern is plain text are checked first with substring
+    searches, and only lines matched by none of them are searched with a
+    single alternation of the remaining (regular expression) rules. Rules
+    which can't be part of an alternation, i.e. rules with inline global
+    flags, backreferences or named groups, are searched one by one last.
+    Either way, the index of the matching rule is known, so that hits are
+    counted per rule.
+
+    Rule sets are meant to be shared: `shared` returns the same rule set for
+    the same patterns and ignore file within a process (pickled rule sets
+    also resolve to it), and `refresh` only reloads the ignore file when its
+    modification time changed.
+
+    Members
+    -------
+    patterns: tuple[str, ...]
+        Builtin patterns of the rule set.
+
+    path: Path | None
+        Ignore file, one pattern per line, if any.
+
+    rules: list[IgnoreRule]
+        All rules, builtin rules first.
+
+    fingerprint: str
+        Digest of the patterns of all rules.
+    """
+
+    def __init__(
+        self,
+        patterns: Iterable[str] = IGNORE_PATTERNS,
+        path: str | Path | None = None,
+    ) -> None:
+        self.patterns = tuple(p for p in patterns if p)
+        self.path = Path(path) if path else None
+        self.rules: list[IgnoreRule] = []
+        self.fingerprint = ""
+        self._mtime: int | None = None
+        self._compiled: tuple = ((), None, {}, ())
+        self._lock = threading.Lock()
+        self._load(self._stat())
+
+    @classmethod
+    def shared(
+        cls,
+        patterns: Iterable[str] = IGNORE_PATTERNS,
+        path: str | Path | None = None,
+    ) -> RuleSet:
+        """Get the rule set of this process for patterns and ignore file."""
+        key = (tuple(patterns), Path(path) if path else None)
+        with _shared_lock:
+            if (rv := _shared.get(key)) is None:
+                rv = _shared[key] = cls(*key)
+        rv.refresh()
+        return rv
+
+    def __reduce__(self):
+        return (type(self).shared, (self.patterns, self.path))
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+    def refresh(self) -> bool:
+        """Reload the ignore file if it changed, True if it was reloaded."""
+        if self.path is None:
+            return False
+        mtime = self._stat()
+        if mtime == self._mtime:
+            return False
+        with self._lock:
+            if mtime != self._mtime:
+                logger.info(f"reloading ignore rules from {self.path}")
+                self._load(mtime)
+        return True
+
+    def match(self, line: bytes) -> int | None:
+        """Get the index of a rule matching a line, None if none does."""
+        literals, regex, groups, standalone = self._compiled
+        for literal, index in literals:
+            if literal in line:
+                return index
+        if regex is not None and (match := regex.search(line)) is not None:
+            return groups[match.lastindex]
+        for pattern, index in standalone:
+            if pattern.search(line):
+                return index
+        return None
+
+    def count(self, hits: Mapping[int, int]) -> None:
+        """Add the hits of a scan, by rule index, to the rules' hits."""
+        for index, count in hits.items():
+            if index < len(self.rules):
+                self.rules[index].hits += count
+
+    def unused(self) -> list[IgnoreRule]:
+        """Get the rules which never matched."""
+        return [rule for rule in self.rules if not rule.hits]
+
+    def report(self) -> None:
+        """Log the hits of all rules."""
+        hits = sum(rule.hits for rule in self.rules)
+        if not hits:
+            return
+        unused = self.unused()
+        logger.info(
+            f"ignore rules: {hits} error lines ignored, "
+            f"{len(unused)}/{len(self.rules)} rules never matched."
+        )
+        for rule in sorted(self.rules, key=lambda r: r.hits, reverse=True):
+            kind = "literal" if rule.literal is not None else "regex"
+            logger.debug(
+                f"ignore rule {rule.source} ({kind}): "
+                f"{rule.hits} hits: {rule.pattern}"
+            )
+
+    @staticmethod
+    def _combinable(rule: IgnoreRule) -> bool:
+        # e.g. global flags such as '(?i)' are only valid at the start.
+        try:
+            re.compile(f"(?:)|({rule.pattern})")
+        except re.error:
+            return False
+        return True
+
+    def _stat(self) -> int | None:
+        try:
+            return self.path.stat().st_mtime_ns if self.path else None
+        except OSError:
+            return None
+
+    def _load(self, mtime: int | None) -> None:
+        rules = [IgnoreRule(pattern) for pattern in self.patterns]
+        if mtime is not None:
+            with self.path.open(encoding="utf-8", errors="replace") as file:
+                for number, line in enumerate(file, 1):
+                    if pattern := line.strip():
+                        rules.append(
+                            IgnoreRule(pattern, f"{self.path.name}:{number}")
+                        )
+        literals = []
+        regexes = []
+        groups = {}
+        standalone = []
+        group = 1
+        for index, rule in enumerate(rules):
+            if rule.literal is not None:
+                literals.append((rule.literal, index))
+                continue
+            try:
+                compiled = re.compile(rule.pattern.encode())
+            except re.error as exc:
+                logger.warning(
+                    f"skipping invalid ignore rule {rule.source}: {exc}"
+                )
+                continue
+            if _REFERENCES.search(rule.pattern) or not self._combinable(rule):
+                standalone.append((compiled, index))
+                continue
+            regexes.append(f"({rule.pattern})")
+            groups[group] = index
+            group += compiled.groups + 1
+        try:
+            regex = re.compile("|".join(regexes).encode()) if regexes else None
+        except re.error as exc:
+            logger.warning(f"ignore rules can't be combined: {exc}")
+            regex = None
+            standalone.extend(
+                (re.compile(rules[index].pattern.encode()), index)
+                for index in groups.values()
+            )
+            standalone.sort(key=lambda item: item[1])
+        self.rules = rules
+        self._compiled = (literals, regex, groups, standalone)
+        self._mtime = mtime
+        self.fingerprint = hashlib.sha256(
+            "\0".join(rule.pattern for rule in rules).encode()
+        ).hexdigest()
@@ -0,0 +1,577 @@
+from __future__ import annotations
+
+import os
+import re
+import bz2
+import gzip
+import lzma
+import mmap
+import json
+import sqlite3
+import hashlib
+import threading
+import asyncio as aio
+import multiprocessing as mp
+from typing import BinaryIO
+from pathlib import Path
+from dataclasses import field
+from dataclasses import dataclass
+from collections.abc import Callable
+from collections.abc import Iterable
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from dynaconf.utils.boxing import DynaBox
+
+from .rules import RuleSet
+from .rules import IGNORE_PATTERNS
+from ..log import logger
+
+
+__all__ = (
+    "LogScanner",
+    "ScanPool",
+    "ScanCache",
+    "ScanResult",
+    "find_log",
+    "ERROR_PATTERNS",
+    "IGNORE_PATTERNS",
+)
+
+
+ERROR_PATTERNS: tuple[str, ...] = (
+    r"ERROR",
+    r"warning",
+    r"WARNING",
+    r"Error",
+    r"Fatal",
+    r"FATAL",
+    r"\[NSC\]Warning",
+    r"\[NSC\]Error",
+    r"\*E",
+    r"\*F",
+)
+"""Patterns of lines reporting an error."""
+
+SIM_ENDED: str = "--- UVM Report Summary ---"
+"""Text of the line marking a simulation which ended properly."""
+
+SIM_TIME: str = r"finish at simulation time (\d+)\...ns"
+"""Pattern of the line reporting the simulation time, in its only group."""
+
+LONG_LINE: int = 1 << 22
+"""Number of bytes of an incomplete line after which a stream's scan splits
+it, since only the first `max_line` bytes of an error line are kept."""
+
+COMPRESSED: dict[str, Callable[..., BinaryIO]] = {
+    ".gz": gzip.open,
+    ".xz": lzma.open,
+    ".bz2": bz2.open,
+}
+"""Openers of compressed logs, by suffix of the compressed file."""
+
+
+def find_log(path: str | Path) -> Path | None:
+    """Find a log file, or else a compressed variant of it, e.g. `.gz`."""
+    path = Path(path)
+    if path.is_file():
+        return path
+    for suffix in COMPRESSED:
+        candidate = path.with_name(f"{path.name}{suffix}")
+        if candidate.is_file():
+            return candidate
+    return None
+
+
+@dataclass
+class ScanResult:
+    """
+    Verdict of a simulation log.
+
+    Members
+    -------
+    result: str
+        "PASS" if the simulation ended properly without errors, "FAIL"
+        otherwise, or "NA" if the log was not scanned.
+
+    errors: list[str]
+        Error lines, in order of appearance.
+
+    sim_ended: bool
+        True if the simulation ended properly.
+
+    sim_time: int
+        Simulation time reported at the end of the simulation, 0 if none.
+
+    ignored: dict[int, int]
+        Number of error lines ignored by each ignore rule, by rule index.
+    """
+
+    result: str = "NA"
+    errors: list[str] = field(default_factory=list)
+    sim_ended: bool = False
+    sim_time: int = 0
+    ignored: dict[int, int] = field(default_factory=dict, compare=False)
+
+    @property
+    def num_errors(self) -> int:
+        """Number of error lines."""
+        return len(self.errors)
+
+
+class LogScanner:
+    """
+    Single pass scanner of simulation logs.
+
+    Error patterns are compiled once into an automaton which finds the next
+    line of interest (error, end of simulation or simulation time), and
+    error lines are then checked against a shared `RuleSet` of ignore
+    rules, reloaded whenever its ignore file changes. Logs are scanned in a
+    single pass over a memory map of the file (or over fixed size chunks of
+    a stream), so memory stays constant regardless of the size of the log,
+    and only error lines are ever copied out of it.
+
+    Every line containing an error pattern is classified, including the
+    first line, the last line and adjacent error lines.
+
+    Members
+    -------
+    max_line: int
+        Maximal number of bytes kept of each error line.
+
+    chunk_size: int
+        Number of bytes read at once when scanning a stream.
+
+    ignores: RuleSet
+        Ignore rules of error lines.
+    """
+
+    def __init__(
+        self,
+        errors: Iterable[str] = ERROR_PATTERNS,
+        ignores: Iterable[str] | RuleSet = IGNORE_PATTERNS,
+        max_line: int = 4096,
+        chunk_size: int = 1 << 20,
+    ) -> None:
+        self.max_line = int(max_line)
+        self.chunk_size = int(chunk_size)
+        self.ignores = (
+            ignores if isinstance(ignores, RuleSet) else RuleSet(ignores)
+        )
+        errors = tuple(errors)
+        self._errors_digest = hashlib.sha256(
+            "\0".join((str(self.max_line), *errors)).encode()
+        ).hexdigest()
+        # A flat alternation (i.e. without named or nested groups around
+        # the alternatives) lets the regex engine skip ahead to the first
+        # characters of the alternatives, which is several times faster.
+        self._ended = SIM_ENDED.encode()
+        self._interest = re.compile(
+            "|".join(
+                (re.escape(SIM_ENDED), SIM_TIME, *(f"(?:{p})" for p in errors))
+            ).encode()
+        )
+
+    @classmethod
+    def from_settings(cls, cfg: DynaBox) -> LogScanner:
+        """Create a scanner using the shared rules of the ignore file."""
+        ignores = RuleSet.shared(IGNORE_PATTERNS, cfg.ignore_file or None)
+        return cls(ignores=ignores, max_line=cfg.max_line)
+
+    @property
+    def fingerprint(self) -> str:
+        """
+        Digest of the scanner's patterns and settings, which identifies the
+        results it produces (e.g. for caching them).
+        """
+        return f"{self._errors_digest}:{self.ignores.fingerprint}"
+
+    def scan(self, path: str | Path) -> ScanResult:
+        """
+        Scan a log file through a memory map.
+
+        A log which does not exist is looked for compressed (see `find_log`)
+        and decompressed as a stream.
+
+        Raises
+        ------
+        ValueError
+            If the log file does not exist or cannot be decompressed.
+        """
+        if (found := find_log(path)) is None:
+            err = f"log file doesnt exists {path}"
+            raise ValueError(err)
+        path = found
+        if (opener := COMPRESSED.get(path.suffix)) is not None:
+            try:
+                with opener(path, "rb") as stream:
+                    return self.scan_stream(stream)
+            except (OSError, EOFError, lzma.LZMAError) as exc:
+                err = f"failed to decompress log file {path}: {exc}"
+                raise ValueError(err) from exc
+        self.ignores.refresh()
+        rv = ScanResult(result="FAIL")
+        with path.open("rb") as file:
+            if path.stat().st_size:
+                with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as m:
+                    self._scan(m, 0, len(m), rv)
+        return self._verdict(rv)
+
+    def scan_stream(self, stream: BinaryIO) -> ScanResult:
+        """
+        Scan a binary stream of a log (e.g. a pipe or compressed file).
+
+        Incomplete lines are carried over to the next chunk, unless they
+        outgrow `LONG_LINE` (or a chunk), in which case they are scanned in
+        pieces so that a log without newlines is never held whole.
+        """
+        self.ignores.refresh()
+        rv = ScanResult(result="FAIL")
+        buffer = b""
+        while chunk := stream.read(self.chunk_size):
+            buffer += chunk
+            end = buffer.rfind(b"\n") + 1
+            if not end and len(buffer) >= max(self.chunk_size, LONG_LINE):
+                end = len(buffer)
+            if end:
+                self._scan(buffer, 0, end, rv)
+                buffer = buffer[end:]
+        if buffer:
+            self._scan(buffer, 0, len(buffer), rv)
+        return self._verdict(rv)
+
+    def scan_bytes(self, data: bytes) -> ScanResult:
+        """Scan a part of a log held in memory, e.g. its latest lines."""
+        self.ignores.refresh()
+        rv = ScanResult(result="FAIL")
+        self._scan(data, 0, len(data), rv)
+        return self._verdict(rv)
+
+    def _scan(self, data, pos: int, end: int, rv: ScanResult) -> None:
+        search = self._interest.search
+        ignore = self.ignores.match
+        ignored = rv.ignored
+        while (match := search(data, pos, end)) is not None:
+            if (time := match.group(1)) is not None:
+                if not rv.sim_time:
+                    rv.sim_time = int(time)
+                pos = match.end()
+                continue
+            if match.group(0) == self._ended:
+                rv.sim_ended = True
+                pos = match.end()
+                continue
+            start = data.rfind(b"\n", 0, match.start()) + 1
+            stop = data.find(b"\n", match.end(), end)
+            stop = end if stop == -1 else stop
+            line = data[start:stop]
+            if (rule := ignore(line)) is None:
+                line = line[: self.max_line]
+                rv.errors.append(line.decode(errors="replace").rstrip("\r"))
+            else:
+                ignored[rule] = ignored.get(rule, 0) + 1
+            pos = stop + 1
+
+    @staticmethod
+    def _verdict(rv: ScanResult) -> ScanResult:
+        if rv.sim_ended and not rv.errors:
+            rv.result = "PASS"
+        logger.debug(
+            f"scanned log: {rv.result}, {rv.num_errors} errors, "
+            f"sim time {rv.sim_time}"
+        )
+        return rv
+
+
+CACHE_SCHEMA_VERSION: int = 1
+"""Version of the cache's schema, the cache is dropped when it changes."""
+
+
+def _file_identity(stat: os.stat_result) -> tuple[int, int, int]:
+    """
+    Get the size, modification time and inode of a file.
+
+    Unlike comparing entire stat results, comparing identities ignores the
+    access time, which reading the file may update.
+    """
+    return stat.st_size, stat.st_mtime_ns, stat.st_ino
+
+
+class ScanCache:
+    """
+    Persistent cache of log scan results.
+
+    Entries are keyed by the resolved path of a log and are only valid while
+    the log's size, modification time and inode are unchanged, and while the
+    fingerprint of the scanner (i.e. of its error and ignore patterns) is the
+    same as the one the log was scanned with. Stale entries are replaced on
+    the next scan of their log.
+
+    The cache is a plain SQLite database in WAL mode, so that any number of
+    processes (e.g. workers on the same host) can share it. Being a cache,
+    it is dropped and recreated whenever its schema changes. Its connection
+    may be used from any thread, one at a time.
+
+    Members
+    -------
+    path: Path
+        Path of the database file.
+
+    hits: int
+        Number of lookups answered from the cache.
+
+    misses: int
+        Number of lookups which were not.
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        self.hits = 0
+        self.misses = 0
+        self._conn: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls, cfg: DynaBox) -> ScanCache | None:
+        """Create a scan cache from settings, None if it is disabled."""
+        if not cfg.enabled:
+            return None
+        return cls(cfg.path)
+
+    def get(
+        self, path: Path, stat: os.stat_result, fingerprint: str
+    ) -> ScanResult | None:
+        """Get the cached scan of a log, None if missing or stale."""
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT result, errors, sim_ended, sim_time FROM Scan"
+                " WHERE path = ? AND size = ? AND mtime_ns = ? AND inode = ?"
+                " AND fingerprint = ?",
+                (str(path), *_file_identity(stat), fingerprint),
+            ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        result, errors, sim_ended, sim_time = row
+        return ScanResult(
+            result, json.loads(errors), bool(sim_ended), sim_time
+        )
+
+    def put(
+        self,
+        path: Path,
+        stat: os.stat_result,
+        fingerprint: str,
+        scan: ScanResult,
+    ) -> None:
+        """Cache the scan of a log, replacing any previous one."""
+        with self._lock:
+            self._connect().execute(
+                "INSERT OR REPLACE INTO Scan"
+                " (path, size, mtime_ns, inode, fingerprint,"
+                "  result, errors, sim_ended, sim_time)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    str(path),
+                    *_file_identity(stat),
+                    fingerprint,
+                    scan.result,
+                    json.dumps(scan.errors),
+                    int(scan.sim_ended),
+                    scan.sim_time,
+                ),
+            )
+
+    def close(self) -> None:
+        """Close the database."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+        if self.hits or self.misses:
+            logger.debug(
+                f"scan cache {self.path}: {self.hits} hits, "
+                f"{self.misses} misses."
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is not None:
+            return self._conn
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(
+            self.path,
+            isolation_level=None,
+            timeout=30.0,
+            check_same_thread=False,
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version != CACHE_SCHEMA_VERSION:
+            logger.info(f"creating log scan cache {self.path}")
+            conn.executescript(
+                "BEGIN;\n"
+                "DROP TABLE IF EXISTS Scan;\n"
+                "CREATE TABLE Scan (\n"
+                "  path TEXT PRIMARY KEY,\n"
+                "  size INTEGER NOT NULL,\n"
+                "  mtime_ns INTEGER NOT NULL,\n"
+                "  inode INTEGER NOT NULL,\n"
+                "  fingerprint TEXT NOT NULL,\n"
+                "  result TEXT NOT NULL,\n"
+                "  errors TEXT NOT NULL,\n"
+                "  sim_ended INTEGER NOT NULL,\n"
+                "  sim_time INTEGER NOT NULL\n"
+                ");\n"
+                f"PRAGMA user_version = {CACHE_SCHEMA_VERSION};\n"
+                "COMMIT;"
+            )
+        self._conn = conn
+        return conn
+
+
+class ScanPool:
+    """
+    Scans logs in a pool of worker processes, awaited from the event loop.
+
+    Scanning a large log is CPU bound and would otherwise freeze every other
+    runner, the scheduler and the progress until it is done. The pool is
+    only started on the first scan, and each of its processes receives a
+    copy of the scanner once, when it starts.
+
+    When a worker process dies (e.g. killed for running out of memory), the
+    pool breaks and fails every pending scan. The broken pool is replaced
+    for new scans, and each failed scan is retried in a process of its own,
+    so only the scan which keeps crashing fails.
+
+    Members
+    -------
+    scanner: LogScanner
+        Scanner used by the pool's processes.
+
+    processes: int
+        Maximal number of worker processes, 0 scans in a thread of the event
+        loop's default executor instead.
+
+    start_method: str
+        Multiprocessing start method of the worker processes.
+
+    cache: ScanCache | None
+        Cache consulted before scanning a log, if any.
+    """
+
+    def __init__(
+        self,
+        scanner: LogScanner,
+        processes: int | None = None,
+        start_method: str = "forkserver",
+        cache: ScanCache | None = None,
+    ) -> None:
+        self.scanner = scanner
+        self.cache = cache
+        self.processes = (
+            os.cpu_count() or 1 if processes is None else int(processes)
+        )
+        self.start_method = start_method
+        self._pool: ProcessPoolExecutor | None = None
+
+    @classmethod
+    def from_settings(cls, cfg: DynaBox) -> ScanPool:
+        """Create a scan pool from a settings object."""
+        pool = cfg.pool
+        processes = (int(pool.processes) or None) if pool.enabled else 0
+        return cls(
+            LogScanner.from_settings(cfg),
+            processes=processes,
+            start_method=pool.start_method,
+            cache=ScanCache.from_settings(cfg.cache),
+        )
+
+    async def scan(self, path: str | Path) -> ScanResult:
+        """
+        Scan a log file, or its compressed variant, without blocking the
+        event loop.
+
+        Raises
+        ------
+        ValueError
+            If the log file does not exist, cannot be decompressed, or
+            crashes the process scanning it.
+        """
+        if (found := find_log(path)) is None:
+            err = f"log file doesnt exists {path}"
+            raise ValueError(err)
+        path = found.resolve()
+        self.scanner.ignores.refresh()
+        if self.cache is None:
+            return await self._scan(path)
+        stat = await aio.to_thread(path.stat)
+        fingerprint = self.scanner.fingerprint
+        cached = await aio.to_thread(self.cache.get, path, stat, fingerprint)
+        if cached is not None:
+            return cached
+        rv = await self._scan(path)
+        # The log may have changed while it was scanned, in which case the
+        # result is not cached and the log is scanned again next time.
+        latest = await aio.to_thread(path.stat)
+        if _file_identity(latest) == _file_identity(stat):
+            await aio.to_thread(self.cache.put, path, stat, fingerprint, rv)
+        return rv
+
+    def close(self) -> None:
+        """Shut the worker processes down and close the cache."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+        if self.cache is not None:
+            self.cache.close()
+
+    async def _scan(self, path: Path) -> ScanResult:
+        rv = await self._run(path)
+        self.scanner.ignores.count(rv.ignored)
+        return rv
+
+    async def _run(self, path: Path) -> ScanResult:
+        loop = aio.get_running_loop()
+        if not self.processes:
+            return await loop.run_in_executor(None, self.scanner.scan, path)
+        if self._pool is None:
+            logger.debug(f"starting {self.processes} log scanner processes.")
+            self._pool = self._create(self.processes)
+        pool = self._pool
+        try:
+            return await loop.run_in_executor(pool, _scan_in_worker, path)
+        except BrokenProcessPool:
+            if self._pool is pool:
+                logger.warning("log scanner processes crashed, restarting.")
+                self._pool = None
+                pool.shutdown(wait=False, cancel_futures=True)
+        pool = self._create(1)
+        try:
+            return await loop.run_in_executor(pool, _scan_in_worker, path)
+        except BrokenProcessPool as exc:
+            err = f"log scanner crashed scanning {path}"
+            raise ValueError(err) from exc
+        finally:
+            pool.shutdown(wait=False)
+
+    def _create(self, processes: int) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=processes,
+            mp_context=mp.get_context(self.start_method),
+            initializer=_init_worker,
+            initargs=(self.scanner,),
+        )
+
+
+_worker_scanner: LogScanner | None = None
+
+
+def _init_worker(scanner: LogScanner) -> None:
+    global _worker_scanner
+    _worker_scanner = scanner
+
+
+def _scan_in_worker(path: Path) -> ScanResult:
+    return _worker_scanner.scan(path)
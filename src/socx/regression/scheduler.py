@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import abc
+from typing import override
+from collections.abc import Iterable
+
+from .test import Test
+from .history import RuntimeHistory
+from ..log import logger
+
+
+__all__ = (
+    "Scheduler",
+    "FifoScheduler",
+    "LongestJobFirstScheduler",
+    "get_scheduler",
+)
+
+
+class Scheduler(abc.ABC):
+    """Policy deciding the order in which tests are queued for execution."""
+
+    name: str = ""
+
+    @abc.abstractmethod
+    def order(self, tests: Iterable[Test]) -> list[Test]:
+        """Get the tests in the order they should be queued."""
+        ...
+
+
+class FifoScheduler(Scheduler):
+    """Queue tests in their input order."""
+
+    name = "fifo"
+
+    @override
+    def order(self, tests: Iterable[Test]) -> list[Test]:
+        return list(tests)
+
+
+class LongestJobFirstScheduler(Scheduler):
+    """
+    Queue tests by their predicted runtime, longest first.
+
+    Predictions are taken from the durations recorded in earlier runs, tests
+    which were never seen before are queued after all known tests in their
+    input order.
+    """
+
+    name = "ljf"
+
+    def __init__(self, history: RuntimeHistory) -> None:
+        self.history = history
+
+    @override
+    def order(self, tests: Iterable[Test]) -> list[Test]:
+        known: list[tuple[float, Test]] = []
+        unseen: list[Test] = []
+        for test in tests:
+            predicted = self.history.predict(test)
+            if predicted is None:
+                unseen.append(test)
+            else:
+                known.append((predicted, test))
+        known.sort(key=lambda item: item[0], reverse=True)
+        logger.debug(
+            f"ljf: {len(known)} tests with history, {len(unseen)} unseen."
+        )
+        return [test for _, test in known] + unseen
+
+
+def get_scheduler(name: str, history: RuntimeHistory) -> Scheduler:
+    """Get a scheduler by the name of its policy."""
+    match str(name).lower():
+        case FifoScheduler.name:
+            return FifoScheduler()
+        case LongestJobFirstScheduler.name:
+            return LongestJobFirstScheduler(history)
+        case _:
+            err = f"Unknown regression scheduler: {name}"
+            exc = ValueError(err)
+            logger.exception(err, exc_info=exc)
+            raise exc
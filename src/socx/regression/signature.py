@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import re
+import functools
+
+from .test import Test
+
+
+__all__ = ("normalize", "signature")
+
+
+_ERROR_LINE = re.compile(r"\b(?:error|fatal|exception)\b", re.IGNORECASE)
+
+_VOLATILE: tuple[tuple[re.Pattern, str], ...] = (
+    (re.compile(r"\b\d{1,2}:\d{2}:\d{2}(?:\.\d+)?\b"), "<time>"),
+    (re.compile(r"\b(seed\s*[=:]?\s*)\d+", re.IGNORECASE), r"\1<seed>"),
+    (re.compile(r"(?:[\w.-]*/)+[\w.-]+"), "<path>"),
+    (re.compile(r"\b0x[0-9a-fA-F]+\b"), "<hex>"),
+    (
+        re.compile(r"\b(?=[a-fA-F]*\d)(?=\d*[a-fA-F])[0-9a-fA-F]{8,}\b"),
+        "<hex>",
+    ),
+    (re.compile(r"\b\d*'[bodhBODH][0-9a-fA-F_xzXZ]+"), "<lit>"),
+    (re.compile(r"\d+(?:\.\d+)?"), "<n>"),
+    (re.compile(r"\s+"), " "),
+)
+
+
+@functools.lru_cache(maxsize=1 << 16)
+def normalize(text: str) -> str:
+    """
+    Normalize an error message into a signature shared by its occurrences.
+
+    Times, seeds, paths, numbers and other values which vary between
+    occurrences of the same error are replaced by placeholders.
+    """
+    for pattern, placeholder in _VOLATILE:
+        text = pattern.sub(placeholder, text)
+    return text.strip()
+
+
+def signature(test: Test) -> str:
+    """
+    Get the error signature of a failed test.
+
+    The first error parsed from the test's log is used if any, then the
+    first error line of its standard error, and lastly its exit code.
+    """
+    if test.errors:
+        return normalize(test.errors[0])
+    for line in test.stderr_tail.splitlines():
+        if _ERROR_LINE.search(line):
+            return normalize(line)
+    return f"exit code {test.returncode}"
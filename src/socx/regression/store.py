@@ -0,0 +1,307 @@
+from __future__ import annotations
+
+import time
+import queue
+import sqlite3
+import asyncio as aio
+import threading
+from pathlib import Path
+from concurrent.futures import Future
+
+from dynaconf.utils.boxing import DynaBox
+
+from .test import Test
+from .test import TestBase
+from ..log import logger
+from .._config import PACKAGE_PATH
+
+
+__all__ = ("ResultsStore",)
+
+
+SQL_DIR: Path = Path(PACKAGE_PATH) / "static" / "sql"
+"""Directory of the results store's schema and migrations."""
+
+
+class ResultsStore:
+    """
+    SQLite store of regression and test results.
+
+    The database is created from the shipped `socx.sql` schema, migrated with
+    the scripts under `static/sql/migrations` and opened in WAL mode.
+
+    All writes are performed by a background writer thread which batches
+    queued statements into transactions, so recording a result never blocks
+    the event loop on disk. When a batch fails, its statements are retried
+    one by one so that a single bad row only loses itself.
+
+    Recording results never raises: if the writer fails, the error is logged
+    once and the store is disabled for the rest of the run.
+
+    Members
+    -------
+    path: Path
+        Path of the database file.
+
+    batch_size: int
+        Maximal number of statements committed in a single transaction.
+
+    flush_interval: float
+        Maximal number of seconds a queued statement waits to be committed.
+
+    disabled: bool
+        True once the store failed and results are no longer recorded.
+    """
+
+    _STOP = object()
+
+    def __init__(
+        self,
+        path: str | Path,
+        batch_size: int = 256,
+        flush_interval: float = 1.0,
+    ) -> None:
+        self.path = Path(path)
+        self.batch_size = int(batch_size)
+        self.flush_interval = float(flush_interval)
+        self.disabled = False
+        self._queue: queue.Queue = queue.Queue()
+        self._writer: threading.Thread | None = None
+
+    @classmethod
+    def from_settings(cls, cfg: DynaBox) -> ResultsStore | None:
+        """Create a results store from settings, None if it is disabled."""
+        if not cfg.enabled:
+            return None
+        return cls(cfg.path, cfg.batch_size, cfg.flush_interval)
+
+    @property
+    def is_open(self) -> bool:
+        """True if the background writer is running."""
+        return self._writer is not None and self._writer.is_alive()
+
+    async def open(self) -> None:
+        """Create or migrate the database and start the background writer."""
+        if self.is_open:
+            return
+        ready: Future = Future()
+        self._writer = threading.Thread(
+            target=self._write_loop,
+            args=(ready,),
+            name=f"ResultsStore({self.path.name})",
+            daemon=True,
+        )
+        self._writer.start()
+        await aio.wrap_future(ready)
+
+    async def close(self) -> None:
+        """Commit all queued statements and stop the background writer."""
+        if not self.is_open:
+            return
+        self._queue.put(self._STOP)
+        await aio.to_thread(self._writer.join)
+        self._writer = None
+
+    async def begin_regression(self, regression: TestBase) -> int:
+        """Record the start of a regression and get its row id."""
+        now = time.time()
+        return await self._execute(
+            "INSERT INTO Regression"
+            " (r_date, r_time, r_status, r_result, r_name, r_started)"
+            " VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                time.strftime("%Y-%m-%d", time.localtime(now)),
+                time.strftime("%H:%M:%S", time.localtime(now)),
+                regression.status.name,
+                regression.result.name,
+                regression.name,
+                now,
+            ),
+        )
+
+    def finish_regression(self, rid: int, regression: TestBase) -> None:
+        """Queue an update of a regression's final status and result."""
+        self._record(
+            "UPDATE Regression SET r_status = ?, r_result = ?, r_finished = ?"
+            " WHERE r_id = ?",
+            (regression.status.name, regression.result.name, time.time(), rid),
+        )
+
+    def record(self, rid: int | None, test: Test) -> None:
+        """Queue the results of a finished test."""
+        finished = test._finished_time or time.time()
+        try:
+            flow = test.flow
+        except AttributeError:
+            flow = ""
+        stats = test.resources
+        self._record(
+            "INSERT INTO Test"
+            " (r_id, t_date, t_time, t_seed, t_status, t_result, t_command,"
+            "  t_name, t_flow, t_build, t_started, t_finished, t_duration,"
+            "  t_exit_code, t_peak_rss, t_cpu_time, t_cpu_utilization,"
+            "  t_read_bytes, t_write_bytes, t_children)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?,"
+            "         ?, ?, ?, ?, ?, ?)",
+            (
+                rid,
+                time.strftime("%Y-%m-%d", time.localtime(finished)),
+                time.strftime("%H:%M:%S", time.localtime(finished)),
+                test.seed,
+                test.status.name,
+                test.result.name,
+                test.command.line,
+                test.name,
+                flow,
+                test.build,
+                test._started_time,
+                test._finished_time,
+                test.duration,
+                test.returncode,
+                stats.peak_rss if stats else None,
+                stats.cpu_time if stats else None,
+                stats.cpu_utilization if stats else None,
+                stats.read_bytes if stats else None,
+                stats.write_bytes if stats else None,
+                stats.children if stats else None,
+            ),
+        )
+
+    def query(self, sql: str, params: tuple = ()) -> list[sqlite3.Row]:
+        """Run a read-only query on a dedicated connection."""
+        uri = f"{self.path.resolve().as_uri()}?mode=ro"
+        with sqlite3.connect(uri, uri=True) as conn:
+            conn.row_factory = sqlite3.Row
+            return conn.execute(sql, params).fetchall()
+
+    def test_history(self, name: str, limit: int = 100) -> list[sqlite3.Row]:
+        """Get the most recent results of a test by its name."""
+        return self.query(
+            "SELECT * FROM Test WHERE t_name = ? ORDER BY t_id DESC LIMIT ?",
+            (name, limit),
+        )
+
+    def _record(self, sql: str, params: tuple) -> None:
+        if self.disabled:
+            return
+        try:
+            self._submit(sql, params)
+        except Exception:
+            self.disabled = True
+            logger.exception(
+                f"results store {self.path} failed, results of the rest of"
+                " the run are not stored."
+            )
+
+    def _submit(self, sql: str, params: tuple, future: Future | None = None):
+        if not self.is_open:
+            err = "Cannot write to a results store which is not open."
+            exc = RuntimeError(err)
+            logger.exception(err, exc_info=exc)
+            raise exc
+        self._queue.put((sql, params, future))
+
+    async def _execute(self, sql: str, params: tuple) -> int:
+        future: Future = Future()
+        self._submit(sql, params, future)
+        return await aio.wrap_future(future)
+
+    def _connect(self) -> sqlite3.Connection:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.path, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA foreign_keys=ON")
+        self._migrate(conn)
+        return conn
+
+    def _migrate(self, conn: sqlite3.Connection) -> None:
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        scripts = [(1, SQL_DIR / "socx.sql")]
+        scripts.extend(
+            (int(path.name.partition("_")[0]), path)
+            for path in sorted((SQL_DIR / "migrations").glob("*.sql"))
+        )
+        for number, path in scripts:
+            if number <= version:
+                continue
+            logger.info(f"migrating results store {self.path} to v{number}")
+            script = path.read_text(encoding="utf-8")
+            conn.executescript(
+                f"BEGIN;\n{script}\nPRAGMA user_version = {number};\nCOMMIT;"
+            )
+
+    def _write_loop(self, ready: Future) -> None:
+        try:
+            conn = self._connect()
+        except Exception as exc:
+            logger.exception(f"failed to open results store {self.path}")
+            ready.set_exception(exc)
+            return
+        ready.set_result(None)
+        try:
+            stop = False
+            while not stop:
+                batch = [self._queue.get()]
+                deadline = time.monotonic() + self.flush_interval
+                while len(batch) < self.batch_size:
+                    timeout = deadline - time.monotonic()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(self._queue.get(timeout=timeout))
+                    except queue.Empty:
+                        break
+                if self._STOP in batch:
+                    stop = True
+                    batch = [op for op in batch if op is not self._STOP]
+                    while not self._queue.empty():
+                        batch.append(self._queue.get_nowait())
+                self._commit(conn, batch)
+        except Exception:
+            logger.exception(f"results store {self.path} writer failed.")
+        finally:
+            conn.close()
+
+    def _commit(self, conn: sqlite3.Connection, batch: list) -> None:
+        if not batch:
+            return
+        results = []
+        try:
+            conn.execute("BEGIN")
+            for sql, params, future in batch:
+                cursor = conn.execute(sql, params)
+                results.append((future, cursor.lastrowid))
+            conn.execute("COMMIT")
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            if len(batch) == 1:
+                self._commit_one(conn, *batch[0])
+                return
+            logger.warning(
+                f"failed to commit {len(batch)} results, retrying one by one."
+            )
+            for op in batch:
+                self._commit_one(conn, *op)
+            return
+        for future, rowid in results:
+            if future is not None:
+                future.set_result(rowid)
+
+    @staticmethod
+    def _commit_one(
+        conn: sqlite3.Connection,
+        sql: str,
+        params: tuple,
+        future: Future | None,
+    ) -> None:
+        try:
+            rowid = conn.execute(sql, params).lastrowid
+        except Exception as exc:
+            logger.exception(f"failed to store result: {params}")
+            if future is not None:
+                future.set_exception(exc)
+            return
+        if future is not None:
+            future.set_result(rowid)
@@ -1,17 +1,21 @@
 from __future__ import annotations
 
+import sys
 import time
 import abc
 import shlex
+import signal
+import contextlib
 import asyncio as aio
 import psutil as ps
 from pathlib import Path
-from subprocess import PIPE
 from enum import auto
 from enum import IntEnum
 from typing import TextIO
 from typing import override
-from dataclasses import field
+from types import MappingProxyType
+from collections.abc import Mapping
+from collections.abc import Callable
 from dataclasses import dataclass
 
 from ..log import logger
@@ -19,16 +23,42 @@ from ..config import settings
 from ..mixins import UIDMixin
 from ..visitor import Node
 from ..visitor import Visitor
+from .process import ProcessHandle
+from .capture import OutputCapture
+from .executor import Executor
+from .executor import LocalExecutor
+from .events import EventBus
+from .events import EventKind
+from .scanner import ScanPool
+from .scanner import ScanCache
+from .scanner import LogScanner
+from .scanner import ScanResult
+from .monitor import LogMonitor
+from .watchdog import Watchdog
+from .resources import ResourceStats
+from .resources import ResourceSampler
+
+
+type StatusListener = Callable[[TestBase, TestStatus, TestResult], None]
+"""Called with a test, its previous status and result on every transition."""
+
+
+class TestCommand:
+    """
+    Representation of a 'run test' command-line as an object.
 
-# TODO: Patch - socrun should be modified to return non-zero value on
-# test failure in the future
-from socx_patches import post_process_sim_log as pp_simlog
+    The command line is parsed once into its arguments and options, and all
+    of its tokens are interned, so that the many commands of a large test list
+    share a single copy of recurring tokens (e.g. 'socrun', '--flow', 'sim').
 
+    Options are also accessible as attributes, i.e. `command.seed` is the value
+    following '--seed' (or '-seed') in the command line.
 
-@dataclass
-class TestCommand(UIDMixin):
-    """
-    Representation of a 'run test' command-line as an object.
+    Commands are equal if their canonical forms are equal, that is, the same
+    program, the same positional arguments in the same order, and the same
+    flags with the same values regardless of the order different flags are
+    given in. Valueless flags (e.g. '--gui') and every occurrence of a
+    repeated flag, in order, are part of the canonical form.
 
     Members
     -------
@@ -38,43 +68,80 @@ class TestCommand(UIDMixin):
     name: str
         Name of the command represented by this object, i.e. sys.argv[0].
 
-    args: list[str]
+    args: tuple[str, ...]
         Arguments of the command represented by this object split by
         whitespace.
+
+    options: Mapping[str, str]
+        Value of each option of the command by its name without dashes, the
+        first occurrence of an option wins. Flags followed by another flag
+        or by nothing have no value and are not options.
+
+    escaped: str
+        Shell escaped command line.
     """
 
-    line: str
-    name: str = field(init=False)
-    args: tuple[str] = field(init=False)
-    escaped: str = field(init=False)
-
-    def __post_init__(self) -> None:
-        self.line = self.line.strip()
-        self.args = tuple(arg.strip() for arg in self.line.split())
-        self.name = self.args[0] if self.args else ""
-        self.escaped = shlex.quote(self.line)
-
-    def extract_argv(self, arg: str) -> str:
-        for i, attr in enumerate(self.args):
-            if attr.startswith("--") or attr.startswith("-"):
-                if attr == arg and i + 1 < len(self.args):
-                    return self.args[i + 1]
-                if attr.removeprefix("-") == arg and i + 1 < len(self.args):
-                    return self.args[i + 1]
-                if attr.removeprefix("--") == arg and i + 1 < len(self.args):
-                    return self.args[i + 1]
-        return None
+    __slots__ = ("_escaped", "_hash", "_key", "args", "line", "options")
+
+    def __init__(self, line: str) -> None:
+        self.line = line.strip()
+        self.args = tuple(sys.intern(arg) for arg in self.line.split())
+        args = self.args
+        options: dict[str, str] = {}
+        flags: list[tuple[str, str | None]] = []
+        positional: list[str] = []
+        for i in range(1, len(args)):
+            arg = args[i]
+            if arg.startswith("-"):
+                name = sys.intern(arg[2:] if arg.startswith("--") else arg[1:])
+                value = args[i + 1] if i + 1 < len(args) else None
+                if value is not None and value.startswith("-"):
+                    value = None
+                if value is not None:
+                    options.setdefault(name, value)
+                flags.append((name, value))
+            elif not args[i - 1].startswith("-"):
+                positional.append(arg)
+        # A stable sort keeps repeated flags in the order they were given.
+        flags.sort(key=lambda flag: flag[0])
+        self.options: Mapping[str, str] = MappingProxyType(options)
+        self._escaped: str | None = None
+        self._key = (self.name, tuple(positional), tuple(flags))
+        self._hash = hash(self._key)
+
+    @property
+    def name(self) -> str:
+        """Name of the command, i.e. sys.argv[0]."""
+        return self.args[0] if self.args else ""
+
+    @property
+    def escaped(self) -> str:
+        """Shell escaped command line."""
+        if self._escaped is None:
+            self._escaped = shlex.quote(self.line)
+        return self._escaped
+
+    def extract_argv(self, arg: str) -> str | None:
+        """Get the value of an option by its name with or without dashes."""
+        return self.options.get(arg.lstrip("-"))
 
     def __getattr__(self, attr: str) -> str:
-        rv = self.extract_argv(attr)
-        if rv is not None:
-            return rv
-        else:
+        try:
+            return self.options[attr]
+        except KeyError:
             err = f"No such argument: {attr}"
-            raise AttributeError(err)
+            raise AttributeError(err) from None
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, TestCommand):
+            return NotImplemented
+        return self._hash == other._hash and self._key == other._key
 
     def __hash__(self) -> int:
-        return hash(tuple(set(self.args)))
+        return self._hash
+
+    def __repr__(self) -> str:
+        return f"TestCommand({self.line!r})"
 
 
 @dataclass(init=False)
@@ -96,6 +163,7 @@ class TestBase:
             command = TestCommand(command)
         self._name = "BASE"
         self._proc = None
+        self._listener: StatusListener | None = None
         self._status = TestStatus.Idle
         self._result = TestResult.NA
         self._command = command
@@ -125,11 +193,23 @@ class TestBase:
         """Status of a test."""
         return self._status
 
+    @status.setter
+    def status(self, value: TestStatus) -> None:
+        old, self._status = self._status, value
+        if old is not value and self._listener is not None:
+            self._listener(self, old, self._result)
+
     @property
     def result(self):
         """Result of a finished test."""
         return self._result
 
+    @result.setter
+    def result(self, value: TestResult) -> None:
+        old, self._result = self._result, value
+        if old is not value and self._listener is not None:
+            self._listener(self, self._status, old)
+
     @property
     def started_time(self) -> time.time:
         """Time measured at the begining of a test."""
@@ -140,6 +220,13 @@ class TestBase:
         """Time measured at the end of a test."""
         return time.ctime(self._finished_time)
 
+    @property
+    def duration(self) -> float | None:
+        """Wall time in seconds between the start and the end of a test."""
+        if self._started_time is None or self._finished_time is None:
+            return None
+        return self._finished_time - self._started_time
+
     @abc.abstractmethod
     async def start(self) -> None:
         """Start the execution of an idle test."""
@@ -193,6 +280,18 @@ class Test(TestBase, UIDMixin):
         self._proc = None
         self._flow = None
         self._build = None
+        self._stdout = None
+        self._stderr = None
+        self.errors: tuple[str, ...] = ()
+        self.reason: str | None = None
+        self.executor: Executor | None = None
+        self.events: EventBus | None = None
+        self.scan_pool: ScanPool | None = None
+        self.monitor: LogMonitor | None = None
+        self.watchdog: Watchdog | None = None
+        self.sampler: ResourceSampler | None = None
+        self.resources: ResourceStats | None = None
+        self._exit_status = TestStatus.Finished
 
     @property
     def flow(self):
@@ -207,19 +306,12 @@ class Test(TestBase, UIDMixin):
     @property
     def build(self):
         """Randomization build of a test's RNG."""
-        try:
-            return str(self.command.build)
-        except AttributeError:
-            return ""
+        return self.command.options.get("build", "")
 
     @property
     def seed(self):
         """Randomization seed of a test's RNG."""
-        try:
-            rv = int(self.command.seed)
-        except AttributeError:
-            rv = 0
-        return rv
+        return int(self.command.options.get("seed", 0))
 
     @property
     def idle(self) -> bool:
@@ -234,26 +326,22 @@ class Test(TestBase, UIDMixin):
     @property
     def started(self) -> bool:
         """True if test was started via a prior call to method `start`."""
-        return self._proc is not None and self.status is TestStatus.Running
+        return self.status not in (TestStatus.Idle, TestStatus.Pending)
 
     @property
     def suspended(self) -> bool:
-        """True if test was started via a prior call to method `start`."""
-        return self.started and self.process.status() == ps.STATUS_STOPPED
+        """True if test was started and is currently suspended."""
+        return self.status is TestStatus.Stopped
 
     @property
     def running(self) -> bool:
         """True if test is currently running in a dedicated process."""
-        return self.started and self.returncode is None and not self.suspended
+        return self.status is TestStatus.Running
 
     @property
     def finished(self) -> bool:
         """True if test finished running without normally interruption."""
-        return (
-            self.started
-            and self.returncode is not None
-            and self.status is TestStatus.Finished
-        )
+        return self.status is TestStatus.Finished
 
     @property
     def terminated(self) -> bool:
@@ -280,26 +368,42 @@ class Test(TestBase, UIDMixin):
     @property
     def stdout(self) -> TextIO | None:
         """The standard output of the test's process or None if not running."""
-        if self.finished:
-            return self._stdout
+        if self.finished and self._stdout is not None:
+            return self._stdout.open()
         else:
             return None
 
     @property
     def stderr(self) -> TextIO | None:
         """The standard error of the test's process or None if not running."""
-        if self.finished:
-            return self._stderr
+        if self.finished and self._stderr is not None:
+            return self._stderr.open()
         else:
             return None
 
     @property
-    def process(self) -> ps.Process:
+    def stdout_tail(self) -> str:
+        """The last few kilobytes of the test's standard output."""
+        return self._stdout.tail if self._stdout is not None else ""
+
+    @property
+    def stderr_tail(self) -> str:
+        """The last few kilobytes of the test's standard error."""
+        return self._stderr.tail if self._stderr is not None else ""
+
+    @property
+    def output_size(self) -> int:
+        """Number of bytes the test printed to stdout and stderr so far."""
+        return sum(
+            capture.size
+            for capture in (self._stdout, self._stderr)
+            if capture is not None
+        )
+
+    @property
+    def process(self) -> ps.Process | None:
         """The active process of the running test or None if not running."""
-        if self._proc is None or not ps.pid_exists(self._proc.pid):
-            return None
-        else:
-            return ps.Process(self._proc.pid)
+        return self._proc.handle if self._proc is not None else None
 
     @property
     def returncode(self) -> int | None:
@@ -328,6 +432,11 @@ class Test(TestBase, UIDMixin):
         """Get the simulation's configured runtime path for ouput logs."""
         return self.runtime_path / self.runtime_cfg.logs.directory
 
+    @property
+    def capture_cfg(self):
+        """Get the output capture settings object."""
+        return self.runtime_cfg.capture
+
     @property
     def dirname(self):
         """The simulation's runtime directory name."""
@@ -342,26 +451,50 @@ class Test(TestBase, UIDMixin):
             logger.exception(msg, exc_info=exc, stack_info=True)
             raise exc
 
-        self._status = TestStatus.Pending
-        self._proc = await aio.create_subprocess_shell(
-            cmd=self.command.line, stdin=None, stdout=PIPE, stderr=PIPE
-        )
+        self.status = TestStatus.Pending
+        self._stdout, self._stderr = self._make_captures()
+        executor = self.executor or _local_executor
+        self._proc = await executor.spawn(self)
+        self._proc.add_exit_callback(self._on_exit)
         try:
-            stdout, stderr = await self._proc.communicate()
-            self._status = TestStatus.Running
+            self.status = TestStatus.Running
             self._started_time = time.time()
-            while self.returncode is None:
-                await aio.sleep(0)
-            self._finished_time = time.time()
-            self._stdout = stdout.decode()
-            self._stderr = stderr.decode()
-            await self._proc.wait()
-            self._status = TestStatus.Finished
-            self._result = self._parse_result()
+            if self.sampler is not None:
+                self.sampler.add(self)
+            watchers = [
+                aio.create_task(guard.run(self))
+                for guard in (self.monitor, self.watchdog)
+                if guard is not None
+            ]
+            try:
+                await aio.gather(
+                    *(
+                        capture.drain(pipe)
+                        for capture, pipe in (
+                            (self._stdout, self._proc.stdout),
+                            (self._stderr, self._proc.stderr),
+                        )
+                        if pipe is not None
+                    ),
+                    self._proc.wait(),
+                )
+            finally:
+                for watcher in watchers:
+                    watcher.cancel()
+                if self.sampler is not None:
+                    self.sampler.remove(self)
+            if self._proc.stdout is None:
+                self._collect_captures()
+            if self.reason is None:
+                limit = self._proc.suspect(self.stderr_tail)
+                if limit is not None:
+                    logger.warning(f"{self.name} likely exceeded its {limit}.")
+                    self.reason = f"likely exceeded {limit}"
+            self.result = await self._parse_result()
         except Exception:
             self.terminate()
-            self._status = TestStatus.Terminated
-            self._result = TestResult.Failed
+            self.status = TestStatus.Terminated
+            self.result = TestResult.Failed
             logger.exception(
                 f"""Test failed: an exception was raised during execution \
                 of '{self.name}'""".strip(),
@@ -373,25 +506,70 @@ class Test(TestBase, UIDMixin):
     def suspend(self) -> None:
         """Send a SIGSTOP signal to suspend the test's running process."""
         if self.running:
-            self.process.suspend()
+            self._proc.suspend()
+            self.status = TestStatus.Stopped
 
     @override
     def resume(self) -> None:
         """Resume the process if it is paused (sends a SIGCONT signal)."""
         if self.suspended:
-            self.process.resume()
+            self._proc.resume()
+            self.status = TestStatus.Running
 
     @override
     def wait(self, timeout: float | None = None) -> None:
-        """Wait for a test to terminate if it is running."""
-        if self.running:
-            self.process.wait()
+        """
+        Wait for a test to terminate if it is running.
+
+        Raises
+        ------
+        TimeoutError
+            If the test is still running after `timeout` seconds.
+        """
+        if self.running and (process := self.process) is not None:
+            try:
+                process.wait(timeout)
+            except ps.TimeoutExpired as exc:
+                err = f"{self.name} still running after {timeout} seconds."
+                raise TimeoutError(err) from exc
+
+    async def stop(self, reason: str, grace: float = 30.0) -> None:
+        """
+        Stop a running test for a reason, e.g. a timeout.
+
+        The test's process is sent SIGINT, then SIGTERM and lastly SIGKILL
+        while it is still running `grace` seconds after each signal. Signals
+        are sent to the entire process tree of local tests, as simulators
+        are usually started by a shell. The test is recorded as terminated
+        and failed, with the reason.
+        """
+        if not (self.running or self.suspended):
+            return
+        logger.warning(f"stopping {self.name}: {reason}")
+        self.reason = reason
+        self._exit_status = TestStatus.Terminated
+        for sig in (signal.SIGINT, signal.SIGTERM, signal.SIGKILL):
+            self._signal_tree(sig)
+            if self.suspended:
+                self._signal_tree(signal.SIGCONT)
+            try:
+                await aio.wait_for(self._proc.wait(), grace)
+            except TimeoutError:
+                continue
+            return
+        logger.error(f"{self.name}: process still running after SIGKILL.")
+
+    @override
+    def interrupt(self) -> None:
+        """Interrupt the process with SIGINT."""
+        if self.running or self.suspended:
+            self._proc.interrupt()
 
     @override
     def terminate(self) -> None:
         """Terminate the process with SIGTERM."""
-        if self.running:
-            self.process.terminate()
+        if self.running or self.suspended:
+            self._proc.terminate()
 
     @override
     def kill(self) -> None:
@@ -402,19 +580,78 @@ class Test(TestBase, UIDMixin):
 
         Kill should only ever be used when you NEED the process gone ASAP.
         """
-        if self.running:
-            self.process.kill()
-
-    def _parse_result(self) -> TestResult:
+        if self.running or self.suspended:
+            self._proc.kill()
+
+    def _on_exit(self, proc: ProcessHandle) -> None:
+        self._finished_time = time.time()
+        if proc.breach is not None:
+            logger.warning(f"{self.name} exceeded its {proc.breach}.")
+            self.reason = f"exceeded {proc.breach}"
+            self._exit_status = TestStatus.Terminated
+        if self.status in (TestStatus.Running, TestStatus.Stopped):
+            self.status = self._exit_status
+
+    def _signal_tree(self, sig: int) -> None:
+        handle = self.process
+        try:
+            children = handle.children(recursive=True) if handle else []
+        except ps.Error:
+            children = []
+        self._proc.send_signal(sig)
+        for child in children:
+            with contextlib.suppress(ps.Error):
+                child.send_signal(sig)
+
+    def _make_captures(self) -> tuple[OutputCapture, OutputCapture]:
+        cfg = self.capture_cfg
+        if cfg.mode == "memory":
+            captures = OutputCapture(), OutputCapture()
+        else:
+            captures = (
+                OutputCapture(
+                    self.runtime_logs / cfg.stdout,
+                    cfg.chunk_size,
+                    cfg.tail_size,
+                ),
+                OutputCapture(
+                    self.runtime_logs / cfg.stderr,
+                    cfg.chunk_size,
+                    cfg.tail_size,
+                ),
+            )
+        if self.events is not None and self.events.output:
+            for capture, stream in zip(
+                captures, ("stdout", "stderr"), strict=True
+            ):
+                capture.listener = self._output_listener(stream)
+        return captures
+
+    def _output_listener(self, stream: str) -> Callable[[int], None]:
+        def listener(size: int) -> None:
+            self.events.emit(EventKind.Output, self, stream=stream, size=size)
+
+        return listener
+
+    def _collect_captures(self) -> None:
+        workdir = getattr(self._proc, "rc_path", None)
+        for capture, suffix in ((self._stdout, "out"), (self._stderr, "err")):
+            if capture.path is not None:
+                capture.collect(capture.path)
+            elif workdir is not None:
+                capture.collect(workdir.with_suffix(f".{suffix}"))
+
+    async def _parse_result(self) -> TestResult:
         logger.debug(f"parsing result from {self.runtime_path}")
-        result_hack = pp_simlog.TestResults()
-        result_hack.reset_log(self.runtime_logs / "run.log")
+        scan_pool = self.scan_pool or _get_scan_pool()
         try:
-            result_hack.parse_log()
+            scan = await scan_pool.scan(self.runtime_logs / "run.log")
         except ValueError:
             return TestResult.Failed
-        else:
-            return TestResult.from_temporary_hack(result_hack)
+        self.errors = tuple(scan.errors) or self.errors
+        if self.reason is not None:
+            return TestResult.Failed
+        return TestResult.from_scan(scan)
 
     def __hash__(self) -> int:
         return hash(self.command)
@@ -427,6 +664,24 @@ class Test(TestBase, UIDMixin):
         raise exc
 
 
+_local_executor: Executor = LocalExecutor()
+_scan_pool: ScanPool | None = None
+
+
+def _get_scan_pool() -> ScanPool:
+    # Tests started on their own scan in a thread rather than starting a
+    # pool of processes which would outlive them.
+    global _scan_pool
+    if _scan_pool is None:
+        cfg = settings.regression.scanner
+        _scan_pool = ScanPool(
+            LogScanner.from_settings(cfg),
+            processes=0,
+            cache=ScanCache.from_settings(cfg.cache),
+        )
+    return _scan_pool
+
+
 class TestResult(IntEnum):
     """
     Represents the result of a test that had finished and exited normally.
@@ -451,8 +706,8 @@ class TestResult(IntEnum):
     Failed = auto()
 
     @classmethod
-    def from_temporary_hack(cls, hack: pp_simlog.TestResults) -> TestResult:
-        match hack.result:
+    def from_scan(cls, scan: ScanResult) -> TestResult:
+        match scan.result:
             case "NA":
                 return TestResult.NA
             case "PASS":
@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import time
+import asyncio as aio
+from typing import TYPE_CHECKING
+
+from dynaconf.utils.boxing import DynaBox
+
+from ..log import logger
+
+if TYPE_CHECKING:
+    from .test import Test
+    from .history import RuntimeHistory
+
+
+__all__ = ("Watchdog",)
+
+
+class Watchdog:
+    """
+    Stops tests which run for too long or stopped making progress.
+
+    A test times out after a fixed `timeout`, or else after `factor` times
+    the `percentile` of its durations in earlier runs, provided at least
+    `min_samples` durations were recorded, and never before `min_timeout`.
+    Tests never seen before have no timeout unless a fixed one is set.
+
+    A test hangs when neither its standard output and error nor its run.log
+    grew during the last `inactivity` seconds.
+
+    Either way the test is stopped with `Test.stop`, which escalates from
+    SIGINT to SIGTERM and SIGKILL every `grace` seconds.
+
+    Members
+    -------
+    timeout: float
+        Fixed timeout of every test in seconds, 0 to derive it from history.
+
+    factor: float
+        Multiple of the percentile of past durations a test may run for.
+
+    percentile: float
+        Percentile of past durations, between 0 and 1.
+
+    min_samples: int
+        Minimal number of past durations to derive a timeout from.
+
+    min_timeout: float
+        Minimal derived timeout in seconds.
+
+    inactivity: float
+        Seconds without output after which a test hangs, 0 to disable.
+
+    interval: float
+        Seconds between two checks of a test.
+
+    grace: float
+        Seconds between two escalating signals.
+    """
+
+    def __init__(
+        self,
+        timeout: float = 0.0,
+        factor: float = 3.0,
+        percentile: float = 0.95,
+        min_samples: int = 3,
+        min_timeout: float = 300.0,
+        inactivity: float = 0.0,
+        interval: float = 10.0,
+        grace: float = 30.0,
+        history: RuntimeHistory | None = None,
+    ) -> None:
+        self.timeout = float(timeout)
+        self.factor = float(factor)
+        self.percentile = float(percentile)
+        self.min_samples = int(min_samples)
+        self.min_timeout = float(min_timeout)
+        self.inactivity = float(inactivity)
+        self.interval = float(interval)
+        self.grace = float(grace)
+        self.history = history
+
+    @classmethod
+    def from_settings(
+        cls, cfg: DynaBox, history: RuntimeHistory | None = None
+    ) -> Watchdog | None:
+        """Create a watchdog from settings, None if it is disabled."""
+        if not cfg.enabled:
+            return None
+        return cls(
+            timeout=cfg.timeout,
+            factor=cfg.factor,
+            percentile=cfg.percentile,
+            min_samples=cfg.min_samples,
+            min_timeout=cfg.min_timeout,
+            inactivity=cfg.inactivity,
+            interval=cfg.interval,
+            grace=cfg.grace,
+            history=history,
+        )
+
+    def deadline(self, test: Test) -> float | None:
+        """Get the timeout of a test in seconds, None if it has none."""
+        if self.timeout > 0:
+            return self.timeout
+        if self.history is None:
+            return None
+        if len(self.history.durations(test)) < self.min_samples:
+            return None
+        quantile = self.history.quantile(test, self.percentile)
+        return max(self.min_timeout, quantile * self.factor)
+
+    async def run(self, test: Test) -> None:
+        """Watch a running test until it exits or has to be stopped."""
+        try:
+            reason = await self.watch(test)
+        except aio.CancelledError:
+            raise
+        except Exception:
+            logger.exception(f"watchdog of {test.name} failed.")
+            return
+        await test.stop(reason, self.grace)
+
+    async def watch(self, test: Test) -> str:
+        """Wait until a test times out or hangs, and get the reason."""
+        deadline = self.deadline(test)
+        if deadline is None and self.inactivity <= 0:
+            await aio.get_running_loop().create_future()
+        started = time.monotonic()
+        progress = await aio.to_thread(self._progress, test)
+        progressed = started
+        while True:
+            await aio.sleep(self.interval)
+            now = time.monotonic()
+            if deadline is not None and now - started > deadline:
+                return f"timeout after {deadline:.0f} seconds"
+            if self.inactivity <= 0:
+                continue
+            latest = await aio.to_thread(self._progress, test)
+            if latest != progress:
+                progress, progressed = latest, now
+            elif now - progressed > self.inactivity:
+                return f"no output for {now - progressed:.0f} seconds"
+
+    @staticmethod
+    def _progress(test: Test) -> int:
+        try:
+            size = (test.runtime_logs / "run.log").stat().st_size
+        except OSError:
+            size = 0
+        return test.output_size + size
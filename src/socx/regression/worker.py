@@ -0,0 +1,370 @@
+from __future__ import annotations
+
+import json
+import socket
+import asyncio as aio
+from typing import Any
+from typing import override
+from typing import TYPE_CHECKING
+from dataclasses import asdict
+
+import psutil as ps
+
+from .test import Test
+from .test import TestStatus
+from .test import TestResult
+from .process import ProcessHandle
+from .scanner import ScanPool
+from .monitor import LogMonitor
+from .history import RuntimeHistory
+from .watchdog import Watchdog
+from .resources import ResourceStats
+from .resources import ResourceSampler
+from .limits import ResourceLimits
+from .executor import LocalExecutor
+from ..log import logger
+from ..config import settings
+
+if TYPE_CHECKING:
+    from .regression import Regression
+
+
+__all__ = ("Coordinator", "Worker", "RemoteTask", "parse_address")
+
+
+ERRORS_SENT: int = 16
+"""Maximal number of parsed errors of a test sent back by a worker."""
+
+
+def parse_address(address: str) -> tuple[str, int]:
+    """Parse a 'host:port' address string."""
+    host, _, port = str(address).rpartition(":")
+    return host or "0.0.0.0", int(port)
+
+
+async def _send(writer: aio.StreamWriter, message: dict[str, Any]) -> None:
+    writer.write(json.dumps(message, separators=(",", ":")).encode() + b"\n")
+    await writer.drain()
+
+
+class RemoteTask(ProcessHandle):
+    """
+    Handle of a test running on a remote worker.
+
+    Signals are forwarded to the worker running the test, which delivers
+    them to the test's local process.
+    """
+
+    def __init__(self, writer: aio.StreamWriter, uid: int, host: str):
+        super().__init__()
+        self.host = host
+        self._uid = uid
+        self._writer = writer
+        self._signals: set[aio.Task] = set()
+
+    @property
+    @override
+    def pid(self) -> int | None:
+        return None
+
+    @override
+    def send_signal(self, sig: int) -> None:
+        if self.exited or self._writer.is_closing():
+            return
+        task = aio.ensure_future(
+            _send(self._writer, {"op": "signal", "id": self._uid, "sig": sig})
+        )
+        self._signals.add(task)
+        task.add_done_callback(self._signaled)
+
+    def _signaled(self, task: aio.Task) -> None:
+        self._signals.discard(task)
+        if not task.cancelled() and (exc := task.exception()) is not None:
+            logger.warning(f"failed to forward a signal to {self.host}: {exc}")
+
+
+class Coordinator:
+    """
+    Hands out the pending tests of a regression to remote workers.
+
+    Workers connect over TCP and pull tests whenever they have free slots,
+    so work is balanced across hosts of different sizes. Results streamed
+    back by workers are recorded exactly like those of local runners, and
+    tests in flight on a worker whose connection is lost are queued again.
+
+    The protocol is newline delimited JSON, see `Worker` for the other side.
+
+    Members
+    -------
+    regression: Regression
+        Regression whose pending queue is served.
+
+    host: str
+        Address the coordinator listens on.
+
+    port: int
+        Port the coordinator listens on, the bound port once serving if 0
+        was requested.
+
+    wait_delay: float
+        Seconds a worker is told to wait before asking again when no test is
+        pending.
+    """
+
+    def __init__(
+        self,
+        regression: Regression,
+        host: str,
+        port: int,
+        wait_delay: float = 1.0,
+    ) -> None:
+        self.regression = regression
+        self.host = host
+        self.port = int(port)
+        self.wait_delay = float(wait_delay)
+        self.serving = aio.Event()
+        self._writers: set[aio.StreamWriter] = set()
+
+    async def serve(self, done: aio.Event) -> None:
+        """Serve workers until `done` is set."""
+        server = await aio.start_server(self._handle, self.host, self.port)
+        self.port = server.sockets[0].getsockname()[1]
+        logger.info(f"coordinator listening on {self.host}:{self.port}")
+        self.serving.set()
+        try:
+            async with server:
+                await done.wait()
+                for writer in list(self._writers):
+                    await _send(writer, {"op": "done"})
+                    writer.close()
+        finally:
+            self.serving.clear()
+
+    async def _handle(self, reader, writer) -> None:
+        regression = self.regression
+        inflight: dict[int, tuple[Test, float | None]] = {}
+        host = "?"
+        self._writers.add(writer)
+        try:
+            while line := await reader.readline():
+                message = json.loads(line)
+                match message["op"]:
+                    case "hello":
+                        host = message["host"]
+                        logger.info(f"worker {host} joined.")
+                    case "request":
+                        tests = self._take(int(message["n"]))
+                        if not tests:
+                            wait = {"op": "wait", "delay": self.wait_delay}
+                            await _send(writer, wait)
+                            continue
+                        for test in tests:
+                            test._proc = RemoteTask(writer, test.uid, host)
+                            test.status = TestStatus.Running
+                            predicted = regression.history.predict(test)
+                            inflight[test.uid] = (test, predicted)
+                            await regression._test_started(test, host)
+                        await _send(
+                            writer,
+                            {
+                                "op": "run",
+                                "tests": [
+                                    {"id": t.uid, "line": t.command.line}
+                                    for t in tests
+                                ],
+                            },
+                        )
+                    case "result":
+                        test, predicted = inflight.pop(message["id"])
+                        try:
+                            self._apply(test, message)
+                            await regression._test_finished(
+                                test, predicted, host
+                            )
+                        finally:
+                            regression._test_settled(test)
+        except (ConnectionError, ValueError):
+            logger.exception(f"lost connection to worker {host}.")
+        finally:
+            self._writers.discard(writer)
+            writer.close()
+            for test, _ in inflight.values():
+                logger.warning(f"requeueing {test.name} from worker {host}.")
+                test._proc = None
+                test.status = TestStatus.Pending
+                regression.progress.running -= 1
+                await regression.pending.put(test)
+                regression.pending.task_done()
+
+    def _take(self, n: int) -> list[Test]:
+        tests = []
+        while len(tests) < n and not self.regression.pending.empty():
+            tests.append(self.regression.pending.get_nowait())
+        return tests
+
+    @staticmethod
+    def _apply(test: Test, message: dict[str, Any]) -> None:
+        test.status = TestStatus[message["status"]]
+        test.result = TestResult[message["result"]]
+        test._started_time = message["start"]
+        test._finished_time = message["end"]
+        test.errors = tuple(message.get("errors", ()))
+        test.reason = message.get("reason")
+        if resources := message.get("resources"):
+            test.resources = ResourceStats(**resources)
+        test._proc._set_exited(message["rc"])
+
+
+class Worker:
+    """
+    Agent which pulls tests from a coordinator and runs them locally.
+
+    The worker asks the coordinator for as many tests as it has free slots,
+    runs each one with the regular `Test` machinery and streams its result
+    back as soon as it finishes.
+
+    Members
+    -------
+    host: str
+        Address of the coordinator.
+
+    port: int
+        Port of the coordinator.
+
+    slots: int
+        Maximal number of tests run in parallel by this worker, defaults to
+        the number of logical CPUs.
+
+    completed: int
+        Number of tests completed by this worker.
+    """
+
+    def __init__(self, host: str, port: int, slots: int | None = None):
+        self.host = host
+        self.port = int(port)
+        self.slots = int(slots or ps.cpu_count() or 1)
+        self.completed = 0
+        self._tests: dict[int, Test] = {}
+        self._awaiting = False
+        self._cond = aio.Condition()
+        self._writer: aio.StreamWriter | None = None
+        self.scan_pool = ScanPool.from_settings(settings.regression.scanner)
+        self.monitor = LogMonitor.from_settings(
+            settings.regression.monitor, self.scan_pool.scanner
+        )
+        self.sampler = ResourceSampler.from_settings(
+            settings.regression.resources
+        )
+        self.executor = LocalExecutor(
+            ResourceLimits.from_settings(settings.regression.limits)
+        )
+        self.watchdog = Watchdog.from_settings(
+            settings.regression.watchdog,
+            RuntimeHistory(
+                settings.regression.history.path,
+                settings.regression.history.samples,
+            ),
+        )
+
+    @property
+    def free(self) -> int:
+        """Number of free slots."""
+        return self.slots - len(self._tests)
+
+    async def run(self) -> None:
+        """Pull and run tests until the coordinator is done."""
+        reader, self._writer = await aio.open_connection(self.host, self.port)
+        logger.info(f"connected to coordinator {self.host}:{self.port}")
+        await _send(
+            self._writer,
+            {"op": "hello", "host": socket.gethostname(), "slots": self.slots},
+        )
+        async with aio.TaskGroup() as tg:
+            requester = tg.create_task(self._request())
+            retries: set[aio.Task] = set()
+            try:
+                while line := await reader.readline():
+                    message = json.loads(line)
+                    match message["op"]:
+                        case "run":
+                            for item in message["tests"]:
+                                test = Test(item["line"])
+                                self._tests[item["id"]] = test
+                                tg.create_task(self._run(item["id"], test))
+                            await self._ready()
+                        case "wait":
+                            retry = tg.create_task(
+                                self._retry(message["delay"])
+                            )
+                            retries.add(retry)
+                            retry.add_done_callback(retries.discard)
+                        case "signal":
+                            test = self._tests.get(message["id"])
+                            if test is not None and test._proc is not None:
+                                test._proc.send_signal(message["sig"])
+                        case "done":
+                            break
+            finally:
+                requester.cancel()
+                for retry in retries:
+                    retry.cancel()
+                for test in self._tests.values():
+                    test.kill()
+                self._writer.close()
+                if self.sampler is not None:
+                    self.sampler.close()
+                self.scan_pool.close()
+                self.scan_pool.scanner.ignores.report()
+        logger.info(f"worker done, completed {self.completed} tests.")
+
+    async def _retry(self, delay: float) -> None:
+        await aio.sleep(delay)
+        await self._ready()
+
+    async def _ready(self) -> None:
+        async with self._cond:
+            self._awaiting = False
+            self._cond.notify_all()
+
+    async def _request(self) -> None:
+        while True:
+            async with self._cond:
+                await self._cond.wait_for(
+                    lambda: not self._awaiting and self.free > 0
+                )
+                self._awaiting = True
+            await _send(self._writer, {"op": "request", "n": self.free})
+
+    async def _run(self, uid: int, test: Test) -> None:
+        try:
+            test.scan_pool = self.scan_pool
+            test.monitor = self.monitor
+            test.watchdog = self.watchdog
+            test.executor = self.executor
+            test.sampler = self.sampler
+            await test.start()
+        except Exception:
+            logger.exception(f"worker failed to run {test.name}.")
+        finally:
+            self._tests.pop(uid, None)
+            self.completed += 1
+            if not self._writer.is_closing():
+                await _send(
+                    self._writer,
+                    {
+                        "op": "result",
+                        "id": uid,
+                        "status": test.status.name,
+                        "result": test.result.name,
+                        "rc": test.returncode,
+                        "start": test._started_time,
+                        "end": test._finished_time,
+                        "errors": test.errors[:ERRORS_SENT],
+                        "reason": test.reason,
+                        "resources": (
+                            asdict(test.resources) if test.resources else None
+                        ),
+                    },
+                )
+            async with self._cond:
+                self._cond.notify_all()
@@ -0,0 +1,17 @@
+ALTER TABLE Regression ADD COLUMN r_name TEXT;
+ALTER TABLE Regression ADD COLUMN r_started REAL;
+ALTER TABLE Regression ADD COLUMN r_finished REAL;
+
+ALTER TABLE Test ADD COLUMN t_name TEXT;
+ALTER TABLE Test ADD COLUMN t_flow TEXT;
+ALTER TABLE Test ADD COLUMN t_build TEXT;
+ALTER TABLE Test ADD COLUMN t_started REAL;
+ALTER TABLE Test ADD COLUMN t_finished REAL;
+ALTER TABLE Test ADD COLUMN t_duration REAL;
+ALTER TABLE Test ADD COLUMN t_exit_code INTEGER;
+
+CREATE INDEX IF NOT EXISTS idx_test_name ON Test(t_name);
+CREATE INDEX IF NOT EXISTS idx_test_result ON Test(t_result);
+CREATE INDEX IF NOT EXISTS idx_test_date ON Test(t_date);
+CREATE INDEX IF NOT EXISTS idx_test_regression ON Test(r_id);
+CREATE INDEX IF NOT EXISTS idx_regression_date ON Regression(r_date);
@@ -0,0 +1,6 @@
+ALTER TABLE Test ADD COLUMN t_peak_rss INTEGER;
+ALTER TABLE Test ADD COLUMN t_cpu_time REAL;
+ALTER TABLE Test ADD COLUMN t_cpu_utilization REAL;
+ALTER TABLE Test ADD COLUMN t_read_bytes INTEGER;
+ALTER TABLE Test ADD COLUMN t_write_bytes INTEGER;
+ALTER TABLE Test ADD COLUMN t_children INTEGER;
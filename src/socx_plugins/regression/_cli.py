@@ -7,6 +7,7 @@ from dynaconf.utils.boxing import DynaBox
 from socx import Regression
 from socx import settings
 from socx import get_logger
+from socx.regression.cluster import ErrorClusters
 
 
 logger = get_logger(__name__)
@@ -25,7 +26,7 @@ def _correct_path_in(input_path: str | Path | None = None) -> Path:
 
 def _correct_paths_out(
     output_path: str | Path | None = None,
-) -> tuple[Path, Path]:
+) -> tuple[Path, Path, Path]:
     now = time.strftime("%H-%M")
     today = time.strftime("%d-%m-%Y")
     if output_path is None:
@@ -33,17 +34,20 @@ def _correct_paths_out(
         dir_out: Path = Path(output_path.directory) / today
         fail_out: Path = Path(dir_out) / f"{now}_failed.log"
         pass_out: Path = Path(dir_out) / f"{now}_passed.log"
+        clusters_out: Path = Path(dir_out) / f"{now}_clusters.log"
     else:
         fail_out: Path = Path(output_path) / f"{now}_failed.log"
         pass_out: Path = Path(output_path) / f"{now}_passed.log"
+        clusters_out: Path = Path(output_path) / f"{now}_clusters.log"
     fail_out.parent.mkdir(parents=True, exist_ok=True)
     pass_out.parent.mkdir(parents=True, exist_ok=True)
-    return pass_out, fail_out
+    return pass_out, fail_out, clusters_out
 
 
 def _write_results(
     pass_out: str | Path,
     fail_out: str | Path,
+    clusters_out: str | Path,
     regression: Regression,
 ) -> None:
     with (
@@ -58,6 +62,11 @@ def _write_results(
                 ff.write(f"{test.command.line}\n")
         logger.info(f"passed commands were written to path: {pass_out}")
         logger.info(f"failed commands were written to path: {fail_out}")
+    clusters = ErrorClusters.from_tests(
+        regression, settings.regression.report.examples
+    )
+    if len(clusters):
+        clusters.write(clusters_out)
 
 
 def _populate_regression(filepath: Path) -> Regression:
@@ -66,16 +75,74 @@ def _populate_regression(filepath: Path) -> Regression:
         return Regression.from_lines("rgr", tuple(line for line in file))
 
 
+def _resume_regression(journal: str | Path) -> Regression:
+    logger.info(f"resuming regression from journal: {journal}")
+    return Regression.from_journal(Path(journal).resolve())
+
+
 async def _run_from_file(
     input: str | Path | None = None,  # noqa: A002
     output: str | Path | None = None,
+    resume: str | Path | None = None,
+    listen: str | None = None,
 ) -> None:
-    path_in = _correct_path_in(input)
-    regression = _populate_regression(path_in)
-    pass_out, fail_out = _correct_paths_out(output)
+    if listen is not None:
+        settings.set("regression.distributed.listen", listen)
+    if resume is not None:
+        regression = _resume_regression(resume)
+    else:
+        regression = _populate_regression(_correct_path_in(input))
+    pass_out, fail_out, clusters_out = _correct_paths_out(output)
     try:
         logger.info(f"starting regression: {regression}")
         await regression.start()
         logger.info(f"regression finished: {regression}")
     finally:
-        _write_results(pass_out, fail_out, regression)
+        _write_results(pass_out, fail_out, clusters_out, regression)
+
+
+async def _run_worker(connect: str, slots: int | None = None) -> None:
+    from socx.regression.worker import Worker
+    from socx.regression.worker import parse_address
+
+    host, port = parse_address(connect)
+    worker = Worker(host, port, slots or settings.regression.worker.slots)
+    logger.info(f"starting worker of {worker.slots} slots: {connect}")
+    await worker.run()
+
+
+def _show_history(
+    query: str,
+    days: int = 365,
+    flow: str | None = None,
+    name: str | None = None,
+    limit: int = 20,
+    directory: str | Path | None = None,
+) -> None:
+    from rich.table import Table
+
+    from socx import console
+    from socx.regression.export import ResultsHistory
+
+    history = ResultsHistory(directory or settings.regression.export.directory)
+    filters = {"days": days, "flow": flow, "name": name}
+    match query:
+        case "slowest":
+            table = history.slowest(limit, **filters)
+        case "failures":
+            table = history.failure_rates(**filters)
+        case _:
+            table = history.trend(**filters)
+    view = Table(title=f"{query} over the last {days} days")
+    for column in table.column_names:
+        numeric = column not in ("name", "flow", "date")
+        view.add_column(column, justify="right" if numeric else "left")
+    for row in table.to_pylist():
+        view.add_row(*(_format_cell(value) for value in row.values()))
+    console.print(view)
+
+
+def _format_cell(value) -> str:
+    if isinstance(value, float):
+        return f"{value:.2f}"
+    return "" if value is None else str(value)
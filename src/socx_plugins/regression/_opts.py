@@ -22,3 +22,44 @@ output_opt: click.Option = partial(
     required=False,
     help="Output directory for writing passed/failed run commands.",
 )
+
+resume_opt: click.Option = partial(
+    click.option,
+    "-r",
+    "--resume",
+    nargs=1,
+    metavar="JOURNAL",
+    required=False,
+    help="Resume an interrupted regression from its journal file.",
+)
+
+listen_opt: click.Option = partial(
+    click.option,
+    "-l",
+    "--listen",
+    nargs=1,
+    metavar="HOST:PORT",
+    required=False,
+    help="Accept worker agents on this address and hand them tests.",
+)
+
+connect_opt: click.Option = partial(
+    click.option,
+    "-c",
+    "--connect",
+    nargs=1,
+    metavar="HOST:PORT",
+    required=True,
+    help="Address of the regression coordinating the workers.",
+)
+
+slots_opt: click.Option = partial(
+    click.option,
+    "-s",
+    "--slots",
+    nargs=1,
+    type=int,
+    metavar="N",
+    required=False,
+    help="Number of tests run in parallel, defaults to the cpu count.",
+)
@@ -2,6 +2,10 @@ import rich_click as click
 
 from socx_plugins.regression._opts import input_opt
 from socx_plugins.regression._opts import output_opt
+from socx_plugins.regression._opts import resume_opt
+from socx_plugins.regression._opts import listen_opt
+from socx_plugins.regression._opts import connect_opt
+from socx_plugins.regression._opts import slots_opt
 
 
 @click.group("rgr")
@@ -12,13 +16,66 @@ def cli():
 @cli.command()
 @input_opt()
 @output_opt()
-def run(input, output):  # noqa: A002
+@resume_opt()
+@listen_opt()
+def run(input, output, resume, listen):  # noqa: A002
     """Run a regression from a file of 'socrun' commands."""
     import asyncio
     from socx_plugins.regression._cli import _run_from_file
 
     loop = asyncio.new_event_loop()
-    loop.run_until_complete(_run_from_file(input, output))
+    loop.run_until_complete(_run_from_file(input, output, resume, listen))
+
+
+@cli.command()
+@connect_opt()
+@slots_opt()
+def worker(connect, slots):
+    """Run tests handed out by a regression started with '--listen'."""
+    import asyncio
+    from socx_plugins.regression._cli import _run_worker
+
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(_run_worker(connect, slots))
+
+
+@cli.command()
+@click.argument(
+    "query",
+    type=click.Choice(["slowest", "failures", "trend"]),
+    default="slowest",
+)
+@click.option(
+    "-d",
+    "--days",
+    type=int,
+    default=365,
+    show_default=True,
+    help="Only include regressions of the last N days.",
+)
+@click.option("-f", "--flow", help="Only include tests of this flow.")
+@click.option("-n", "--name", help="Only include tests of this name.")
+@click.option(
+    "--limit",
+    type=int,
+    default=20,
+    show_default=True,
+    help="Number of slowest tests listed.",
+)
+@click.option(
+    "--directory",
+    metavar="DIRECTORY",
+    help="Directory of exported results, defaults to the configured one.",
+)
+def history(query, days, flow, name, limit, directory):
+    """Query the results exported by past regressions.
+
+    QUERY is one of 'slowest' (tests by mean duration), 'failures' (failure
+    rate per flow) or 'trend' (test durations per day).
+    """
+    from socx_plugins.regression._cli import _show_history
+
+    _show_history(query, days, flow, name, limit, directory)
 
 
 @cli.command()
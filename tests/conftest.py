@@ -0,0 +1,78 @@
+import pytest
+
+from socx import settings
+from socx.regression import Test as SimTest
+from socx.regression import TestStatus as SimStatus
+from socx.regression import TestResult as SimResult
+
+_MISSING = object()
+
+
+@pytest.fixture
+def configure():
+    """
+    Set settings for a test, restoring their previous values after it.
+
+    Settings which did not exist before the test are deleted.
+    """
+    saved = {}
+
+    def configure(key: str, value) -> None:
+        if key not in saved:
+            exists = settings.exists(key)
+            saved[key] = settings.get(key) if exists else _MISSING
+        settings.set(key, value)
+
+    yield configure
+    for key, value in reversed(saved.items()):
+        if value is not _MISSING:
+            settings.set(key, value)
+            continue
+        parent, _, leaf = key.rpartition(".")
+        if parent:
+            settings.get(parent).pop(leaf, None)
+        else:
+            settings.unset(key)
+
+
+@pytest.fixture
+def sandbox(tmp_path, monkeypatch, configure):
+    """
+    Confine the tests and regressions run by a test to its tmp_path.
+
+    The runtime directory and runtime history are moved to tmp_path, and
+    the results store, journal and event log are disabled. Yields
+    `configure` for any further settings.
+    """
+    monkeypatch.setenv("TOP_VERIF", str(tmp_path))
+    configure("regression.runtime.path", tmp_path / "runtime")
+    configure("regression.history.path", tmp_path / "history.json")
+    configure("regression.store.enabled", False)
+    configure("regression.journal.enabled", False)
+    configure("regression.events.jsonl.enabled", False)
+    return configure
+
+
+@pytest.fixture
+def finished():
+    """
+    Get a factory of tests which finished with a result without running,
+    e.g. to feed results to the history, store or reports.
+    """
+
+    def finished(
+        line: str,
+        result: SimResult = SimResult.Passed,
+        started: float = 0.0,
+        duration: float = 1.0,
+        errors: tuple[str, ...] = (),
+    ) -> SimTest:
+        test = SimTest(line)
+        test._status = SimStatus.Finished
+        test._result = result
+        test._started_time = started
+        test._finished_time = started + duration
+        test.errors = tuple(errors)
+        return test
+
+    return finished
@@ -0,0 +1,90 @@
+"""
+Fake local batch scheduler for testing the batch executor without a cluster.
+
+Usage
+-----
+fake_scheduler.py submit <count> <script>
+    Submit a job array of <count> tasks running <script>, print its job id.
+
+fake_scheduler.py status <jobs>
+    Print the ids of the comma separated <jobs> which are still running.
+
+fake_scheduler.py cancel <job> <index>
+    Kill a running task of a job array.
+
+State is kept in the directory given by the FAKE_SCHEDULER_DIR environment
+variable, and the index of a task is exported to it as FAKE_ARRAY_INDEX.
+
+When FAKE_SCHEDULER_PURGE is set, finished jobs are purged at once and the
+status of a purged job fails, as squeue does with "Invalid job id".
+"""
+
+import os
+import sys
+import signal
+import subprocess
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+
+STATE = Path(os.environ.get("FAKE_SCHEDULER_DIR", "/tmp/fake_scheduler"))
+
+
+def submit(count: int, script: str) -> None:
+    STATE.mkdir(parents=True, exist_ok=True)
+    job = str(len(list(STATE.glob("*.job"))) + 1000)
+    (STATE / f"{job}.job").write_text(f"{count} {script}\n")
+    (STATE / f"{job}.running").touch()
+    subprocess.Popen(
+        [sys.executable, __file__, "run", job, str(count), script],
+        start_new_session=True,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    print(job)
+
+
+def run(job: str, count: int, script: str) -> None:
+    def task(index: int) -> None:
+        env = dict(os.environ, FAKE_ARRAY_INDEX=str(index))
+        proc = subprocess.Popen(["sh", script], env=env)
+        (STATE / f"{job}.{index}.pid").write_text(str(proc.pid))
+        proc.wait()
+
+    try:
+        with ThreadPoolExecutor(max_workers=count) as pool:
+            list(pool.map(task, range(count)))
+    finally:
+        (STATE / f"{job}.running").unlink()
+
+
+def status(jobs: str) -> None:
+    running = [
+        job for job in jobs.split(",") if (STATE / f"{job}.running").exists()
+    ]
+    if os.environ.get("FAKE_SCHEDULER_PURGE") and len(running) < len(
+        jobs.split(",")
+    ):
+        sys.exit("error: Invalid job id specified")
+    for job in running:
+        print(f"{job} RUNNING")
+
+
+def cancel(job: str, index: str) -> None:
+    pid = STATE / f"{job}.{index}.pid"
+    if pid.exists():
+        os.kill(int(pid.read_text()), signal.SIGTERM)
+
+
+if __name__ == "__main__":
+    match sys.argv[1:]:
+        case ["submit", count, script]:
+            submit(int(count), script)
+        case ["run", job, count, script]:
+            run(job, int(count), script)
+        case ["status", jobs]:
+            status(jobs)
+        case ["cancel", job, index]:
+            cancel(job, index)
+        case _:
+            sys.exit(__doc__)
@@ -0,0 +1,19 @@
+import time
+import asyncio
+
+from socx.regression.admission import AdmissionController
+
+
+def test_busy_host():
+    # No host is ever under a negative load.
+    admission = AdmissionController(
+        enabled=True, max_load_per_cpu=-1.0, interval=0.01, settle=0.0
+    )
+    started = time.monotonic()
+    asyncio.run(admission.admit(idle=lambda: True))
+    assert time.monotonic() - started < 1.0
+
+    admission.max_wait = 0.2
+    started = time.monotonic()
+    asyncio.run(admission.admit(idle=lambda: False))
+    assert 0.2 <= time.monotonic() - started < 1.0
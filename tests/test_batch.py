@@ -0,0 +1,43 @@
+import sys
+import asyncio
+from pathlib import Path
+
+import pytest
+
+from socx import Regression
+
+
+FAKE_SCHEDULER = Path(__file__).parent / "fake_scheduler.py"
+
+
+@pytest.mark.parametrize("purge", [False, True])
+def test(tmp_path, monkeypatch, sandbox, purge):
+    if purge:
+        monkeypatch.setenv("FAKE_SCHEDULER_PURGE", "1")
+    monkeypatch.setenv("FAKE_SCHEDULER_DIR", str(tmp_path / "scheduler"))
+    fake = f"{sys.executable} {FAKE_SCHEDULER}"
+    batch = "regression.executor.batch"
+    sandbox("regression.max_runs_in_parallel", 16)
+    sandbox("regression.executor.backend", "batch")
+    sandbox(f"{batch}.directory", tmp_path / "batch")
+    sandbox(f"{batch}.submit", f"{fake} submit {{count}} {{script}}")
+    sandbox(f"{batch}.status", f"{fake} status {{jobs}}")
+    sandbox(f"{batch}.cancel", f"{fake} cancel {{job}} {{index}}")
+    sandbox(f"{batch}.index_var", "FAKE_ARRAY_INDEX")
+    sandbox(f"{batch}.window", 0.2)
+    sandbox(f"{batch}.poll_interval", 0.2)
+    regression = Regression.from_lines(
+        "batch",
+        [
+            f"{sys.executable} -c 'print({i}); exit({i % 2})'"
+            f" --test batch/test_{i}.cfg"
+            for i in range(8)
+        ],
+    )
+    asyncio.run(regression.start())
+
+    submissions = list((tmp_path / "scheduler").glob("*.job"))
+    assert len(submissions) == 1
+    for i, test in enumerate(regression):
+        assert test.returncode == i % 2
+        assert test.stdout_tail.strip() == str(i)
@@ -0,0 +1,42 @@
+import sys
+import time
+import asyncio
+
+from socx import Regression
+from socx.regression.signature import normalize
+
+
+def test_normalize():
+    assert normalize(
+        "UVM_ERROR @ 1200ns: /top/env/agent0 [CHK] bad data 0x1f at 12:30:01"
+    ) == normalize(
+        "UVM_ERROR @ 98ns: /top/env/agent3 [CHK] bad data 0xa0 at 01:02:03"
+    )
+
+
+def test(sandbox):
+    sandbox("regression.max_runs_in_parallel", 3)
+    sandbox("regression.breaker.enabled", True)
+    sandbox("regression.breaker.window", 4)
+    sandbox("regression.breaker.threshold", 0.5)
+    sandbox("regression.breaker.grace", 1.0)
+    # The simulator of the slow test is a child of its shell.
+    slow = f"{sys.executable} -c 'import time; time.sleep(30)'; true"
+    regression = Regression.from_lines(
+        "breaker",
+        [f"{slow} --test breaker/slow.cfg"]
+        + [
+            f"{sys.executable} -c 'exit(3)' --test breaker/test_{i}.cfg"
+            for i in range(40)
+        ],
+    )
+    started = time.monotonic()
+    asyncio.run(regression.start())
+
+    assert time.monotonic() - started < 10
+    assert regression.aborted == "exit code 3"
+    assert regression.status.name == "Terminated"
+    assert sum(test.idle for test in regression) > 30
+    (slow,) = regression.find("slow.cfg")
+    assert slow.terminated
+    assert slow.reason == "regression aborted: exit code 3"
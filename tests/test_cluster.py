@@ -0,0 +1,40 @@
+import time
+
+from socx.regression import TestResult as SimResult
+from socx.regression.cluster import ErrorClusters
+
+
+def test(tmp_path, sandbox, finished):
+    def failed(i: int, *errors: str):
+        line = f"run --test cluster/test_{i}.cfg --seed {i}"
+        return finished(line, SimResult.Failed, duration=i, errors=errors)
+
+    tests = [
+        failed(
+            i,
+            f"UVM_ERROR /a/b{i % 3}/c.sv({i}) @ {i}.5ns:"
+            f" [CHK] mismatch 0x{i:x}",
+            f"UVM_ERROR seed={i} timeout at 12:00:{i % 60:02d}",
+        )
+        for i in range(20000)
+    ]
+    tests.append(failed(20000))
+    started = time.monotonic()
+    clusters = ErrorClusters.from_tests(reversed(tests), examples=2)
+    assert time.monotonic() - started < 5
+    assert clusters.num_tests == len(tests)
+    assert [(len(c), c.errors) for c in clusters] == [
+        (20000, 20000),
+        (20000, 20000),
+        (1, 0),
+    ]
+    first = next(iter(clusters))
+    assert first.first is tests[0]
+    assert first.last is tests[-2]
+    path = tmp_path / "00-00_clusters.log"
+    clusters.write(path)
+    text = path.read_text()
+    assert text.startswith("# 3 error signatures across 20001 failed tests")
+    assert "UVM_ERROR <path>(<n>) @ <n>ns: [CHK] mismatch <hex>" in text
+    assert "UVM_ERROR seed=<seed> timeout at <time>" in text
+    assert text.count("    $ run --test") == 5
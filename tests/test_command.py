@@ -0,0 +1,47 @@
+from socx import TestCommand
+
+
+def test_options():
+    cmd = TestCommand("socrun --gui --flow sim -seed 3 --test a/b.cfg extra")
+    assert cmd.name == "socrun"
+    assert cmd.flow == "sim"
+    assert cmd.seed == "3"
+    assert cmd.test == "a/b.cfg"
+    assert not hasattr(cmd, "gui")
+    assert cmd.extract_argv("--seed") == "3"
+    assert not hasattr(cmd, "build")
+    assert not hasattr(cmd, "__dict__")
+
+
+def test_interned():
+    a = TestCommand("socrun --flow sim --build Debug --test a/b.cfg")
+    b = TestCommand("socrun --flow sim --build Debug --test a/c.cfg")
+    assert all(x is y for x, y in zip(a.args[:-1], b.args[:-1], strict=True))
+
+
+def test_equality():
+    a = TestCommand("socrun --seed 1 --build 2 --test a/b.cfg")
+    b = TestCommand("socrun --test a/b.cfg --build 2 --seed 1")
+    c = TestCommand("socrun --seed 2 --build 1 --test a/b.cfg")
+    assert a == b
+    assert hash(a) == hash(b)
+    assert a != c
+    assert len({a, b, c}) == 2
+
+
+def test_valueless_flags():
+    a = TestCommand("socrun --test a/b.cfg --gui")
+    b = TestCommand("socrun --test a/b.cfg")
+    c = TestCommand("socrun --gui --test a/b.cfg")
+    assert a != b
+    assert a == c
+    assert dict(c.options) == {"test": "a/b.cfg"}
+
+
+def test_repeated_options():
+    a = TestCommand("socrun --test a/b.cfg -seed 1 -seed 2")
+    b = TestCommand("socrun --test a/b.cfg -seed 1")
+    c = TestCommand("socrun --test a/b.cfg -seed 2 -seed 1")
+    assert a != b
+    assert a != c
+    assert a.seed == b.seed == "1"
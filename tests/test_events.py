@@ -0,0 +1,47 @@
+import os
+import json
+import asyncio
+
+from socx.regression.events import EventBus
+from socx.regression.events import JsonlSink
+from socx.regression.events import EventKind
+
+
+def test_drops():
+    bus = EventBus(capacity=3)
+
+    async def run():
+        queue = bus.subscribe(maxsize=1)
+        for i in range(5):
+            bus.note(f"note {i}")
+        bus.start()
+        await bus.close()
+        return queue
+
+    queue = asyncio.run(run())
+    assert bus.dropped == 2
+    assert bus.lagged == 2
+    event = queue.get_nowait()
+    assert (event.kind, event.data) == (EventKind.Note, {"text": "note 0"})
+
+
+def test_retention(tmp_path):
+    for i in range(4):
+        old = tmp_path / f"old-{i}.jsonl"
+        old.write_text("")
+        os.utime(old, (i, i))
+    bus = EventBus(sinks=[JsonlSink(tmp_path / "new.jsonl", keep=3)])
+
+    async def run():
+        bus.start()
+        bus.note("note")
+        await bus.close()
+
+    asyncio.run(run())
+    assert sorted(path.name for path in tmp_path.iterdir()) == [
+        "new.jsonl",
+        "old-2.jsonl",
+        "old-3.jsonl",
+    ]
+    (line,) = (tmp_path / "new.jsonl").read_text().splitlines()
+    assert json.loads(line)["text"] == "note"
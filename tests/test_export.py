@@ -0,0 +1,49 @@
+import datetime as dt
+
+from socx.regression import TestResult as SimResult
+from socx.regression import Regression
+from socx.regression.export import ParquetExporter
+from socx.regression.export import ResultsHistory
+
+
+def test_export(tmp_path, sandbox, finished):
+    def regression(name: str, started: float) -> Regression:
+        tests = [
+            finished(
+                f"socrun --test {flow}/test_{number}.cfg -flow {flow}",
+                SimResult[result],
+                started,
+                10.0 * (number + 1),
+                ("UVM_ERROR @ 100ns: mismatch",) if number == 1 else (),
+            )
+            for number, (flow, result) in enumerate(
+                [("dv", "Passed"), ("dv", "Failed"), ("gls", "Passed")]
+            )
+        ]
+        rv = Regression(name, tests)
+        rv._started_time = started
+        return rv
+
+    exporter = ParquetExporter(tmp_path / "results")
+    today = dt.datetime.now().timestamp()
+    old = today - 3 * 86400
+    path = exporter.write(regression("nightly", today))
+    exporter.write(regression("nightly", old))
+    assert path.parent.name == f"date={dt.date.today().isoformat()}"
+
+    history = ResultsHistory(tmp_path / "results")
+    slowest = history.slowest(limit=2).to_pylist()
+    assert [row["duration_count"] for row in slowest] == [2, 2]
+    assert slowest[0]["duration_mean"] == 30.0
+
+    recent = history.read(["name", "signature", "date"], days=1).to_pylist()
+    assert len(recent) == 3
+    assert recent[1]["signature"] == "UVM_ERROR @ <n>ns: mismatch"
+
+    rates = {
+        row["flow"]: row["failure_rate"]
+        for row in history.failure_rates().to_pylist()
+    }
+    assert rates == {"dv": 0.5, "gls": 0.0}
+    assert len(history.trend()) == 2
+    assert len(ResultsHistory(tmp_path / "missing").trend()) == 0
@@ -0,0 +1,125 @@
+import sys
+import json
+import time
+import signal
+import asyncio
+import subprocess
+
+from socx import Regression
+from socx.regression import TestResult as SimResult
+from socx.regression.journal import Journal
+
+# Fake simulator: records that it ran, then passes, fails, or hangs until the
+# regression is resumed.
+SIMULATOR = """\
+import sys, time, pathlib
+root = pathlib.Path(__file__).parent
+mode, test = sys.argv[1], pathlib.Path(sys.argv[3])
+with (root / "ran.txt").open("a") as file:
+    print(test.stem, file=file)
+if mode == "pass":
+    logs = root / "runtime" / test.parent / test.stem / "logs"
+    logs.mkdir(parents=True, exist_ok=True)
+    (logs / "run.log").write_text(
+        "$finish at simulation time 100.00ns\\n--- UVM Report Summary ---\\n"
+    )
+elif mode == "fail":
+    logs = root / "runtime" / test.parent / test.stem / "logs"
+    logs.mkdir(parents=True, exist_ok=True)
+    (logs / "run.log").write_text("UVM_ERROR @ 10ns: boom\\n")
+    exit(1)
+else:
+    while not (root / "resumed").exists():
+        time.sleep(0.05)
+"""
+
+RUNNER = """\
+import sys, json, asyncio
+from socx import settings, Regression
+config, lines = json.loads(sys.argv[1]), json.loads(sys.argv[2])
+for key, value in config.items():
+    settings.set(key, value)
+asyncio.run(Regression.from_lines("resume", lines).start())
+"""
+
+TESTS = {
+    "pass_0": "pass",
+    "pass_1": "pass",
+    "fail_2": "fail",
+    "hang_3": "hang",
+    "pass_4": "pass",
+}
+
+
+def test_resume(tmp_path, sandbox):
+    sandbox("regression.max_runs_in_parallel", 1)
+    (tmp_path / "sim.py").write_text(SIMULATOR)
+    simulator = f"{sys.executable} {tmp_path / 'sim.py'}"
+    lines = [
+        f"{simulator} {mode} --test resume/{name}.cfg"
+        for name, mode in TESTS.items()
+    ]
+    config = {
+        "regression.max_runs_in_parallel": 1,
+        "regression.runtime.path": str(tmp_path / "runtime"),
+        "regression.history.path": str(tmp_path / "history.json"),
+        "regression.store.enabled": False,
+        "regression.events.jsonl.enabled": False,
+        "regression.journal.enabled": True,
+        "regression.journal.directory": str(tmp_path / "journals"),
+    }
+    ran = tmp_path / "ran.txt"
+
+    # Kill the regression while the hanging test runs.
+    runner = subprocess.Popen(
+        [sys.executable, "-c", RUNNER, json.dumps(config), json.dumps(lines)],
+        stdout=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 30
+    while "hang_3" not in (ran.read_text() if ran.exists() else ""):
+        assert runner.poll() is None
+        assert time.monotonic() < deadline
+        time.sleep(0.05)
+    runner.send_signal(signal.SIGKILL)
+    runner.wait()
+    killed = time.time()
+    (tmp_path / "resumed").touch()
+
+    (path,) = (tmp_path / "journals").glob("resume-*.jsonl")
+    state = Journal.replay(path)
+    assert state.lines == lines
+    assert sorted(state.finals) == [0, 1, 2]
+
+    regression = Regression.from_journal(path)
+    asyncio.run(regression.start())
+
+    assert ran.read_text().split() == [
+        "pass_0",
+        "pass_1",
+        "fail_2",
+        "hang_3",
+        "hang_3",
+        "pass_4",
+    ]
+    results = {test.name: test for test in regression}
+    for i, name in enumerate(("pass_0", "pass_1", "fail_2")):
+        test = results[f"{name}.cfg"]
+        assert test.finished
+        assert test._started_time == state.finals[i]["start"] < killed
+    failed = results["fail_2.cfg"]
+    assert failed.result is SimResult.Failed
+    assert failed.returncode == 1
+    assert failed.errors == ("UVM_ERROR @ 10ns: boom",)
+    assert failed.reason is None
+    assert results["pass_0.cfg"].returncode == 0
+    assert results["hang_3.cfg"]._started_time > killed
+    assert all(test.finished for test in regression)
+    assert [test.result for test in regression] == [
+        SimResult.Passed,
+        SimResult.Passed,
+        SimResult.Failed,
+        SimResult.Failed,
+        SimResult.Passed,
+    ]
+    assert (regression.progress.passed, regression.progress.failed) == (3, 2)
+    assert len(Journal.replay(path).finals) == len(TESTS)
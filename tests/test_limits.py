@@ -0,0 +1,34 @@
+import sys
+import asyncio
+
+from socx.regression import Test as SimTest
+from socx.regression import TestResult as SimResult
+from socx.regression.limits import ResourceLimits
+from socx.regression.executor import LocalExecutor
+
+SPIN = f"exec {sys.executable} -c 'while True: pass'"
+
+ALLOCATE = f"{sys.executable} -c 'bytearray(256 << 20)'"
+
+
+def test_cpu_limit(sandbox):
+    test = SimTest(f"{SPIN} --test limits/cpu.cfg")
+    test.executor = LocalExecutor(ResourceLimits(cpu_seconds=1))
+    asyncio.run(test.start())
+    assert test.terminated
+    assert test.result is SimResult.Failed
+    assert test.reason == "exceeded cpu time limit of 1 seconds"
+
+
+def test_memory_limit(sandbox):
+    limits = ResourceLimits(memory_mb=128, cgroup=False)
+    test = SimTest(f"{ALLOCATE} --test limits/memory.cfg")
+    test.executor = LocalExecutor(limits)
+    asyncio.run(test.start())
+    assert test.returncode != 0
+    assert "MemoryError" in test.stderr_tail
+    assert test.result is SimResult.Failed
+    assert test.reason == (
+        "likely exceeded memory limit (RLIMIT_AS) of 128 MB"
+    )
+    assert limits.confine("unused").group is None
@@ -0,0 +1,86 @@
+import os
+import sys
+import time
+import asyncio
+
+from socx.regression import Test as SimTest
+from socx.regression import TestResult as SimResult
+from socx.regression.monitor import LogMonitor
+from socx.regression.monitor import LogFollower
+from socx.regression.scanner import LogScanner
+
+
+def test_follower(tmp_path):
+    path = tmp_path / "run.log"
+    follower = LogFollower(path)
+    assert follower.read() == b""
+    path.write_bytes(b"one\ntw")
+    assert follower.read() == b"one\n"
+    assert follower.read() == b""
+    with path.open("ab") as file:
+        file.write(b"o\n")
+    assert follower.read() == b"two\n"
+    path.write_bytes(b"new\n")
+    assert follower.read() == b"new\n"
+
+
+def test_stale(tmp_path):
+    path = tmp_path / "run.log"
+    path.write_bytes(b"UVM_FATAL from a previous run\n")
+    os.utime(path, (0, 0))
+    follower = LogFollower(path, since=time.time())
+    assert follower.read() == b""
+    with path.open("ab") as file:
+        file.write(b"fresh\n")
+    assert follower.read() == b"fresh\n"
+
+
+def test_fatal(tmp_path, sandbox):
+    logs = tmp_path / "runtime" / "monitor" / "logs"
+    test = SimTest(
+        f"mkdir -p {logs} && echo 'UVM_INFO fine' > {logs}/run.log"
+        f" && echo 'UVM_FATAL @ 10ns: boom' >> {logs}/run.log"
+        f" && exec {sys.executable} -c 'import time; time.sleep(30)'"
+        " --test monitor.cfg"
+    )
+    test.monitor = LogMonitor(LogScanner(), ["UVM_FATAL"], interval=0.1)
+    started = time.monotonic()
+    asyncio.run(test.start())
+    assert time.monotonic() - started < 10
+    assert test.terminated
+    assert test.result is SimResult.Failed
+    assert test.reason == "fatal error: UVM_FATAL @ 10ns: boom"
+    assert test.errors == ("UVM_FATAL @ 10ns: boom",)
+
+
+def test_fatal_without_exec(tmp_path, sandbox):
+    logs = tmp_path / "runtime" / "shell" / "logs"
+    # The simulator is a child of the shell, which waits for it.
+    test = SimTest(
+        f"mkdir -p {logs} && echo 'UVM_FATAL @ 10ns: boom' > {logs}/run.log"
+        f" && {sys.executable} -c 'import time; time.sleep(30)'; true"
+        " --test shell.cfg"
+    )
+    test.monitor = LogMonitor(
+        LogScanner(), ["UVM_FATAL"], interval=0.1, grace=1.0
+    )
+    started = time.monotonic()
+    asyncio.run(test.start())
+    assert time.monotonic() - started < 10
+    assert test.terminated
+    assert test.reason == "fatal error: UVM_FATAL @ 10ns: boom"
+
+
+def test_stale_fatal(tmp_path, sandbox):
+    logs = tmp_path / "runtime" / "stale" / "logs"
+    logs.mkdir(parents=True)
+    (logs / "run.log").write_text("UVM_FATAL @ 10ns: from a previous run\n")
+    os.utime(logs / "run.log", (0, 0))
+    test = SimTest(
+        f"{sys.executable} -c 'import time; time.sleep(1)' --test stale.cfg"
+    )
+    test.monitor = LogMonitor(LogScanner(), ["UVM_FATAL"], interval=0.1)
+    asyncio.run(test.start())
+    assert not test.terminated
+    assert test.reason is None
+    assert test.returncode == 0
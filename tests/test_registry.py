@@ -0,0 +1,29 @@
+from socx import Regression
+from socx.regression.test import TestStatus as Status
+from socx.regression.test import TestResult as Result
+
+
+def test(sandbox):
+    regression = Regression.from_lines(
+        "registry",
+        [
+            f"socrun --flow sim --build {('Debug', 'Release')[i % 2]}"
+            f" --test a/t{i % 5}.cfg --seed {i}"
+            for i in range(20)
+        ],
+    )
+    registry = regression.registry
+    first, second = regression.tests[:2]
+    assert first in regression
+    assert registry.get(first.uid) is first
+    assert len(registry.by_name("t0.cfg")) == 4
+    assert len(registry.by_build("sim", "Debug")) == 10
+    assert registry.count(Status.Idle) == 20
+
+    first.status = Status.Running
+    second.status = Status.Finished
+    second.result = Result.Failed
+    assert registry.by_status(Status.Running) == (first,)
+    assert registry.count(Status.Idle) == 18
+    assert regression.find(build="Release", result=Result.Failed) == [second]
+    assert regression.find(build="Debug", result=Result.Failed) == []
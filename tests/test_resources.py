@@ -0,0 +1,39 @@
+import sys
+import asyncio
+
+from socx.regression import Test as SimTest
+from socx.regression.store import ResultsStore
+from socx.regression.resources import ResourceSampler
+
+# Holds 64 MB from a child process while burning cpu for a second.
+HEAVY = (
+    f"{sys.executable} -c 'import subprocess, sys, time;"
+    " p = subprocess.Popen([sys.executable, \"-c\","
+    " \"b = bytearray(64 << 20); import time; time.sleep(1.5)\"]);"
+    " end = time.time() + 1.0\n"
+    "while time.time() < end: pass\n"
+    "p.wait()'"
+)
+
+
+def test_sampler(tmp_path, sandbox):
+    test = SimTest(f"{HEAVY} --test resources/heavy.cfg")
+    test.sampler = ResourceSampler(interval=0.1)
+
+    async def run():
+        await test.start()
+        store = ResultsStore(tmp_path / "results.db", flush_interval=0.1)
+        await store.open()
+        store.record(None, test)
+        await store.close()
+        return store.test_history(test.name)
+
+    rows = asyncio.run(run())
+    stats = test.resources
+    assert stats.samples > 0
+    assert stats.peak_rss > 64 << 20
+    assert stats.children >= 1
+    assert stats.cpu_time > 0.5
+    assert 0.2 < stats.cpu_utilization <= 1.5
+    assert rows[0]["t_peak_rss"] == stats.peak_rss
+    assert rows[0]["t_cpu_time"] == stats.cpu_time
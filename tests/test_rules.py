@@ -0,0 +1,66 @@
+import os
+import pickle
+
+from socx.regression.rules import RuleSet
+
+
+def test_match(tmp_path):
+    rules = RuleSet([r"INFO = ", r"(a)(b)c", r"x\d+", r"AEON\/MTP"])
+    assert [rule.literal for rule in rules.rules] == [
+        b"INFO = ",
+        None,
+        None,
+        b"AEON/MTP",
+    ]
+    assert rules.match(b"UVM_ERROR INFO = 1") == 0
+    assert rules.match(b"UVM_ERROR abc") == 1
+    assert rules.match(b"UVM_ERROR x12") == 2
+    assert rules.match(b"UVM_ERROR AEON/MTP") == 3
+    assert rules.match(b"UVM_ERROR") is None
+    rules.count({2: 3})
+    assert [rule.pattern for rule in rules.unused()] == [
+        r"INFO = ",
+        r"(a)(b)c",
+        r"AEON\/MTP",
+    ]
+
+
+def test_uncombinable():
+    rules = RuleSet(
+        [
+            r"x\d+",
+            r"(?i)foo bar",
+            r"(\w+) \1 again",
+            r"(?P<n>id\d) ok",
+            r"(?P<n>tag\d) ok",
+        ]
+    )
+    assert rules.match(b"UVM_ERROR FOO BAR") == 1
+    assert rules.match(b"UVM_ERROR twice twice again") == 2
+    assert rules.match(b"UVM_ERROR twice once again") is None
+    assert rules.match(b"UVM_ERROR id1 ok") == 3
+    assert rules.match(b"UVM_ERROR tag2 ok") == 4
+    assert rules.match(b"UVM_ERROR x12") == 0
+
+
+def test_reload(tmp_path):
+    path = tmp_path / "ignore.txt"
+    path.write_text("first\n\n")
+    rules = RuleSet.shared((), path)
+    assert RuleSet.shared((), path) is rules
+    assert pickle.loads(pickle.dumps(rules)) is rules
+    assert [rule.pattern for rule in rules.rules] == ["first"]
+    fingerprint = rules.fingerprint
+    assert not rules.refresh()
+    path.write_text("first\nsec(ond\nthird.*\n")
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+    assert rules.refresh()
+    assert [rule.source for rule in rules.rules] == [
+        "ignore.txt:1",
+        "ignore.txt:2",
+        "ignore.txt:3",
+    ]
+    assert rules.match(b"sec(ond") is None
+    assert rules.match(b"a third one") == 2
+    assert rules.fingerprint != fingerprint
@@ -0,0 +1,143 @@
+import os
+import io
+import bz2
+import gzip
+import lzma
+import asyncio
+
+import pytest
+
+from socx.regression import scanner
+from socx.regression.scanner import ScanPool
+from socx.regression.scanner import ScanCache
+from socx.regression.scanner import LogScanner
+from socx.regression.scanner import IGNORE_PATTERNS
+
+
+LOG = """\
+UVM_ERROR /a/b.sv(12) @ 10ns: first error
+UVM_ERROR /a/b.sv(13) @ 11ns: adjacent error
+UVM_INFO all good
+UVM_WARNING : LP_MSG_SEV ignored
+--- UVM Report Summary ---
+UVM_ERROR :    0
+$finish at simulation time 123456.00ns
+UVM_FATAL last line"""
+
+
+def test_scan(tmp_path):
+    path = tmp_path / "run.log"
+    path.write_text(LOG)
+    rv = LogScanner().scan(path)
+    assert rv.result == "FAIL"
+    assert rv.sim_ended
+    assert rv.sim_time == 123456
+    assert rv.errors == [
+        "UVM_ERROR /a/b.sv(12) @ 10ns: first error",
+        "UVM_ERROR /a/b.sv(13) @ 11ns: adjacent error",
+        "UVM_FATAL last line",
+    ]
+    stream = LogScanner(chunk_size=7).scan_stream(io.BytesIO(LOG.encode()))
+    assert stream == rv
+
+
+def test_long_line(monkeypatch):
+    monkeypatch.setattr(scanner, "LONG_LINE", 64)
+    data = b"x" * 1000 + b" UVM_FATAL in a long line " + b"x" * 1000
+    rv = LogScanner(max_line=16, chunk_size=16).scan_stream(io.BytesIO(data))
+    assert rv.result == "FAIL"
+    assert len(rv.errors) == 1
+    assert len(rv.errors[0]) <= 16
+
+
+def test_pass(tmp_path):
+    path = tmp_path / "run.log"
+    path.write_text("\n".join(LOG.splitlines()[2:-1]))
+    rv = LogScanner().scan(path)
+    assert rv.result == "PASS"
+    assert not rv.errors
+    path.write_text("")
+    assert LogScanner().scan(path).result == "FAIL"
+
+
+def test_pool(tmp_path):
+    path = tmp_path / "run.log"
+    path.write_text(LOG)
+    pool = ScanPool(LogScanner(), processes=2)
+
+    async def scan_all():
+        return await asyncio.gather(*(pool.scan(path) for _ in range(4)))
+
+    try:
+        results = asyncio.run(scan_all())
+    finally:
+        pool.close()
+    assert results == [LogScanner().scan(path)] * 4
+
+
+class CrashingScanner(LogScanner):
+    def scan(self, path):
+        if path.parent.name == "crash":
+            os._exit(1)
+        return super().scan(path)
+
+
+def test_broken_pool(tmp_path):
+    paths = [tmp_path / name / "run.log" for name in ("a", "crash", "b", "c")]
+    for path in paths:
+        path.parent.mkdir()
+        path.write_text(LOG)
+    pool = ScanPool(CrashingScanner(), processes=1)
+
+    async def scan_all():
+        return await asyncio.gather(
+            *(pool.scan(path) for path in paths), return_exceptions=True
+        )
+
+    try:
+        results = asyncio.run(scan_all())
+        assert asyncio.run(pool.scan(paths[0])) == results[0]
+    finally:
+        pool.close()
+    assert isinstance(results.pop(1), ValueError)
+    assert results == [LogScanner().scan(paths[0])] * 3
+
+
+def test_cache(tmp_path):
+    path = tmp_path / "run.log"
+    path.write_text(LOG)
+    # Reading a log whose atime is older than its mtime updates the atime
+    # under relatime, which must not invalidate its first scan.
+    os.utime(path, ns=(0, path.stat().st_mtime_ns))
+    cache = ScanCache(tmp_path / "scans.db")
+    pool = ScanPool(LogScanner(), processes=0, cache=cache)
+    try:
+        first = asyncio.run(pool.scan(path))
+        assert asyncio.run(pool.scan(path)) == first
+        assert (cache.hits, cache.misses) == (1, 1)
+        pool.scanner = LogScanner(ignores=(*IGNORE_PATTERNS, "UVM_FATAL"))
+        assert len(asyncio.run(pool.scan(path)).errors) == 2
+        path.write_text("--- UVM Report Summary ---\n")
+        assert asyncio.run(pool.scan(path)).result == "PASS"
+        assert (cache.hits, cache.misses) == (1, 3)
+    finally:
+        pool.close()
+
+
+def test_compressed(tmp_path):
+    expected = LogScanner().scan_stream(io.BytesIO(LOG.encode()))
+    for suffix, opener in (
+        (".gz", gzip.open),
+        (".xz", lzma.open),
+        (".bz2", bz2.open),
+    ):
+        path = tmp_path / suffix[1:] / "run.log"
+        path.parent.mkdir()
+        with opener(path.with_name(f"run.log{suffix}"), "wb") as file:
+            file.write(LOG.encode())
+        assert LogScanner().scan(path) == expected
+    path = tmp_path / "bad" / "run.log"
+    path.parent.mkdir()
+    path.with_name("run.log.gz").write_bytes(b"not gzip")
+    with pytest.raises(ValueError, match="failed to decompress"):
+        LogScanner().scan(path)
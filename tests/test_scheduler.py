@@ -0,0 +1,33 @@
+import sys
+import asyncio
+
+from socx import Regression
+from socx.regression.history import RuntimeHistory
+
+DURATIONS = {"short": 1.0, "long": 9.0, "medium": 4.0}
+
+
+def test_ljf(tmp_path, sandbox, finished):
+    sandbox("regression.max_runs_in_parallel", 1)
+    sandbox("regression.scheduler", "ljf")
+    lines = {
+        name: f"{sys.executable} -c 'pass' --test ljf/{name}.cfg"
+        for name in ("unseen", *DURATIONS)
+    }
+    history = RuntimeHistory(tmp_path / "history.json")
+    for name, duration in DURATIONS.items():
+        history.record(finished(lines[name], duration=duration))
+    history.save()
+
+    regression = Regression.from_lines("ljf", lines.values())
+    asyncio.run(regression.start())
+
+    order = sorted(regression, key=lambda test: test._started_time)
+    assert [test.name for test in order] == [
+        "long.cfg",
+        "medium.cfg",
+        "short.cfg",
+        "unseen.cfg",
+    ]
+    assert all(test.finished for test in regression)
+    assert len(RuntimeHistory(tmp_path / "history.json")) == 4
@@ -0,0 +1,51 @@
+import sys
+import asyncio
+
+from socx import Regression
+from socx.regression.store import ResultsStore
+
+
+def test_persistence(tmp_path, sandbox):
+    path = tmp_path / "results.db"
+    sandbox("regression.store.enabled", True)
+    sandbox("regression.store.path", path)
+    sandbox("regression.store.flush_interval", 0.1)
+    regression = Regression.from_lines(
+        "store",
+        [
+            f"{sys.executable} -c 'exit({i % 2})' --test store/test_{i}.cfg"
+            for i in range(4)
+        ],
+    )
+    asyncio.run(regression.start())
+    store = ResultsStore(path)
+    (row,) = store.query("SELECT * FROM Regression")
+    assert (row["r_name"], row["r_status"]) == ("store", "Finished")
+    assert row["r_finished"] >= row["r_started"]
+    rows = store.query("SELECT * FROM Test ORDER BY t_name")
+    assert [(r["t_name"], r["t_exit_code"]) for r in rows] == [
+        (f"test_{i}.cfg", i % 2) for i in range(4)
+    ]
+    assert all(r["r_id"] == row["r_id"] for r in rows)
+    assert store.test_history("test_1.cfg")[0]["t_status"] == "Finished"
+
+
+def test_bad_rows(tmp_path, finished):
+    store = ResultsStore(tmp_path / "results.db", flush_interval=0.5)
+    tests = [finished(f"socrun --test store/test_{i}.cfg") for i in range(4)]
+
+    async def run():
+        await store.open()
+        store.record(None, tests[0])
+        # Fails the foreign key of its regression, but not the whole batch.
+        store.record(404, tests[1])
+        store.record(None, tests[2])
+        await store.close()
+        # The writer is gone, recording must neither raise nor retry.
+        store.record(None, tests[3])
+        store.record(None, tests[3])
+
+    asyncio.run(run())
+    assert store.disabled
+    rows = store.query("SELECT t_name FROM Test ORDER BY t_name")
+    assert [row["t_name"] for row in rows] == ["test_0.cfg", "test_2.cfg"]
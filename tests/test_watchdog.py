@@ -0,0 +1,51 @@
+import sys
+import time
+import asyncio
+
+from socx.regression import Test as SimTest
+from socx.regression import TestStatus as SimStatus
+from socx.regression import TestResult as SimResult
+from socx.regression.history import RuntimeHistory
+from socx.regression.watchdog import Watchdog
+
+# Ignores SIGINT, so that the watchdog has to escalate.
+HANG = (
+    f"exec {sys.executable} -c 'import signal, time;"
+    " signal.signal(signal.SIGINT, signal.SIG_IGN);"
+    " print(1, flush=True); time.sleep(60)'"
+)
+
+
+def _run(test: SimTest) -> float:
+    started = time.monotonic()
+    asyncio.run(test.start())
+    return time.monotonic() - started
+
+
+def test_timeout(tmp_path, sandbox):
+    history = RuntimeHistory(tmp_path / "history.json")
+    test = SimTest(f"{HANG} --test watchdog/timeout.cfg")
+    for duration in (0.1, 0.2, 0.3):
+        test._started_time, test._finished_time = 0.0, duration
+        test._status = SimStatus.Finished
+        history.record(test)
+    test._status = SimStatus.Idle
+    test._started_time = test._finished_time = None
+    watchdog = Watchdog(
+        factor=2.0, min_timeout=0.5, interval=0.1, grace=0.5, history=history
+    )
+    assert watchdog.deadline(test) == 0.6
+    test.watchdog = watchdog
+    assert _run(test) < 10
+    assert test.status is SimStatus.Terminated
+    assert test.result is SimResult.Failed
+    assert test.reason == "timeout after 1 seconds"
+    assert test.returncode == -15
+
+
+def test_inactivity(sandbox):
+    test = SimTest(f"{HANG} --test watchdog/hang.cfg")
+    test.watchdog = Watchdog(inactivity=0.5, interval=0.1, grace=0.5)
+    assert _run(test) < 10
+    assert test.terminated
+    assert test.reason.startswith("no output for")
@@ -0,0 +1,40 @@
+import sys
+import asyncio
+
+from socx import Regression
+from socx.regression.worker import Worker
+
+
+async def _run(regression: Regression, workers: list[Worker]) -> None:
+    async def connect(worker: Worker) -> None:
+        await regression.coordinator.serving.wait()
+        worker.port = regression.coordinator.port
+        await worker.run()
+
+    async with asyncio.TaskGroup() as tg:
+        tg.create_task(regression.start())
+        for worker in workers:
+            tg.create_task(connect(worker))
+
+
+def test(sandbox):
+    sandbox("regression.max_runs_in_parallel", 4)
+    sandbox("regression.distributed.listen", "127.0.0.1:0")
+    sandbox("regression.distributed.local_runners", False)
+    sandbox("regression.distributed.wait_delay", 0.1)
+    regression = Regression.from_lines(
+        "distributed",
+        [
+            f"{sys.executable} -c 'import time; time.sleep(0.2);"
+            f" print({i}); exit({i % 2})' --test worker/test_{i}.cfg"
+            for i in range(8)
+        ],
+    )
+    workers = [Worker("127.0.0.1", 0, slots=2) for _ in range(2)]
+    asyncio.run(_run(regression, workers))
+
+    assert all(worker.completed > 0 for worker in workers)
+    assert sum(worker.completed for worker in workers) == len(regression)
+    for i, test in enumerate(regression):
+        assert test.finished
+        assert test.returncode == i % 2